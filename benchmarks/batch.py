@@ -0,0 +1,128 @@
+# Benchmark of the batch runner compared to separate runs of each config
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+from benchmarks.generator import create_config, generate_export
+
+
+def run_cli(arguments: list[str]) -> float:
+    """Runs the command line interface in a new interpreter.
+
+    Args:
+        arguments: Arguments of the command.
+
+    Returns:
+        The wall time in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "visualizer.cli"] + arguments,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env=dict(os.environ, MPLBACKEND="Agg")
+        )
+    return time.perf_counter() - start
+
+
+def benchmark_batch(rows: int,
+                    config_count: int,
+                    export_count: int,
+                    workers: int,
+                    outputs: list[str],
+                    work_dir: str
+                    ) -> dict:
+    """Runs configs sharing synthetic exports separately and as a batch.
+
+    Args:
+        rows: Number of rows of each export.
+        config_count: Number of configs.
+        export_count: Number of distinct exports the configs are spread
+            over.
+        workers: Number of worker processes of the batch.
+        outputs: Outputs to be generated.
+        work_dir: Directory for the exports, configs and outputs.
+
+    Returns:
+        The measurements.
+    """
+    export_paths = []
+    for index in range(export_count):
+        export_paths.append(os.path.join(work_dir, f"export_{index}.csv"))
+        generate_export(export_paths[-1], rows, 20, seed=index)
+    config_paths = {"separate": [], "batch": []}
+    for mode, paths in config_paths.items():
+        config_dir = os.path.join(work_dir, f"configs_{mode}")
+        os.makedirs(config_dir)
+        for index in range(config_count):
+            cfg = create_config(
+                export_paths[index % export_count],
+                os.path.join(work_dir, mode, f"{index:03d}") + "/",
+                2022,
+                # households differ in their positions
+                10 + index % 10
+                )
+            paths.append(os.path.join(config_dir, f"{index:03d}.yml"))
+            with open(paths[-1], "w") as yaml_file:
+                yaml.safe_dump(cfg, yaml_file)
+
+    separate_time = sum(
+        run_cli(["--config", path, "--outputs"] + outputs)
+        for path in config_paths["separate"]
+        )
+    batch_time = run_cli(
+        ["batch", os.path.dirname(config_paths["batch"][0]),
+         "--workers", str(workers), "--outputs"] + outputs
+        )
+    return {
+        "rows": rows,
+        "configs": config_count,
+        "exports": export_count,
+        "workers": workers,
+        "separate_wall_time_s": separate_time,
+        "batch_wall_time_s": batch_time,
+        "speedup": separate_time / batch_time,
+        }
+
+
+def main():
+    """Entry point of the batch benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        prog="batch",
+        description="benchmarks the batch runner against separate runs."
+        )
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="number of rows of each synthetic export")
+    parser.add_argument("--configs", type=int, default=12,
+                        help="number of configs")
+    parser.add_argument("--exports", type=int, default=2,
+                        help="number of distinct exports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes of the batch")
+    parser.add_argument("--outputs", nargs="+",
+                        default=["overview", "positions"],
+                        help="outputs to be generated")
+    parser.add_argument("--output", type=str,
+                        default="batch_results.json",
+                        help="json file the results are written to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = benchmark_batch(args.rows, args.configs, args.exports,
+                                 args.workers, args.outputs, tmp_dir)
+    with open(args.output, "w") as json_file:
+        json.dump(result, json_file, indent=4)
+    print(f"{result['configs']} configs, {result['exports']} exports of "
+          f"{result['rows']} rows, {result['workers']} workers"
+          f"  separate {result['separate_wall_time_s']:>7.2f} s"
+          f"  batch {result['batch_wall_time_s']:>7.2f} s"
+          f"  ({result['speedup']:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
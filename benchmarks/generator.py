@@ -0,0 +1,115 @@
+# Generator of synthetic bank account exports for the benchmarks
+import random
+from visualizer.const import MONTHS
+
+COLUMNS = ["Buchungstag", "Auftraggeber", "Verwendungszweck", "Betrag (EUR)"]
+EXCLUDED_PURPOSES = ["Miete/Lebenskosten", "Miete und Nahrung"]
+
+
+def format_amount(cents: int) -> str:
+    """Formats an amount like a German bank export, e.g. -1.234,56.
+
+    Args:
+        cents: The amount in cents.
+
+    Returns:
+        The formatted amount.
+    """
+    sign = "-" if cents < 0 else ""
+    euros, cents = divmod(abs(cents), 100)
+    return f"{sign}{euros:,}".replace(",", ".") + f",{cents:02d}"
+
+
+def create_positions(position_count: int) -> dict:
+    """Creates the positions of a config, each identified by two payees.
+
+    Args:
+        position_count: Number of positions.
+
+    Returns:
+        Dict mapping the position names to their identifiers.
+    """
+    return {
+        f"Position {index:04d}": [f"SHOP{index:04d}A", f"SHOP{index:04d}B"]
+        for index in range(position_count)
+        }
+
+
+def create_config(path: str,
+                  base_dir: str,
+                  year: int,
+                  position_count: int
+                  ) -> dict:
+    """Creates a config for a synthetic export.
+
+    Args:
+        path: Path to the synthetic export.
+        base_dir: Directory of the outputs.
+        year: Year of the export.
+        position_count: Number of positions.
+
+    Returns:
+        The config.
+    """
+    cfg = {
+        "year": year,
+        "base_dir": base_dir,
+        "account_year_history": path,
+        "imported_bank_data": COLUMNS,
+        "column_name_key": "Auftraggeber",
+        "column_name_value": "Betrag (EUR)",
+        "column_date": "Buchungstag",
+        "date_format": "%d.%m.%Y",
+        "exclude_data": {"Verwendungszweck": EXCLUDED_PURPOSES},
+        "positions": create_positions(position_count),
+        }
+    for month in MONTHS:
+        cfg[month] = {
+            "subdir": f"{month}/",
+            "external positions": {"person_1": -200},
+            "income": [2000],
+            }
+    return cfg
+
+
+def generate_export(path: str,
+                    rows: int,
+                    position_count: int,
+                    year: int = 2022,
+                    seed: int = 0
+                    ) -> None:
+    """Writes a synthetic export in the schema of example_year_2022.csv.
+
+    About 80 % of the expenditures belong to a position, the rest to unknown
+    payees. Some rows are income or excluded data.
+
+    Args:
+        path: Path of the csv file to be written.
+        rows: Number of rows.
+        position_count: Number of positions the payees are drawn from.
+        year: Year of the bookings.
+        seed: Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    payees = [identifier
+              for identifiers in create_positions(position_count).values()
+              for identifier in identifiers]
+    unknown_payees = [f"Unknown payee {index}" for index in range(1000)]
+    with open(path, "w", encoding="utf-8") as csv_file:
+        csv_file.write(";".join(COLUMNS) + "\n")
+        for _ in range(rows):
+            date = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{year}"
+            if payees and rng.random() < 0.8:
+                payee = rng.choice(payees)
+            else:
+                payee = rng.choice(unknown_payees)
+            purpose = "Payment"
+            cents = -rng.randint(1, 50000)
+            draw = rng.random()
+            if draw < 0.05:
+                cents = -cents
+            elif draw < 0.07:
+                purpose = rng.choice(EXCLUDED_PURPOSES)
+            csv_file.write(
+                f"{date};{payee};{purpose};{format_amount(cents)}\n"
+                )
@@ -0,0 +1,127 @@
+# Benchmark of the memory used by the account history held in memory
+import argparse
+import json
+import os
+import tempfile
+import pandas as pd
+from benchmarks.generator import create_config, generate_export
+from visualizer.categorizing import Categorizer
+from visualizer.loading import Loader
+from visualizer.processing import Dataframe_processor
+from visualizer.visualize import (categorize_account_history,
+                                  clean_account_history)
+
+
+def convert_to_plain(dataframe: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+    """Converts the compact account history to the plain representation,
+    i.e. a string object per text cell and timestamps.
+
+    Args:
+        dataframe: The cleaned and categorized account history.
+        cfg: Config file.
+
+    Returns:
+        The account history in the plain representation.
+    """
+    plain_df = Dataframe_processor.convert_day_numbers_to_datetime(
+        dataframe,
+        cfg["column_date"]
+        )
+    # the deep memory usage counts the string of every cell, as if each cell
+    # was parsed into its own string object
+    for column, dtype in plain_df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            plain_df[column] = plain_df[column].astype(object)
+    return plain_df
+
+
+def measure_table(dataframe: pd.DataFrame) -> dict:
+    """Measures the memory of a table, including the strings.
+
+    Args:
+        dataframe: The table.
+
+    Returns:
+        Dict of the bytes per transaction in total and of each column.
+    """
+    usage = dataframe.memory_usage(index=False, deep=True)
+    rows = max(len(dataframe), 1)
+    return {
+        "bytes_per_transaction": usage.sum() / rows,
+        "columns": {column: value / rows for column, value in usage.items()},
+        }
+
+
+def benchmark_memory(rows: int, position_count: int, work_dir: str) -> dict:
+    """Loads, cleans and categorizes a synthetic export and measures the
+    memory of the resulting account history in both representations.
+
+    Args:
+        rows: Number of rows of the export.
+        position_count: Number of positions.
+        work_dir: Directory for the export.
+
+    Returns:
+        The measurements.
+    """
+    path = os.path.join(work_dir, f"export_{rows}.csv")
+    generate_export(path, rows, position_count)
+    cfg = create_config(path, os.path.join(work_dir, "results") + "/",
+                        2022, position_count)
+    account_history_df = categorize_account_history(
+        clean_account_history(
+            Loader(cfg).load_dataframe(path),
+            cfg,
+            Dataframe_processor()
+            ),
+        cfg,
+        Categorizer(cfg["positions"])
+        )
+    compact = measure_table(account_history_df)
+    plain = measure_table(convert_to_plain(account_history_df, cfg))
+    return {
+        "rows": rows,
+        "positions": position_count,
+        "transactions": len(account_history_df),
+        "csv_bytes_per_row": os.path.getsize(path) / rows,
+        "plain": plain,
+        "compact": compact,
+        "reduction": plain["bytes_per_transaction"]
+        / compact["bytes_per_transaction"],
+        }
+
+
+def main():
+    """Entry point of the memory benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        prog="memory",
+        description="benchmarks the memory of the account history."
+        )
+    parser.add_argument("--rows", nargs="+", type=int,
+                        default=[100000, 1000000],
+                        help="numbers of rows of the synthetic exports")
+    parser.add_argument("--positions", type=int, default=50,
+                        help="number of positions of the config")
+    parser.add_argument("--output", type=str,
+                        default="memory_results.json",
+                        help="json file the results are written to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = [benchmark_memory(rows, args.positions, tmp_dir)
+                   for rows in args.rows]
+    with open(args.output, "w") as json_file:
+        json.dump(results, json_file, indent=4)
+    for result in results:
+        print(f"{result['rows']:>9} rows"
+              f"  csv {result['csv_bytes_per_row']:>6.1f} B/row"
+              f"  plain {result['plain']['bytes_per_transaction']:>6.1f}"
+              f" B/transaction"
+              f"  compact {result['compact']['bytes_per_transaction']:>6.1f}"
+              f" B/transaction"
+              f"  ({result['reduction']:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
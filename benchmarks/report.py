@@ -0,0 +1,160 @@
+# Benchmark of the html report compared to the pdf charts
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+import yaml
+from benchmarks.generator import create_config, generate_export
+
+# Outputs of each measured backend, the overview alone is the reference for
+# the time spent on loading and aggregating the export
+BACKENDS = {
+    "overview": ["overview"],
+    "pdf": ["overview", "month-charts", "year-charts"],
+    "html": ["overview", "html-report"],
+    }
+# Files written by each backend, relative to the base dir
+BACKEND_FILES = {
+    "overview": [],
+    "pdf": ["**/*.pdf"],
+    "html": ["report.html"],
+    }
+# Runs visualize with the outputs passed after the config and saves its wall
+# time and whether matplotlib was imported to the file passed first
+RUNNER = """
+import json, sys, time
+start = time.perf_counter()
+from visualizer.visualize import visualize
+visualize(sys.argv[2], rebuild=True, outputs=sys.argv[3:])
+json.dump({"wall_time_s": time.perf_counter() - start,
+           "matplotlib": "matplotlib" in sys.modules},
+          open(sys.argv[1], "w"))
+"""
+
+
+def run_backend(config: str, outputs: list[str], work_dir: str) -> dict:
+    """Runs visualize in a new interpreter, so the imports are measured.
+
+    Args:
+        config: Path to the config file.
+        outputs: Outputs to be generated.
+        work_dir: Directory for the measurement file.
+
+    Returns:
+        Dict of the wall time and whether matplotlib was imported.
+    """
+    result_path = os.path.join(work_dir, "run.json")
+    subprocess.run(
+        [sys.executable, "-c", RUNNER, result_path, config] + outputs,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env=dict(os.environ, MPLBACKEND="Agg")
+        )
+    with open(result_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def measure_files(base_dir: str, patterns: list[str]) -> tuple:
+    """Counts the files of a backend and their size.
+
+    Args:
+        base_dir: Directory of the outputs.
+        patterns: Glob patterns of the files, relative to the base dir.
+
+    Returns:
+        Tuple of the number of files and their size in bytes.
+    """
+    paths = [path for pattern in patterns
+             for path in Path(base_dir).glob(pattern)]
+    return len(paths), sum(path.stat().st_size for path in paths)
+
+
+def benchmark_report(rows: int,
+                     position_count: int,
+                     repeat: int,
+                     work_dir: str
+                     ) -> list:
+    """Generates the outputs of a synthetic export with each backend.
+
+    Args:
+        rows: Number of rows of the export.
+        position_count: Number of positions.
+        repeat: Number of runs of each backend.
+        work_dir: Directory for the export and the outputs.
+
+    Returns:
+        List of the measurements of each backend.
+    """
+    export_path = os.path.join(work_dir, f"export_{rows}.csv")
+    generate_export(export_path, rows, position_count)
+    results = []
+    for backend, outputs in BACKENDS.items():
+        base_dir = os.path.join(work_dir, backend) + "/"
+        config = os.path.join(work_dir, f"{backend}.yml")
+        with open(config, "w") as yaml_file:
+            yaml.safe_dump(
+                create_config(export_path, base_dir, 2022, position_count),
+                yaml_file
+                )
+        runs = [run_backend(config, outputs, work_dir)
+                for _ in range(repeat)]
+        file_count, size = measure_files(base_dir, BACKEND_FILES[backend])
+        results.append({
+            "backend": backend,
+            "rows": rows,
+            "positions": position_count,
+            "median_wall_time_s": statistics.median(
+                run["wall_time_s"] for run in runs
+                ),
+            "files": file_count,
+            "size_kb": size / 1024,
+            "imports_matplotlib": runs[0]["matplotlib"],
+            })
+    # time of the backend on top of loading and aggregating
+    reference = results[0]["median_wall_time_s"]
+    for result in results:
+        result["output_time_s"] = result["median_wall_time_s"] - reference
+    return results
+
+
+def main():
+    """Entry point of the report benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        prog="report",
+        description="benchmarks the html report against the pdf charts."
+        )
+    parser.add_argument("--rows", type=int, default=10000,
+                        help="number of rows of the synthetic export")
+    parser.add_argument("--positions", nargs="+", type=int, default=[10, 50],
+                        help="numbers of positions of the config")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of runs of each backend")
+    parser.add_argument("--output", type=str,
+                        default="report_results.json",
+                        help="json file the results are written to")
+    args = parser.parse_args()
+
+    results = []
+    for position_count in args.positions:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results += benchmark_report(args.rows, position_count,
+                                        args.repeat, tmp_dir)
+    with open(args.output, "w") as json_file:
+        json.dump(results, json_file, indent=4)
+    for result in results:
+        print(f"{result['positions']:>4} positions"
+              f"  {result['backend']:<9}"
+              f"{result['median_wall_time_s']:>8.3f} s"
+              f"  outputs {result['output_time_s']:>7.3f} s"
+              f"{result['files']:>4} files"
+              f"{result['size_kb']:>9.1f} kB"
+              f"  matplotlib: {result['imports_matplotlib']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# Benchmarks of the individual stages of the visualization pipeline
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from benchmarks.generator import create_config, generate_export
+from visualizer.categorizing import Categorizer
+from visualizer.const import MONTHS, POSITION_COLUMN
+from visualizer.deduplicating import Deduplicator
+from visualizer.loading import Loader
+from visualizer.plotting import Chart_renderer, Month_Plotter, Year_Plotter
+from visualizer.processing import Dataframe_processor
+from visualizer.visualize import clean_account_history, write_position_chunk
+from visualizer.writing import Output_writer
+
+
+def measure_time(results: list, stage: str, function, *args):
+    """Runs a stage and records its wall time and CPU time.
+
+    Args:
+        results: List the measurement is appended to.
+        stage: Name of the stage.
+        function: Function running the stage.
+        args: Arguments of the function.
+
+    Returns:
+        The return value of the function.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = function(*args)
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+    results.append({
+        "stage": stage,
+        "wall_time_s": wall_time,
+        "cpu_time_s": cpu_time,
+        })
+    return result
+
+
+def measure_memory(results: list, stage: str, function, *args):
+    """Runs a stage and records its peak memory.
+
+    Tracing the allocations slows the stage down, so it is measured in a
+    run of its own.
+
+    Args:
+        results: List the measurement is appended to.
+        stage: Name of the stage.
+        function: Function running the stage.
+        args: Arguments of the function.
+
+    Returns:
+        The return value of the function.
+    """
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    results.append({
+        "stage": stage,
+        "peak_memory_mb": peak_memory / 1024 ** 2,
+        })
+    return result
+
+
+def plot(sum_df: pd.DataFrame, loader: Loader, cfg: dict) -> None:
+    """Renders the month and year charts of the aggregates.
+
+    Args:
+        sum_df: Summed up expenditures in cents (positions x months).
+        loader: Loader providing the income.
+        cfg: Config file.
+    """
+    renderer = Chart_renderer(cfg.get("plot_workers", 1))
+    euro_df = sum_df.abs() // 100
+    for month in MONTHS:
+        month_df = euro_df[[month]].rename(columns={month: "Sum"})
+        plotter = Month_Plotter(month_df)
+        path = cfg["base_dir"] + cfg[month]["subdir"]
+        renderer.add(plotter, "print_bar_chart", path + "bar.pdf", month)
+        renderer.add(plotter, "print_pie_chart", path + "pie.pdf", month)
+    year_df = euro_df.transpose()
+    year_df["Total"] = year_df.sum(axis=1)
+    plotter = Year_Plotter(year_df, loader.create_income_df_from_config())
+    renderer.add(plotter, "print_line_chart",
+                 cfg["base_dir"] + "summary_line.pdf", cfg["year"])
+    renderer.add(plotter, "print_stacked_bar_chart",
+                 cfg["base_dir"] + "summary_bar.pdf", cfg["year"])
+    renderer.render()
+
+
+def run_stages(measure, path: str, cfg: dict, plots: bool = True) -> list:
+    """Runs all stages on an export.
+
+    Args:
+        measure: Function measuring a stage, see measure_time.
+        path: Path to the export.
+        cfg: Config file.
+        plots: Runs the plotting stage.
+
+    Returns:
+        List of the measurements of each stage.
+    """
+    loader = Loader(cfg)
+    processor = Dataframe_processor()
+    loader.make_dirs()
+    positions = loader.create_position_month_dataset().index.to_list()
+
+    results = []
+    dataframe = measure(results, "load", loader.load_dataframe, path)
+    dataframe = measure(results, "clean", clean_account_history,
+                        dataframe, cfg, processor)
+    # every expenditure is new to the index, the worst case
+    dataframe = measure(results, "deduplicate",
+                        Deduplicator(cfg, []).deduplicate, dataframe, path)
+    categorizer = Categorizer(cfg["positions"])
+    dataframe[POSITION_COLUMN] = measure(
+        results, "categorize", categorizer.categorize,
+        dataframe, cfg["column_name_key"]
+        )
+    sum_df, _ = measure(results, "aggregate",
+                        processor.aggregate_positions_per_month,
+                        dataframe, cfg, positions, POSITION_COLUMN)
+    month_dfs = measure(results, "split",
+                        processor.split_dataframes_according_to_months,
+                        dataframe, cfg, cfg["column_date"])
+    writer = Output_writer(cfg.get("writer_threads", 4))
+    measure(results, "csv_write", write_position_chunk,
+            month_dfs, MONTHS, positions, cfg, writer)
+    measure(results, "csv_write_wait", writer.close)
+    if plots:
+        measure(results, "plot", plot, sum_df, loader, cfg)
+    return results
+
+
+def run_benchmark(rows: int,
+                  position_count: int,
+                  work_dir: str,
+                  plots: bool = True
+                  ) -> list:
+    """Benchmarks all stages on a synthetic export.
+
+    The stages are run twice, once measuring the times and once the peak
+    memory, so the tracing of the allocations does not distort the times.
+
+    Args:
+        rows: Number of rows of the export.
+        position_count: Number of positions.
+        work_dir: Directory for the export and the outputs.
+        plots: Benchmarks the plotting stage.
+
+    Returns:
+        List of the measurements of each stage.
+    """
+    run_dir = Path(work_dir) / f"rows_{rows}_positions_{position_count}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    path = str(run_dir / "export.csv")
+    generate_export(path, rows, position_count)
+
+    # each run writes to a dir of its own, so the csv files of the first
+    # run are not appended to
+    results, memory_results = (
+        run_stages(
+            measure,
+            path,
+            create_config(path, str(run_dir / name) + "/", 2022,
+                          position_count),
+            plots
+            )
+        for measure, name in [(measure_time, "results"),
+                              (measure_memory, "results_memory")]
+        )
+    for result, memory_result in zip(results, memory_results):
+        result.update({
+            "peak_memory_mb": memory_result["peak_memory_mb"],
+            "rows": rows,
+            "positions": position_count,
+            })
+    return results
+
+
+def main():
+    """Entry point of the benchmarks.
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="benchmarks the stages of the visualizer pipeline."
+        )
+    parser.add_argument("--rows", nargs="+", type=int,
+                        default=[1000, 100000],
+                        help="numbers of rows of the synthetic exports")
+    parser.add_argument("--positions", nargs="+", type=int,
+                        default=[10, 300],
+                        help="numbers of positions of the configs")
+    parser.add_argument("--output", type=str,
+                        default="benchmark_results.json",
+                        help="json file the results are written to")
+    parser.add_argument("--work-dir", type=str, default=None,
+                        help="directory for exports and outputs")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="skip the plotting stage")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        results = []
+        for rows in args.rows:
+            for position_count in args.positions:
+                print(f"Benchmarking {rows} rows, {position_count} positions")
+                results += run_benchmark(rows, position_count, work_dir,
+                                         not args.no_plots)
+
+    report = {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+        }
+    with open(args.output, "w") as json_file:
+        json.dump(report, json_file, indent=4)
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
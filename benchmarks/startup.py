@@ -0,0 +1,161 @@
+# Benchmark of the startup time of the command line interface
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+
+# Arguments of the measured commands of the command line interface
+COMMANDS = {
+    "help": ["--help"],
+    "summary": ["summary"],
+    "csv-only": ["--outputs", "overview", "positions"],
+    "html-report": ["--outputs", "overview", "html-report"],
+    }
+# Modules each command must not import, e.g. --help must not load the
+# pipeline and the summary must not load matplotlib
+FORBIDDEN_MODULES = {
+    "help": ["pandas", "numpy", "matplotlib", "visualizer.visualize"],
+    "summary": ["matplotlib"],
+    "csv-only": ["matplotlib"],
+    "html-report": ["matplotlib"],
+    }
+# Config keys of directories keeping state between runs, disabled so every
+# run starts cold
+STATE_DIRS = ["cache_dir", "category_memo_dir", "dedup_index_dir"]
+# Runs the command line interface and saves the names of all imported
+# modules to the file passed as first argument
+RUNNER = """
+import atexit, json, runpy, sys
+path = sys.argv[1]
+atexit.register(lambda: json.dump(sorted(sys.modules), open(path, "w")))
+sys.argv = ["visualize"] + sys.argv[2:]
+runpy.run_module("visualizer.cli", run_name="__main__")
+"""
+
+
+def run_command(arguments: list[str], config: str) -> tuple:
+    """Runs the command line interface in a new interpreter.
+
+    Args:
+        arguments: Arguments of the command.
+        config: Path to the config file.
+
+    Returns:
+        Tuple of the wall time in seconds and the imported modules.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        modules_path = os.path.join(tmp_dir, "modules.json")
+        if arguments != ["--help"]:
+            # without the fingerprints of the previous run, every run
+            # generates all months
+            arguments = ["--rebuild"] + arguments + ["--config", config]
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", RUNNER, modules_path] + arguments,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env=dict(os.environ, MPLBACKEND="Agg")
+            )
+        wall_time = time.perf_counter() - start
+        with open(modules_path, "r") as json_file:
+            modules = json.load(json_file)
+    return wall_time, modules
+
+
+def create_cold_config(config: str, work_dir: str) -> str:
+    """Copies a config, so the runs write to a temporary base dir and keep
+    no state between them.
+
+    Args:
+        config: Path to the config file.
+        work_dir: Directory for the config copy and the outputs.
+
+    Returns:
+        Path to the copy of the config.
+    """
+    with open(config, "r") as yaml_file:
+        cfg = yaml.safe_load(yaml_file)
+    cfg["base_dir"] = os.path.join(work_dir, "results") + "/"
+    for key in STATE_DIRS:
+        cfg[key] = None
+    cold_config = os.path.join(work_dir, "config.yml")
+    with open(cold_config, "w") as yaml_file:
+        yaml.safe_dump(cfg, yaml_file)
+    return cold_config
+
+
+def benchmark_startup(config: str, repeat: int, work_dir: str) -> list:
+    """Measures the wall time of each command and checks its imports.
+
+    Args:
+        config: Path to the config file.
+        repeat: Number of runs of each command.
+        work_dir: Directory for the config copy and the outputs.
+
+    Returns:
+        List of the measurements of each command.
+    """
+    config = create_cold_config(config, work_dir)
+    results = []
+    for command, arguments in COMMANDS.items():
+        wall_times = []
+        for _ in range(repeat):
+            wall_time, modules = run_command(arguments, config)
+            wall_times.append(wall_time)
+        results.append({
+            "command": command,
+            "median_wall_time_s": statistics.median(wall_times),
+            "min_wall_time_s": min(wall_times),
+            "imported_modules": len(modules),
+            "forbidden_imports": [
+                module for module in FORBIDDEN_MODULES[command]
+                if module in modules
+                ],
+            })
+    return results
+
+
+def main():
+    """Entry point of the startup benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        prog="startup",
+        description="benchmarks the startup time of the visualize command."
+        )
+    parser.add_argument("--config", type=str,
+                        default="./configs/example_config.yml",
+                        help="config file used by the commands")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of runs of each command")
+    parser.add_argument("--max-help-time", type=float, default=None,
+                        help="fail if --help takes longer (median, seconds)")
+    parser.add_argument("--output", type=str,
+                        default="startup_results.json",
+                        help="json file the results are written to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = benchmark_startup(args.config, args.repeat, tmp_dir)
+    with open(args.output, "w") as json_file:
+        json.dump(results, json_file, indent=4)
+    for result in results:
+        print(f"{result['command']:<12}"
+              f"{result['median_wall_time_s']:>8.3f} s"
+              f"{result['imported_modules']:>6} modules"
+              f"  forbidden: {result['forbidden_imports'] or '-'}")
+
+    # fail on import regressions, e.g. for continuous integration
+    failed = any(result["forbidden_imports"] for result in results)
+    if args.max_help_time is not None:
+        help_time = results[0]["median_wall_time_s"]
+        failed = failed or help_time > args.max_help_time
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Fixtures shared by the unit tests
+from pathlib import Path
+import pytest
+import yaml
+from visualizer.utils import load_config
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def example_cfg(tmp_path) -> dict:
+    """The example config, reading the example export and writing to a
+    temporary directory.
+    """
+    cfg = load_config(str(ROOT_DIR / "configs" / "example_config.yml"))
+    cfg["base_dir"] = str(tmp_path / "results") + "/"
+    cfg["account_year_history"] = str(
+        ROOT_DIR / "data" / "example_year_2022.csv"
+        )
+    return cfg
+
+
+@pytest.fixture
+def example_config_path(tmp_path, example_cfg) -> str:
+    """Path to the example config of example_cfg.
+    """
+    path = tmp_path / "config.yml"
+    with open(path, "w") as yaml_file:
+        yaml.safe_dump(example_cfg, yaml_file)
+    return str(path)
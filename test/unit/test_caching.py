@@ -0,0 +1,128 @@
+# Unit tests of the cache of the cleaned account history
+import os
+import pandas as pd
+import pytest
+from visualizer.caching import Cache
+
+EXPORT = "Buchungstag;Auftraggeber;Betrag (EUR)\n27.12.2022;E.ON;-13,95\n"
+
+
+@pytest.fixture
+def cfg(tmp_path) -> dict:
+    return {"cache_dir": str(tmp_path / "cache"),
+            "base_dir": str(tmp_path / "results") + "/",
+            "date_format": "%d.%m.%Y"}
+
+
+@pytest.fixture
+def export_path(tmp_path) -> str:
+    path = tmp_path / "export.csv"
+    path.write_text(EXPORT)
+    return str(path)
+
+
+def create_chunks(count: int) -> list:
+    """Creates the cleaned chunks of an account history.
+
+    Args:
+        count: Number of chunks.
+
+    Returns:
+        The chunks, with an index continuing across them.
+    """
+    return [pd.DataFrame({"Buchungstag": [19300 + index] * 2,
+                          "Betrag (EUR)": [-1395, -518]},
+                         index=[2 * index, 2 * index + 1])
+            for index in range(count)]
+
+
+def store(cache: Cache, key: str, chunks: list,
+          exclusion_counts: dict = None) -> list:
+    """Stores the chunks while consuming them, like the pipeline does.
+
+    Args:
+        cache: The cache.
+        key: Key of the cache entry.
+        chunks: The chunks.
+        exclusion_counts: Number of entries removed by each rule.
+
+    Returns:
+        The chunks passed on by the cache.
+    """
+    return list(cache.store_chunks(key, iter(chunks), exclusion_counts))
+
+
+def test_key_depends_on_the_content(cfg, export_path):
+    key = Cache(cfg).create_key(export_path)
+    assert key == Cache(cfg).create_key(export_path)
+    # a new modification time alone keeps the key
+    os.utime(export_path, (0, 0))
+    assert Cache(cfg).create_key(export_path) == key
+
+    with open(export_path, "a") as export_file:
+        export_file.write("28.12.2022;SHELL;-40\n")
+    assert Cache(cfg).create_key(export_path) != key
+
+
+def test_key_depends_on_the_cleaning_settings(cfg, export_path):
+    key = Cache(cfg).create_key(export_path)
+    # the base dir does not affect the cleaned account history
+    other_base_dir = dict(cfg, base_dir="other/")
+    assert Cache(other_base_dir).create_key(export_path) == key
+    other_format = dict(cfg, date_format=None)
+    assert Cache(other_format).create_key(export_path) != key
+    export = {"encoding": "utf-8", "columns": {}}
+    assert Cache(cfg).create_key(export_path, export) != key
+
+
+def test_keys_are_shared(cfg, export_path):
+    keys = {}
+    key = Cache(cfg, keys).create_key(export_path)
+    assert list(keys.values()) == [key]
+    # the key is taken from the shared keys instead of hashing the file
+    # again, as long as its size and modification time do not change
+    keys[next(iter(keys))] = "shared"
+    assert Cache(cfg, keys).create_key(export_path) == "shared"
+
+
+def test_chunks_round_trip(cfg):
+    cache = Cache(cfg)
+    assert cache.load_chunks("key") is None
+    chunks = create_chunks(3)
+    # the chunks are passed on while they are stored
+    stored = store(cache, "key", chunks, {"income": 2})
+    assert len(stored) == 3
+
+    loaded = list(cache.load_chunks("key"))
+    assert len(loaded) == 3
+    for chunk, loaded_chunk in zip(chunks, loaded):
+        pd.testing.assert_frame_equal(loaded_chunk,
+                                      chunk.reset_index(drop=True))
+    assert cache.load_exclusion_counts("key") == {"income": 2}
+    assert cache.load_exclusion_counts("other") == {}
+    assert os.listdir(cfg["cache_dir"]) == ["key"]
+
+
+def test_interrupted_store_leaves_no_entry(cfg):
+    cache = Cache(cfg)
+    stored = cache.store_chunks("key", iter(create_chunks(3)))
+    next(stored)
+    stored.close()
+    assert cache.load_chunks("key") is None
+    assert os.listdir(cfg["cache_dir"]) == []
+
+
+def test_least_recently_used_entries_are_evicted(cfg):
+    store(Cache(cfg), "a", create_chunks(2))
+    entry_size = sum(path.stat().st_size
+                     for path in (Cache(cfg).cache_dir / "a").iterdir())
+    # the cache holds two entries, its size is given in MB
+    cache = Cache(dict(cfg, cache_max_size=2.5 * entry_size / 1024 ** 2))
+    store(cache, "b", create_chunks(2))
+    for mtime, key in enumerate(["a", "b"]):
+        os.utime(cache.cache_dir / key, (mtime, mtime))
+
+    # loading "a" makes "b" the least recently used entry
+    cache.load_chunks("a")
+    store(cache, "c", create_chunks(2))
+    assert sorted(os.listdir(cache.cache_dir)) == ["a", "c"]
@@ -0,0 +1,112 @@
+# Unit tests of the categorizer
+import numpy as np
+import pandas as pd
+import pytest
+from visualizer.categorizing import Categorizer
+from visualizer.const import OTHERS
+
+COLUMN = "Auftraggeber"
+
+
+def categorize_with_filter_loop(dataframe: pd.DataFrame,
+                                positions: dict
+                                ) -> pd.Series:
+    """Assigns the rows to the positions like the former filter loop, which
+    extracted the rows of each position and removed them from the account
+    history before the next position.
+
+    Args:
+        dataframe: The bank account dataframe.
+        positions: Positions of the config.
+
+    Returns:
+        Series with the position of every row, NaN for the rows the loop
+        dropped.
+    """
+    result = pd.Series(np.nan, index=dataframe.index, dtype=object)
+    remaining_df = dataframe
+    for position, identifiers in positions.items():
+        pattern = "|".join(identifiers)
+        position_df = remaining_df[
+            remaining_df[COLUMN].str.contains(pattern, na=False)
+            ]
+        result[position_df.index] = position
+        remaining_df = remaining_df[
+            remaining_df[COLUMN].str.contains(pattern) == False  # noqa: E712
+            ]
+    result[remaining_df.index] = OTHERS
+    return result
+
+
+@pytest.fixture
+def account_df() -> pd.DataFrame:
+    return pd.DataFrame({COLUMN: [
+        "REWE Markt", "Aldi Sued", "abcde GmbH", "abc AG", np.nan,
+        "ESSO Station", "Unknown payee", "abcde GmbH", np.nan, "SHELL",
+        ]})
+
+
+def test_categorize_matches_filter_loop(account_df):
+    positions = {
+        "Einkaufen": ["REWE", "Aldi"],
+        "Abc": ["abc"],
+        "Abcde": ["abcde"],
+        "Tanken": ["ESSO", "SHELL"],
+        }
+    categories = Categorizer(positions).categorize(account_df, COLUMN)
+    expected = categorize_with_filter_loop(account_df, positions)
+    pd.testing.assert_series_equal(categories.astype(object), expected,
+                                   check_names=False)
+
+
+def test_first_position_wins(account_df):
+    positions = {"Abcde": ["abcde"], "Abc": ["abc"]}
+    categories = Categorizer(positions).categorize(account_df, COLUMN)
+    assert list(categories[[2, 3, 7]]) == ["Abcde", "Abc", "Abcde"]
+    expected = categorize_with_filter_loop(account_df, positions)
+    pd.testing.assert_series_equal(categories.astype(object), expected,
+                                   check_names=False)
+
+
+def test_rows_without_payee_stay_unassigned(account_df):
+    categories = Categorizer({"Abc": ["abc"]}).categorize(account_df,
+                                                          COLUMN)
+    assert categories[[4, 8]].isna().all()
+    assert categories.notna().sum() == len(account_df) - 2
+    assert list(categories.cat.categories) == ["Abc", OTHERS]
+
+
+def test_unmatched_payees_are_others(account_df):
+    categories = Categorizer({"Tanken": ["ESSO"]}).categorize(account_df,
+                                                              COLUMN)
+    assert categories[6] == OTHERS
+    assert categories[9] == OTHERS
+
+
+def test_identifiers_keep_flags_and_groups():
+    categorizer = Categorizer({
+        "Einkaufen": ["(?i)rewe"],
+        "Doppelt": [r"(\w)\1"],
+        "Abc": ["abc"],
+        })
+    assert categorizer.match("Rewe Markt") == "Einkaufen"
+    assert categorizer.match("Kaffee") == "Doppelt"
+    assert categorizer.match("xabc") == "Abc"
+    assert categorizer.match("xyz") == OTHERS
+
+
+def test_invalid_identifiers_raise():
+    with pytest.raises(ValueError, match="Abc"):
+        Categorizer({"Einkaufen": ["Rewe"], "Abc": ["abc("]})
+
+
+def test_memo_is_reused(tmp_path):
+    positions = {"Abc": ["abc"]}
+    categorizer = Categorizer(positions, str(tmp_path))
+    assert categorizer.lookup("abc AG") == "Abc"
+    categorizer.save()
+
+    reloaded = Categorizer(positions, str(tmp_path))
+    assert reloaded.memo == {"abc AG": "Abc"}
+    # a memo of other positions is never used
+    assert Categorizer({"Abc": ["xyz"]}, str(tmp_path)).memo == {}
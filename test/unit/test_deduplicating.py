@@ -0,0 +1,178 @@
+# Unit tests of the deduplicator
+import pandas as pd
+import pytest
+from visualizer.const import ACCOUNT_COLUMN
+from visualizer.deduplicating import Deduplicator
+from visualizer.loading import Loader
+from visualizer.processing import Dataframe_processor
+from visualizer.visualize import load_clean_account_history
+
+COLUMNS = ["Buchungstag", "Auftraggeber", "Betrag (EUR)"]
+
+
+def create_export(rows: list) -> pd.DataFrame:
+    """Creates a cleaned export.
+
+    Args:
+        rows: Tuples of the day number, payee and amount in cents.
+
+    Returns:
+        The export.
+    """
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+@pytest.fixture
+def cfg(tmp_path) -> dict:
+    return {"imported_bank_data": COLUMNS,
+            "dedup_index_dir": str(tmp_path / "index")}
+
+
+@pytest.fixture
+def exports(tmp_path) -> dict:
+    """Two exports overlapping in December, saved as files, so their stats
+    are known to the index.
+    """
+    dataframes = {
+        "nov_dec.csv": create_export([
+            (19300, "Rewe", -518), (19310, "E.ON", -1395),
+            (19330, "Rewe", -518), (19340, "SHELL", -4000),
+            ]),
+        "dec_jan.csv": create_export([
+            (19330, "Rewe", -518), (19340, "SHELL", -4000),
+            (19360, "E.ON", -1395), (19370, "Rewe", -518),
+            ]),
+        }
+    paths = {}
+    for name, dataframe in dataframes.items():
+        paths[name] = str(tmp_path / name)
+        dataframe.to_csv(paths[name])
+    return {paths[name]: dataframe for name, dataframe in dataframes.items()}
+
+
+def deduplicate(deduplicator: Deduplicator, exports: dict,
+                chunk_size: int = None) -> dict:
+    """Deduplicates the exports in chunks.
+
+    Args:
+        deduplicator: The deduplicator.
+        exports: The exports by their paths.
+        chunk_size: Number of rows of a chunk, the whole export by default.
+
+    Returns:
+        The deduplicated exports by their paths.
+    """
+    deduplicated = {}
+    for path, dataframe in exports.items():
+        size = chunk_size or len(dataframe)
+        deduplicated[path] = pd.concat([
+            deduplicator.deduplicate(dataframe.iloc[start:start + size],
+                                     path)
+            for start in range(0, len(dataframe), size)
+            ])
+    return deduplicated
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 3])
+def test_overlapping_exports(cfg, exports, chunk_size):
+    first, second = exports
+    deduplicated = deduplicate(Deduplicator(cfg, []), exports, chunk_size)
+    pd.testing.assert_frame_equal(deduplicated[first], exports[first])
+    # the overlap is kept by the first export only
+    pd.testing.assert_frame_equal(deduplicated[second],
+                                  exports[second].iloc[2:])
+
+
+def test_repeats_within_an_export_are_kept(cfg):
+    repeats = {"a.csv": create_export([(19330, "Rewe", -518)] * 3)}
+    deduplicated = deduplicate(Deduplicator(cfg, []), repeats)
+    assert len(deduplicated["a.csv"]) == 3
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2])
+def test_occurrences_continue_across_chunks(cfg, chunk_size):
+    # the other export repeats the expenditure once more, only the third
+    # occurrence is new
+    exports = {
+        "a.csv": create_export([(19330, "Rewe", -518)] * 2),
+        "b.csv": create_export([(19330, "Rewe", -518)] * 3),
+        }
+    deduplicated = deduplicate(Deduplicator(cfg, []), exports, chunk_size)
+    assert len(deduplicated["a.csv"]) == 2
+    assert len(deduplicated["b.csv"]) == 1
+
+
+def test_restart_keeps_the_owners(cfg, exports):
+    first, second = exports
+    deduplicator = Deduplicator(cfg, [])
+    deduplicate(deduplicator, exports, 3)
+    # the exports read a second time keep the same expenditures
+    deduplicator.restart()
+    deduplicated = deduplicate(deduplicator, exports, 1)
+    assert len(deduplicated[first]) == 4
+    assert len(deduplicated[second]) == 2
+    assert list(deduplicator.keys) == sorted(deduplicator.keys)
+    assert len(deduplicator.keys) == 6
+
+
+def test_owners_are_persisted(cfg, exports):
+    first, second = exports
+    settings = [{"path": path} for path in exports]
+    deduplicator = Deduplicator(cfg, settings)
+    deduplicate(deduplicator, exports, 3)
+    deduplicator.save()
+
+    # the overlap stays with the first export, even if the second one is
+    # read first
+    reloaded = Deduplicator(cfg, settings)
+    assert reloaded.paths == [first, second]
+    deduplicated = deduplicate(reloaded, dict(reversed(exports.items())))
+    assert len(deduplicated[second]) == 2
+    assert len(deduplicated[first]) == 4
+
+
+def test_changed_exports_lose_their_fingerprints(cfg, exports):
+    first, second = exports
+    settings = [{"path": path} for path in exports]
+    deduplicator = Deduplicator(cfg, settings)
+    deduplicate(deduplicator, exports)
+    deduplicator.save()
+
+    with open(first, "a") as export_file:
+        export_file.write("\n")
+    reloaded = Deduplicator(cfg, settings)
+    assert len(reloaded.keys) == 2
+    deduplicated = deduplicate(reloaded, {second: exports[second]})
+    assert len(deduplicated[second]) == 4
+
+
+def test_exports_named_after_their_file_overlap(example_cfg, tmp_path):
+    # two overlapping statements of the same account without a name and a
+    # named card account, the statements get accounts named after their
+    # files
+    with open(example_cfg["account_year_history"], "r") as export_file:
+        header, *rows = export_file.read().splitlines()
+    months = {month: [row for row in rows if f".{month}.2022" in row]
+              for month in ["10", "11", "12"]}
+    exports = {
+        "oct_nov.csv": months["10"] + months["11"],
+        "nov_dec.csv": months["11"] + months["12"],
+        # the same expenditure on another account is no duplicate
+        "card.csv": months["12"][:1],
+        }
+    for name, export_rows in exports.items():
+        (tmp_path / name).write_text("\n".join([header] + export_rows))
+    example_cfg["account_year_history"] = [
+        str(tmp_path / "oct_nov.csv"),
+        str(tmp_path / "nov_dec.csv"),
+        {"path": str(tmp_path / "card.csv"), "account": "card"},
+        ]
+    account_history_df = pd.concat(load_clean_account_history(
+        example_cfg,
+        Loader(example_cfg),
+        Dataframe_processor()
+        ))
+    # November is kept once, by the first statement
+    assert account_history_df.groupby(ACCOUNT_COLUMN).size().to_dict() == {
+        "oct_nov": 26, "nov_dec": 13, "card": 1,
+        }
@@ -0,0 +1,162 @@
+# Unit tests of the exclusion rules
+import numpy as np
+import pandas as pd
+import pytest
+from visualizer.excluding import Excluder
+from visualizer.processing import Dataframe_processor
+
+DAY = Dataframe_processor.get_day_number
+
+
+@pytest.fixture
+def cfg() -> dict:
+    return {"column_name_key": "Auftraggeber",
+            "column_name_value": "Betrag (EUR)",
+            "column_date": "Buchungstag"}
+
+
+@pytest.fixture
+def account_df() -> pd.DataFrame:
+    """Cleaned account history with the amounts in cents and the dates as
+    day numbers.
+    """
+    return pd.DataFrame({
+        "Buchungstag": [DAY(day) for day in [
+            "2022-01-01", "2022-01-15", "2022-02-01", "2022-02-10",
+            "2022-03-01", "2022-03-05", "2022-03-20", "2022-04-01",
+            ]],
+        "Auftraggeber": pd.Categorical([
+            "Person 1", "Geldautomat abc", "Rewe", "ATM Bank",
+            "Umbuchung Sparen", "Rewe", np.nan, "Max Mustermann",
+            ]),
+        "Verwendungszweck": [
+            "Income", "jupp", "hello", "cash", "Umbuchung", "Miete",
+            "refund", "Miete und Nahrung",
+            ],
+        "Betrag (EUR)": [180000, -1315, -518, -5000, -10000, -2000, 0,
+                         -1500],
+        })
+
+
+def select_removed(cfg: dict, account_df: pd.DataFrame,
+                   rules: list = None, counts: dict = None) -> list:
+    """Returns the rows removed by the rules.
+
+    Args:
+        cfg: Config file.
+        account_df: The account history.
+        rules: The "exclude_rules" of the config.
+        counts: Dict the number of removed rows of each rule is added to.
+
+    Returns:
+        The indices of the removed rows.
+    """
+    included = Excluder(dict(cfg, exclude_rules=rules)).select_included(
+        account_df,
+        counts
+        )
+    return list(np.flatnonzero(~included))
+
+
+def test_income_is_removed(cfg, account_df):
+    # the positive and the zero amount
+    assert select_removed(cfg, account_df) == [0, 6]
+
+
+def test_exclude_data_equals(cfg, account_df):
+    cfg["exclude_data"] = {"Verwendungszweck": ["Miete und Nahrung",
+                                                "Miete/Lebenskosten"]}
+    # the exact match only, not "Miete"
+    assert select_removed(cfg, account_df) == [0, 6, 7]
+
+
+def test_equals(cfg, account_df):
+    rules = [{"column": "Auftraggeber", "equals": "Rewe"}]
+    assert select_removed(cfg, account_df, rules) == [0, 2, 5, 6]
+
+
+def test_contains(cfg, account_df):
+    rules = [{"column": "Auftraggeber", "contains": ["Geldautomat", "ATM"]}]
+    assert select_removed(cfg, account_df, rules) == [0, 1, 3, 6]
+
+
+def test_contains_is_no_regex(cfg, account_df):
+    rules = [{"column": "Auftraggeber", "contains": "R.we"}]
+    assert select_removed(cfg, account_df, rules) == [0, 6]
+
+
+def test_regex(cfg, account_df):
+    rules = [{"column": "Verwendungszweck", "regex": "^Miete"}]
+    assert select_removed(cfg, account_df, rules) == [0, 5, 6, 7]
+
+
+def test_sign(cfg, account_df):
+    rules = [{"sign": "negative"}]
+    assert select_removed(cfg, account_df, rules) == list(range(8))
+
+
+def test_date_window(cfg, account_df):
+    rules = [{"start": "2022-02-01", "end": "2022-03-01"}]
+    assert select_removed(cfg, account_df, rules) == [0, 2, 3, 4, 6]
+    rules = [{"start": "2022-03-02"}]
+    assert select_removed(cfg, account_df, rules) == [0, 5, 6, 7]
+
+
+def test_all_conditions_have_to_hold(cfg, account_df):
+    rules = [{"column": "Verwendungszweck", "regex": "^Umbuchung",
+              "start": "2022-03-01", "end": "2022-03-31"},
+             {"column": "Auftraggeber", "equals": "Rewe",
+              "end": "2022-02-28"}]
+    assert select_removed(cfg, account_df, rules) == [0, 2, 4, 6]
+
+
+def test_rows_without_string_are_kept(cfg, account_df):
+    account_df["Betrag (EUR)"] = -100
+    rules = [{"column": "Auftraggeber", "regex": ".*"}]
+    assert 6 not in select_removed(cfg, account_df, rules)
+
+
+def test_removal_counts(cfg, account_df):
+    cfg["exclude_data"] = {"Verwendungszweck": ["Miete und Nahrung"]}
+    rules = [{"name": "cash", "column": "Auftraggeber",
+              "contains": ["Geldautomat", "ATM"]},
+             {"column": "Verwendungszweck", "regex": "Miete"},
+             {"name": "march", "start": "2022-03-01", "end": "2022-03-31"}]
+    counts = {"cash": 1}
+    removed = select_removed(cfg, account_df, rules, counts)
+    assert removed == [0, 1, 3, 4, 5, 6, 7]
+    # each row is counted for the first rule it matches, the counts are
+    # added to the given ones
+    assert counts == {
+        "income": 2,
+        "Verwendungszweck equals Miete und Nahrung": 1,
+        "cash": 3,
+        "Verwendungszweck regex Miete": 1,
+        "march": 1,
+        }
+    assert sum(counts.values()) - 1 == len(removed)
+
+
+def test_names(cfg):
+    excluder = Excluder(dict(cfg, exclude_rules=[
+        {"column": "Auftraggeber", "contains": ["ATM", "Geldautomat"],
+         "sign": ["negative", "zero"]},
+        {"start": "2022-01-01"},
+        {"name": "income", "sign": "zero"},
+        ]))
+    assert excluder.names == ["income",
+                              "Auftraggeber contains ATM, Geldautomat and "
+                              "amount negative/zero",
+                              "date 2022-01-01.."]
+
+
+@pytest.mark.parametrize("rule", [
+    {"column": "Auftraggeber", "startswith": "Rewe"},
+    {"column": "Auftraggeber"},
+    {"name": "empty"},
+    {"contains": "Rewe"},
+    {"sign": "minus"},
+    ])
+def test_invalid_rules(cfg, rule):
+    with pytest.raises(ValueError):
+        Excluder(dict(cfg, exclude_rules=[rule]))
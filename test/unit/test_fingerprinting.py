@@ -0,0 +1,93 @@
+# Unit tests of the fingerprints of the months
+from pathlib import Path
+import pandas as pd
+import pytest
+from visualizer.const import MONTHS
+from visualizer.fingerprinting import Fingerprints
+from visualizer.processing import Dataframe_processor
+
+DAY = Dataframe_processor.get_day_number
+
+
+@pytest.fixture
+def account_df() -> pd.DataFrame:
+    """Cleaned account history with an expenditure in every month.
+    """
+    return pd.DataFrame({
+        "Buchungstag": [DAY(f"2022-{month:02d}-15")
+                        for month in range(1, 13)],
+        "Auftraggeber": ["Rewe"] * 12,
+        "Betrag (EUR)": [-518] * 12,
+        })
+
+
+@pytest.fixture
+def cfg(example_cfg) -> dict:
+    """The example config with the dirs of all months created.
+    """
+    for month in MONTHS:
+        (Path(example_cfg["base_dir"])
+         / example_cfg[month]["subdir"]).mkdir(parents=True)
+    return example_cfg
+
+
+def run(cfg: dict, account_df: pd.DataFrame) -> list[str]:
+    """Fingerprints the account history like a run generating the overview
+    in each month dir.
+
+    Args:
+        cfg: Config file.
+        account_df: The account history.
+
+    Returns:
+        The months whose overview has to be regenerated.
+    """
+    fingerprints = Fingerprints(cfg)
+    fingerprints.update(account_df)
+    changed_months = fingerprints.get_changed_months("overview", "{subdir}")
+    fingerprints.save(["overview"])
+    return changed_months
+
+
+def test_unchanged_run_regenerates_nothing(cfg, account_df):
+    assert run(cfg, account_df) == MONTHS
+    assert run(cfg, account_df) == []
+
+
+def test_appended_row_regenerates_its_month(cfg, account_df):
+    run(cfg, account_df)
+    appended_df = pd.concat([account_df, pd.DataFrame({
+        "Buchungstag": [DAY("2022-12-28")],
+        "Auftraggeber": ["SHELL"],
+        "Betrag (EUR)": [-4000],
+        })])
+    assert run(cfg, appended_df) == ["Dec"]
+    # expenditures of other years do not change any month
+    other_year_df = appended_df.assign(Buchungstag=DAY("2021-12-28"))
+    assert run(cfg, pd.concat([appended_df, other_year_df])) == []
+
+
+def test_changed_config_regenerates_its_month(cfg, account_df):
+    run(cfg, account_df)
+    cfg["Mar"]["income"] = [1000]
+    assert run(cfg, account_df) == ["Mar"]
+    cfg["positions"]["Neu"] = ["Neu"]
+    assert run(cfg, account_df) == MONTHS
+
+
+def test_missing_output_regenerates_its_month(cfg, account_df):
+    run(cfg, account_df)
+    (Path(cfg["base_dir"]) / cfg["Jun"]["subdir"]).rmdir()
+    assert run(cfg, account_df) == ["Jun"]
+
+
+def test_broken_file_regenerates_all_months(cfg, account_df):
+    run(cfg, account_df)
+    fingerprints_path = Fingerprints(cfg).path
+    content = fingerprints_path.read_text()
+    # e.g. a run interrupted while writing the file
+    fingerprints_path.write_text(content[:len(content) // 2])
+    assert run(cfg, account_df) == MONTHS
+    assert run(cfg, account_df) == []
+    assert [path.name for path in fingerprints_path.parent.iterdir()
+            if path.name.startswith("fingerprints")] == ["fingerprints.json"]
@@ -1 +1,34 @@
-### Add unit tests here
\ No newline at end of file
+# Unit tests of the loader
+import pandas as pd
+from visualizer.loading import Loader
+from visualizer.processing import Dataframe_processor
+from visualizer.visualize import clean_account_history
+
+EXPORT = """Buchungstag;Auftraggeber;Verwendungszweck;Betrag (EUR)
+01.12.2022;Person 1;Income;1.800,00
+02.12.2022;Vermieter;Miete;-1.400,00
+03.12.2022;SHELL;brrrr;-40
+04.12.2022;Rewe;Einkauf;-13,95
+05.12.2022;Bank;Storno;0
+06.12.2022;Rewe;Einkauf;-0,10
+07.12.2022;Amazon;Refund;12,99
+08.12.2022;Amazon;Order;-1.234.567,89
+"""
+
+
+def test_amounts_are_exact_cents(example_cfg, tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text(EXPORT)
+    account_df = Loader(example_cfg).load_dataframe(str(path))
+    # the text columns are categoricals, the amounts numbers
+    assert isinstance(account_df["Auftraggeber"].dtype, pd.CategoricalDtype)
+    assert account_df["Betrag (EUR)"].dtype == float
+
+    cleaned = clean_account_history(account_df, example_cfg,
+                                    Dataframe_processor())
+    # the income rule removes the zero and the positive amounts
+    assert list(cleaned["Auftraggeber"]) == ["Vermieter", "SHELL", "Rewe",
+                                             "Rewe", "Amazon"]
+    assert cleaned["Betrag (EUR)"].dtype == "int64"
+    assert list(cleaned["Betrag (EUR)"]) == [-140000, -4000, -1395, -10,
+                                             -123456789]
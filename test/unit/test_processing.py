@@ -0,0 +1,65 @@
+# Unit tests of the dataframe processor
+import numpy as np
+import pandas as pd
+import pytest
+from visualizer.processing import Dataframe_processor
+
+DAY = Dataframe_processor.get_day_number
+DATES = ["27.12.2022", "01.02.2022", "32.12.2022", None, "27.12.2022",
+         "12.01.2022", "Umsatz", "13.01.2022"]
+VALID_ROWS = [0, 1, 4, 5, 7]
+
+
+@pytest.fixture(params=["object", "category"])
+def dates_df(request) -> pd.DataFrame:
+    """Dates as read from an export, with an invalid day, a missing date and
+    a text, as strings or categoricals like the loader reads them.
+    """
+    return pd.DataFrame({"Buchungstag": DATES,
+                         "Betrag (EUR)": range(len(DATES))}).astype(
+        {"Buchungstag": request.param}
+        )
+
+
+@pytest.mark.parametrize("date_format", [None, "%d.%m.%Y"])
+def test_day_numbers(dates_df, date_format):
+    with pytest.warns(UserWarning, match="Removed 3 rows"):
+        processed = Dataframe_processor.convert_column_to_day_numbers(
+            dates_df,
+            "Buchungstag",
+            date_format
+            )
+    # the rows with invalid or missing dates are removed, the day comes
+    # first
+    assert list(processed.index) == VALID_ROWS
+    assert list(processed["Betrag (EUR)"]) == VALID_ROWS
+    assert processed["Buchungstag"].dtype == np.int32
+    assert list(processed["Buchungstag"]) == [
+        DAY(day) for day in ["2022-12-27", "2022-02-01", "2022-12-27",
+                             "2022-01-12", "2022-01-13"]
+        ]
+
+
+def test_date_format_matches_inference(dates_df):
+    with pytest.warns(UserWarning):
+        inferred = Dataframe_processor.convert_column_to_day_numbers(
+            dates_df.copy(),
+            "Buchungstag"
+            )
+        formatted = Dataframe_processor.convert_column_to_day_numbers(
+            dates_df.copy(),
+            "Buchungstag",
+            "%d.%m.%Y"
+            )
+    pd.testing.assert_frame_equal(formatted, inferred)
+
+
+def test_valid_dates_do_not_warn(dates_df, recwarn):
+    valid_df = dates_df.iloc[VALID_ROWS]
+    processed = Dataframe_processor.convert_column_to_day_numbers(
+        valid_df.copy(),
+        "Buchungstag",
+        "%d.%m.%Y"
+        )
+    assert not recwarn.list
+    assert len(processed) == len(valid_df)
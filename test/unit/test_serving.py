@@ -0,0 +1,155 @@
+# Unit tests of the query server
+import asyncio
+import json
+from http import HTTPStatus
+import pytest
+from visualizer.serving import Query_server
+
+
+@pytest.fixture
+def server(example_config_path) -> Query_server:
+    server = Query_server(example_config_path, chart_cache_size=2)
+    yield server
+    server.chart_executor.shutdown()
+
+
+def query(server: Query_server, target: str) -> dict:
+    """Answers a query and checks that it succeeded.
+
+    Args:
+        server: The query server.
+        target: Path and query string of the request.
+
+    Returns:
+        The decoded JSON body.
+    """
+    status, content_type, body = server.handle_query(target)
+    assert status == HTTPStatus.OK
+    assert content_type == "application/json"
+    return json.loads(body)
+
+
+def test_years(server):
+    assert query(server, "/years") == {"years": [2022]}
+
+
+def test_year_overview(server):
+    content = query(server, "/overview/2022")
+    assert content["year"] == 2022
+    assert list(content["overview"]) == [
+        "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+        "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+        ]
+    assert content["overview"]["Jan"]["Nebenkosten"] == 0
+    assert content["overview"]["Jan"]["person_1"] == 200
+
+
+def test_month_overview(server):
+    content = query(server, "/overview/2022/Dec")
+    assert content["month"] == "Dec"
+    assert content["overview"]["Nebenkosten"] == {"Sum": 29, "counts": 3}
+    assert content["overview"]["Auto"] == {"Sum": 0, "counts": 0}
+
+
+def test_position(server):
+    content = query(server, "/positions/2022/Dec/Nebenkosten")
+    assert content["count"] == 3
+    assert [row["Verwendungszweck"] for row in content["transactions"]] \
+        == ["Electricity", "Water", "Gas"]
+    assert content["transactions"][0]["Betrag (EUR)"] == -13.95
+    assert content["transactions"][0]["Buchungstag"].startswith(
+        "2022-12-27"
+        )
+
+
+def test_transactions_filters(server):
+    assert query(server, "/transactions")["count"] == 39
+    assert query(server, "/transactions?merchant=e.on")["count"] == 9
+    assert query(server, "/transactions?position=Sonstiges")["count"] == 3
+    assert query(server, "/transactions?year=2022&month=Nov")["count"] \
+        == 13
+    content = query(server,
+                    "/transactions?start=2022-12-01&end=2022-12-19")
+    assert content["count"] == 8
+    assert all("2022-12-01" <= row["Buchungstag"][:10] <= "2022-12-19"
+               for row in content["transactions"])
+
+
+def test_transactions_paging(server):
+    content = query(server, "/transactions?merchant=e.on")
+    page = query(server, "/transactions?merchant=e.on&offset=2&limit=3")
+    assert page["count"] == 9
+    assert page["transactions"] == content["transactions"][2:5]
+
+
+@pytest.mark.parametrize("target", [
+    "/",
+    "/unknown",
+    "/years/2022",
+    "/overview/abc",
+    "/overview/2021",
+    "/overview/2022/Foo",
+    "/positions/2022/Foo/Miete",
+    "/transactions?month=Foo",
+    "/transactions?limit=abc",
+    ])
+def test_query_not_found(server, target):
+    status, _, body = server.handle_query(target)
+    assert status == HTTPStatus.NOT_FOUND
+    assert json.loads(body) == {"error": "Not Found"}
+
+
+@pytest.mark.parametrize("target, content_type, start", [
+    ("/charts/2022/Dec/pie.svg", "image/svg+xml", b"<?xml"),
+    ("/charts/2022/Dec/bar.png", "image/png", b"\x89PNG"),
+    ("/charts/2022/line.pdf", "application/pdf", b"%PDF"),
+    ("/charts/2022/bar.svg", "image/svg+xml", b"<?xml"),
+    ])
+def test_render_chart(server, target, content_type, start):
+    status, chart_type, body = server.render_chart(target)
+    assert status == HTTPStatus.OK
+    assert chart_type == content_type
+    assert body.startswith(start)
+
+
+@pytest.mark.parametrize("target", [
+    "/charts/2022/Dec/pie.gif",
+    "/charts/2022/Dec/line.svg",
+    "/charts/2022/pie.svg",
+    "/charts/2021/line.svg",
+    "/charts/abc/line.svg",
+    "/charts/2022/Foo/bar.svg",
+    "/charts/2022/Dec/x/bar.svg",
+    ])
+def test_render_chart_not_found(server, target):
+    assert server.render_chart(target)[0] == HTTPStatus.NOT_FOUND
+
+
+def test_chart_cache(server):
+    rendered = []
+    render_chart = server.render_chart
+
+    def count_render_chart(target: str) -> tuple:
+        rendered.append(target)
+        return render_chart(target)
+
+    server.render_chart = count_render_chart
+    for target in ["/charts/2022/Dec/pie.svg", "/charts/2022/Dec/pie.svg",
+                   "/charts/2022/Nov/pie.svg", "/charts/2022/Dec/pie.svg",
+                   "/charts/2022/Oct/pie.svg", "/charts/2022/Nov/pie.svg",
+                   "/charts/2022/Nov/pie.svg?size=2"]:
+        assert asyncio.run(server.get_chart(target))[0] == HTTPStatus.OK
+    # Dec is used again before Nov, so Oct evicts Nov, the least recently
+    # used chart, and the query string is ignored
+    assert rendered == ["/charts/2022/Dec/pie.svg",
+                        "/charts/2022/Nov/pie.svg",
+                        "/charts/2022/Oct/pie.svg",
+                        "/charts/2022/Nov/pie.svg"]
+    assert list(server.chart_cache) == ["/charts/2022/Oct/pie.svg",
+                                        "/charts/2022/Nov/pie.svg"]
+
+
+def test_failed_charts_are_not_cached(server):
+    response = asyncio.run(server.get_chart("/charts/2022/Dec/pie.gif"))
+    assert response[0] == HTTPStatus.NOT_FOUND
+    assert not server.chart_cache
@@ -0,0 +1,94 @@
+# Unit tests of the spending tracker
+import numpy as np
+import pytest
+from visualizer.tracking import Spending_tracker
+
+
+def push_months(tracker: Spending_tracker, amounts: list) -> None:
+    """Pushes the expenditures of consecutive months.
+
+    Args:
+        tracker: The spending tracker.
+        amounts: Expenditures of each position in each month.
+    """
+    for index, month_amounts in enumerate(amounts):
+        tracker.push(f"2022 {index + 1:02d}", month_amounts)
+
+
+def test_window_slides():
+    tracker = Spending_tracker({"anomaly_window": 3}, ["Miete"])
+    push_months(tracker, [[10], [20], [30], [40], [100]])
+    statistics = tracker.get_statistics()
+    # the statistics of a month are those of the months before it
+    assert statistics["Mean"].isna().tolist() == [True] * 3 + [False] * 2
+    assert statistics["Mean"].tolist()[3:] == [20, 30]
+    assert statistics["Std"].tolist()[3:] == [10, 10]
+    assert statistics["Running sum"].tolist() == [10, 30, 60, 100, 200]
+    assert tracker.window_sums.tolist() == [40 + 100 + 30]
+    assert len(tracker.history) == 3
+
+
+def test_window_matches_numpy_statistics():
+    amounts = np.random.default_rng(0).uniform(0, 500, (24, 2)).round(2)
+    tracker = Spending_tracker({"anomaly_window": 6}, ["a", "b"])
+    push_months(tracker, amounts)
+    statistics = tracker.get_statistics()
+    for column, position in enumerate(["a", "b"]):
+        position_df = statistics[statistics["Position"] == position]
+        history = amounts[:, column]
+        for month in range(6, 24):
+            window = history[month - 6:month]
+            assert position_df["Mean"].iloc[month] == \
+                pytest.approx(window.mean(), abs=0.01)
+            assert position_df["Std"].iloc[month] == \
+                pytest.approx(window.std(ddof=1), abs=0.01)
+
+
+def test_budget_alerts():
+    tracker = Spending_tracker({"budgets": {"Tanken": 150}},
+                               ["Tanken", "Miete"])
+    push_months(tracker, [[100, 900], [150, 900], [151, 900]])
+    alerts = tracker.get_alerts()
+    # only the month exceeding the limit, positions without budget never
+    assert alerts[["Month", "Position", "Alert", "Sum", "Reference"]] \
+        .values.tolist() == [["2022 03", "Tanken", "budget", 151.0, 150.0]]
+    assert tracker.get_statistics()["Budget"].isna().tolist() == \
+        [False, True] * 3
+
+
+@pytest.mark.parametrize("amount, spike", [(129, False), (131, True)])
+def test_spike_threshold(amount, spike):
+    tracker = Spending_tracker({"anomaly_threshold": 3.0}, ["Einkaufen"])
+    # mean 100, standard deviation 10
+    push_months(tracker, [[90], [100], [110], [amount]])
+    alerts = tracker.get_alerts()
+    assert (alerts["Alert"] == "spike").any() == spike
+    assert tracker.get_statistics()["z-score"].iloc[-1] == \
+        pytest.approx((amount - 100) / 10)
+
+
+def test_no_spikes_before_min_months():
+    tracker = Spending_tracker({}, ["Einkaufen"])
+    push_months(tracker, [[0], [0], [5000]])
+    assert tracker.get_alerts().empty
+
+
+@pytest.mark.parametrize("history, amount", [(100, 2000), (0, 500)])
+def test_spike_after_flat_history(history, amount):
+    tracker = Spending_tracker({}, ["Einkaufen"])
+    push_months(tracker, [[history]] * 5 + [[amount], [history]])
+    alerts = tracker.get_alerts()
+    assert alerts[["Month", "Alert"]].values.tolist() == [["2022 06",
+                                                          "spike"]]
+    assert alerts["Reference"][0] == history
+
+
+def test_flat_history_ignores_cents():
+    tracker = Spending_tracker({}, ["Miete"])
+    push_months(tracker, [[850.0]] * 5 + [[850.5]])
+    assert tracker.get_alerts().empty
+
+
+def test_short_window_raises():
+    with pytest.raises(ValueError):
+        Spending_tracker({"anomaly_window": 2}, ["Miete"])
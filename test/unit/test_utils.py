@@ -0,0 +1,32 @@
+# Unit tests of the helper functions
+import pytest
+from visualizer.utils import get_exports
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    for name in ["2022_b.csv", "2022_a.csv", "2021.csv"]:
+        (tmp_path / name).write_text("Buchungstag;Auftraggeber\n")
+    return tmp_path
+
+
+def test_glob_patterns_are_expanded_in_order(export_dir):
+    exports = get_exports({"account_year_history": [
+        str(export_dir / "2021.csv"),
+        {"path": str(export_dir / "2022_*.csv"), "account": "giro"},
+        ]})
+    assert [export["path"] for export in exports] == [
+        str(export_dir / name)
+        for name in ["2021.csv", "2022_a.csv", "2022_b.csv"]
+        ]
+    # the exports without account are named after their file
+    assert [export["account"] for export in exports] == ["2021", "giro",
+                                                         "giro"]
+
+
+def test_glob_pattern_without_match_raises(export_dir):
+    with pytest.raises(FileNotFoundError, match="2020_"):
+        get_exports({"account_year_history": [
+            str(export_dir / "2021.csv"),
+            str(export_dir / "2020_*.csv"),
+            ]})
@@ -0,0 +1,310 @@
+# Class for running many configs in a process pool, parsing each export
+# only once
+import json
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from visualizer.caching import Cache
+from visualizer.const import DEFAULT_OUTPUTS
+from visualizer.loading import Loader
+from visualizer.processing import Dataframe_processor
+from visualizer.utils import get_exports, load_config
+from visualizer.visualize import load_clean_export, visualize
+
+# Extensions of the config files searched in a directory
+CONFIG_EXTENSIONS = [".yml", ".yaml"]
+
+
+def list_configs(paths: list[str]) -> list[str]:
+    """Lists the config files of a batch.
+
+    Args:
+        paths: Paths to config files or to directories, whose config files
+            are taken in the order of their names.
+
+    Returns:
+        List of the paths to the config files, each listed once.
+    """
+    config_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            config_paths += sorted(
+                str(config_path) for config_path in Path(path).iterdir()
+                if config_path.suffix in CONFIG_EXTENSIONS
+                )
+        else:
+            config_paths.append(path)
+    return list(dict.fromkeys(config_paths))
+
+
+def parse_export(cfg: dict, export: dict, cache_keys: dict) -> None:
+    """Parses and cleans an export into the cache of the config, so the
+    runs of all configs reading it load the cleaned table from the cache.
+
+    Args:
+        cfg: Config file, with the shared cache dir.
+        export: Settings of the export, see get_exports.
+        cache_keys: Cache keys of the exports of the batch, see Cache.
+    """
+    for _ in load_clean_export(export, cfg, Loader(cfg),
+                               Dataframe_processor(), Cache(cfg, cache_keys)):
+        pass
+
+
+def create_failure(config_path: str, error: BaseException) -> dict:
+    """Creates the result of a failed config.
+
+    Args:
+        config_path: Path to config file.
+        error: The exception.
+
+    Returns:
+        Dict of the config path, its "status", the wall time (None), the
+        error message and its traceback.
+    """
+    return {
+        "config": config_path,
+        "status": "failed",
+        "wall_time_s": None,
+        "error": "".join(
+            traceback.format_exception_only(type(error), error)
+            ).strip(),
+        "traceback": "".join(traceback.format_exception(
+            type(error), error, error.__traceback__
+            )),
+        }
+
+
+def run_config(config_path: str, outputs: list[str],
+               overrides: dict, cache_keys: dict = None) -> dict:
+    """Runs the visualization of a config, catching its errors so a failing
+    config never stops the other configs.
+
+    Args:
+        config_path: Path to config file.
+        outputs: Outputs to be generated, see visualize.
+        overrides: Config keys replacing the ones of the config file.
+        cache_keys: Cache keys of the exports of the batch, see Cache.
+
+    Returns:
+        Dict of the config path, its "status" ("ok" or "failed") and the
+        wall time in seconds, see create_failure for failed configs.
+    """
+    start = time.perf_counter()
+    try:
+        visualize(config_path, outputs=outputs, overrides=overrides,
+                  cache_keys=cache_keys)
+    except Exception as error:
+        return create_failure(config_path, error)
+    return {
+        "config": config_path,
+        "status": "ok",
+        "wall_time_s": time.perf_counter() - start,
+        }
+
+
+class Batch_runner:
+
+    def __init__(self, config_paths: list[str],
+                 outputs: list[str] = DEFAULT_OUTPUTS,
+                 workers: int = None,
+                 cache_dir: str = None
+                 ) -> None:
+        """Inits the batch runner.
+
+        The configs are grouped by the exports they read. Each distinct
+        export, i.e. the same file content and cleaning settings, is parsed
+        once into a cache shared by all configs, in which the cleaned
+        tables are kept as feather files. The configs are then run in a
+        process pool and load their exports from the shared cache. A
+        failing config, even one crashing its worker process, is reported
+        without stopping the others.
+
+        Args:
+            config_paths: Paths to config files or to directories
+                containing them.
+            outputs: Outputs to be generated, see visualize.
+            workers: Number of worker processes, by default the number of
+                CPUs.
+            cache_dir: Directory of the shared cache, kept after the run.
+                By default a temporary directory is used and the
+                "cache_dir" of the configs is ignored.
+        """
+        self.config_paths = list_configs(config_paths)
+        self.outputs = outputs
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+
+    def create_overrides(self, cache_dir: str) -> dict:
+        """Creates the config keys each config is run with.
+
+        Args:
+            cache_dir: Directory of the shared cache.
+
+        Returns:
+            Dict of the config keys replacing the ones of the config files.
+        """
+        # the configs already run in parallel, so the charts are rendered
+        # in the worker itself
+        overrides = {"cache_dir": cache_dir, "plot_workers": 1}
+        if self.cache_dir is None:
+            # the temporary cache must keep every export until all configs
+            # have run
+            overrides["cache_max_size"] = float("inf")
+        return overrides
+
+    def group_exports(self, overrides: dict, cache_keys: dict) -> tuple:
+        """Loads the configs and groups them by the exports they read.
+
+        Each export is hashed once, even if several configs read it.
+
+        Args:
+            overrides: Config keys replacing the ones of the config files.
+            cache_keys: Dict the cache keys of the exports are added to,
+                see Cache.
+
+        Returns:
+            Tuple of a dict mapping the cache key of each distinct export
+            to a config and the export settings to parse it with, and a dict
+            mapping the configs that could not be loaded to their result.
+        """
+        groups = {}
+        failures = {}
+        base_dirs = {}
+        for config_path in self.config_paths:
+            try:
+                cfg = load_config(config_path)
+                cfg.update(overrides)
+                # configs writing to the same dir would overwrite each other
+                base_dir = os.path.abspath(cfg["base_dir"])
+                if base_dir in base_dirs:
+                    raise ValueError(f"base_dir {cfg['base_dir']} is also "
+                                     f"used by {base_dirs[base_dir]}")
+                base_dirs[base_dir] = config_path
+                cache = Cache(cfg, cache_keys)
+                for export in get_exports(cfg):
+                    key = cache.create_key(export["path"], export)
+                    groups.setdefault(key, (cfg, export))
+            except Exception as error:
+                failures[config_path] = create_failure(config_path, error)
+        return groups, failures
+
+    def run_configs(self, config_paths: list[str], overrides: dict,
+                    cache_keys: dict = None) -> list:
+        """Runs configs in a process pool.
+
+        A crashing worker breaks the whole pool, so the configs that did not
+        finish are run again one by one to find the crashing one.
+
+        Args:
+            config_paths: Paths to the config files.
+            overrides: Config keys replacing the ones of the config files.
+            cache_keys: Cache keys of the exports of the batch, see Cache.
+
+        Returns:
+            List of the results of the configs, see run_config.
+        """
+        results = []
+        crashed = []
+        workers = min(self.workers, len(config_paths))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run_config, config_path, self.outputs,
+                                overrides, cache_keys): config_path
+                for config_path in config_paths
+                }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except BrokenProcessPool as error:
+                    crashed.append((futures[future], error))
+                    continue
+                results.append(result)
+                self.print_result(result)
+        if len(config_paths) > 1:
+            for config_path, _ in crashed:
+                results += self.run_configs([config_path], overrides,
+                                            cache_keys)
+        elif crashed:
+            results.append(create_failure(*crashed[0]))
+            self.print_result(results[-1])
+        return results
+
+    @staticmethod
+    def print_result(result: dict) -> None:
+        """Prints the result of a config.
+
+        Args:
+            result: Result of the config, see run_config.
+        """
+        if result["status"] == "ok":
+            print(f"ok      {result['wall_time_s']:>8.2f} s  "
+                  f"{result['config']}")
+        else:
+            print(f"failed  {result['config']}: "
+                  f"{result['error'].splitlines()[0]}")
+
+    def run(self) -> list:
+        """Parses the distinct exports and runs all configs.
+
+        Returns:
+            List of the results of the configs in the order of the batch,
+            see run_config.
+        """
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="visualizer-batch-") \
+                as tmp_dir:
+            overrides = self.create_overrides(self.cache_dir or tmp_dir)
+            # the exports are hashed once and the keys are passed to the
+            # workers
+            cache_keys = {}
+            groups, failures = self.group_exports(overrides, cache_keys)
+            results = []
+            for result in failures.values():
+                results.append(result)
+                self.print_result(result)
+
+            # parse each distinct export once, in parallel
+            pending = [(cfg, export) for key, (cfg, export) in groups.items()
+                       if not (Path(overrides["cache_dir"]) / key).is_dir()]
+            print(f"Parsing {len(pending)} of {len(groups)} distinct exports "
+                  f"of {len(self.config_paths)} configs")
+            if pending:
+                with ProcessPoolExecutor(
+                        max_workers=min(self.workers, len(pending))
+                        ) as executor:
+                    futures = [executor.submit(parse_export, cfg, export,
+                                               cache_keys)
+                               for cfg, export in pending]
+                    # an export failing to parse fails the configs reading
+                    # it, which report the error themselves
+                    for future in as_completed(futures):
+                        future.exception()
+
+            config_paths = [config_path for config_path in self.config_paths
+                            if config_path not in failures]
+            if config_paths:
+                results += self.run_configs(config_paths, overrides,
+                                            cache_keys)
+
+        order = {path: index for index, path in enumerate(self.config_paths)}
+        results.sort(key=lambda result: order[result["config"]])
+        failed = sum(result["status"] == "failed" for result in results)
+        print(f"{len(results)} configs in "
+              f"{time.perf_counter() - start:.1f} s, {failed} failed")
+        return results
+
+    @staticmethod
+    def save_report(results: list, path: str) -> None:
+        """Saves the results of a batch.
+
+        Args:
+            results: Results of the configs, see run.
+            path: Path of the json file.
+        """
+        with open(path, "w") as json_file:
+            json.dump(results, json_file, indent=4)
@@ -0,0 +1,163 @@
+# Class for caching the cleaned account history on disk
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+import pandas as pd
+from visualizer.utils import get_file_stat
+
+# Increase whenever the cleaning of the account history changes, so entries
+# written by older versions are not used anymore
+CACHE_VERSION = 5
+# Config keys that affect the cleaned account history
+CACHE_CONFIG_KEYS = ["imported_bank_data", "exclude_data", "exclude_rules",
+                     "column_name_key", "column_name_value", "column_date",
+                     "chunk_size", "thousands_separator",
+                     "decimal_separator", "date_format"]
+
+
+class Cache:
+
+    def __init__(self, cfg: dict, keys: dict = None) -> None:
+        """Inits the class
+
+        Args:
+            cfg: Config file containing the configurations. The cache is
+                stored in "cache_dir" and is limited to "cache_max_size" MB.
+            keys: Keys created before, e.g. by another cache of the same
+                run, by the path, size, modification time and settings of
+                the export, see create_key. New keys are added to it.
+        """
+        self.cfg = cfg
+        self.keys = {} if keys is None else keys
+        self.cache_dir = Path(cfg["cache_dir"])
+        self.max_size = cfg.get("cache_max_size", 1024) * 1024 ** 2
+
+    def create_key(self, path: str, export: dict = None) -> str:
+        """Creates the key of the cache entry for an account history.
+
+        The key is a hash of the content of the csv file and of the config
+        keys that affect the cleaning of it. The csv file is only hashed
+        once as long as its size and modification time do not change.
+
+        Args:
+            path: Path to the csv file.
+            export: Settings of the export, see get_exports. Its encoding
+                and column mapping are part of the key.
+
+        Returns:
+            The key.
+        """
+        settings = {name: self.cfg.get(name) for name in CACHE_CONFIG_KEYS}
+        settings["version"] = CACHE_VERSION
+        if export is not None:
+            settings["encoding"] = export["encoding"]
+            settings["columns"] = export["columns"]
+        # dates of the exclusion rules are written as strings
+        settings = json.dumps(settings, sort_keys=True, default=str)
+        file_key = (path, get_file_stat(path), settings)
+        if file_key in self.keys:
+            return self.keys[file_key]
+
+        key = hashlib.sha256()
+        with open(path, "rb") as csv_file:
+            for block in iter(lambda: csv_file.read(1024 ** 2), b""):
+                key.update(block)
+        key.update(settings.encode())
+        self.keys[file_key] = key.hexdigest()
+        return self.keys[file_key]
+
+    def load_chunks(self, key: str):
+        """Loads the chunks of a cached account history.
+
+        Args:
+            key: Key of the cache entry.
+
+        Returns:
+            Iterator over the cached chunks or None if the cache does not
+            contain the key.
+        """
+        entry_dir = self.cache_dir / key
+        if not entry_dir.is_dir():
+            return None
+        # mark the entry as recently used for the eviction
+        os.utime(entry_dir)
+        return (pd.read_feather(chunk_path)
+                for chunk_path in sorted(entry_dir.glob("*.feather")))
+
+    def store_chunks(self, key: str, chunks, exclusion_counts: dict = None):
+        """Stores the chunks of a cleaned account history while they are
+        processed.
+
+        The entry only becomes visible once all chunks have been written, so
+        an interrupted run never leaves an incomplete entry behind.
+
+        Args:
+            key: Key of the cache entry.
+            chunks: Iterator over the cleaned chunks.
+            exclusion_counts: Number of entries removed by each exclusion
+                rule, complete once all chunks are cleaned.
+
+        Yields:
+            The chunks, unchanged.
+        """
+        tmp_dir = self.cache_dir / \
+            f"{key}.tmp-{os.getpid()}-{threading.get_ident()}"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            for index, chunk in enumerate(chunks):
+                chunk = chunk.reset_index(drop=True)
+                chunk.to_feather(tmp_dir / f"{index:08d}.feather")
+                yield chunk
+            with open(tmp_dir / "exclusions.json", "w") as json_file:
+                json.dump(exclusion_counts or {}, json_file)
+            shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+            os.replace(tmp_dir, self.cache_dir / key)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def load_exclusion_counts(self, key: str) -> dict:
+        """Loads the number of entries removed by each exclusion rule when
+        the cached account history was cleaned.
+
+        Args:
+            key: Key of the cache entry.
+
+        Returns:
+            Dict mapping each rule name to the number of removed entries.
+        """
+        try:
+            with open(self.cache_dir / key / "exclusions.json", "r") \
+                    as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return {}
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache is not
+        larger than its maximum size.
+        """
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.is_dir() and ".tmp-" not in entry_dir.name:
+                # entries may be replaced by exports stored in parallel
+                try:
+                    size = sum(f.stat().st_size for f in entry_dir.iterdir())
+                    mtime = entry_dir.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                entries.append((mtime, size, entry_dir))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """Removes all entries of the cache.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,135 @@
+# Class for assigning expenditures to the positions of the config
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from visualizer.const import OTHERS
+
+
+class Categorizer:
+
+    def __init__(self, positions: dict, memo_dir: str = None) -> None:
+        """Compiles the identifiers of each position into a pattern.
+
+        Each pattern is compiled on its own, so the identifiers keep their
+        flags, groups and backreferences. The patterns are tried in the
+        order of the config, so an expenditure matching the identifiers of
+        several positions is assigned to the first one.
+
+        The position of each matched identifier string is memorized. If a
+        memo dir is provided, the memo is loaded from and saved to a file
+        named after a hash of the positions, so it is reused by all runs
+        with the same positions and never by runs with other ones.
+
+        Args:
+            positions: Positions of the config, mapping the name of each
+                position to the strings identifying it.
+            memo_dir: Directory of the memo files, None keeps the memo in
+                memory only.
+
+        Raises:
+            ValueError: If the identifiers of a position are no valid
+                regular expression.
+        """
+        self.positions = list(positions)
+        self.patterns = []
+        for position, identifiers in positions.items():
+            try:
+                self.patterns.append(re.compile("|".join(identifiers)))
+            except re.error as error:
+                raise ValueError(f"Invalid identifiers of position "
+                                 f"{position}: {error}") from error
+
+        self.memo = {}
+        self.memo_changed = False
+        self.memo_path = None
+        if memo_dir is not None:
+            positions_hash = hashlib.sha256(
+                json.dumps(positions).encode()
+                ).hexdigest()
+            self.memo_path = \
+                Path(memo_dir) / f"categories-{positions_hash}.json"
+            if self.memo_path.exists():
+                with open(self.memo_path, "r") as json_file:
+                    self.memo = json.load(json_file)
+
+    def match(self, key: str) -> str:
+        """Finds the position of a single identifier string.
+
+        Args:
+            key: String identifying the expenditure, e.g. the payee.
+
+        Returns:
+            The name of the position or OTHERS if no position matches.
+        """
+        for position, pattern in zip(self.positions, self.patterns):
+            if pattern.search(key) is not None:
+                return position
+        return OTHERS
+
+    def categorize(self, dataframe: pd.DataFrame, column: str) -> pd.Series:
+        """Assigns every row of the dataframe to a position.
+
+        Each distinct value of the column is matched only once, or not at
+        all if it is already memorized, and the result is mapped back to all
+        rows containing it. Rows without a
+        string in the column are left unassigned (NaN), like the former
+        filter loop which dropped them.
+
+        Args:
+            dataframe: The bank account dataframe.
+            column: The column containing the identifier strings.
+
+        Returns:
+            Categorical series with the position of every row.
+        """
+        categories = list(dict.fromkeys(self.positions + [OTHERS]))
+        category_codes = {position: code
+                          for code, position in enumerate(categories)}
+        codes, keys = pd.factorize(dataframe[column])
+        # rows without string (code -1) get the appended code of NaN
+        position_codes = np.array(
+            [category_codes[self.lookup(key)] if isinstance(key, str) else -1
+             for key in keys] + [-1],
+            dtype=np.int32
+            )
+        return pd.Series(
+            pd.Categorical.from_codes(position_codes[codes], categories),
+            index=dataframe.index
+            )
+
+    def lookup(self, key: str) -> str:
+        """Finds the position of a single identifier string in the memo and
+        matches it only if it is not memorized yet.
+
+        Args:
+            key: String identifying the expenditure, e.g. the payee.
+
+        Returns:
+            The name of the position or OTHERS if no position matches.
+        """
+        position = self.memo.get(key)
+        if position is None:
+            position = self.match(key)
+            self.memo[key] = position
+            self.memo_changed = True
+        return position
+
+    def save(self) -> None:
+        """Saves the memo for the next runs if a memo dir is configured and
+        new identifier strings were matched.
+
+        The file is replaced at once, so an interrupted run never leaves a
+        broken memo behind.
+        """
+        if self.memo_path is None or not self.memo_changed:
+            return
+        self.memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.memo_path.with_suffix(f".tmp-{os.getpid()}")
+        with open(tmp_path, "w") as json_file:
+            json.dump(self.memo, json_file)
+        os.replace(tmp_path, self.memo_path)
+        self.memo_changed = False
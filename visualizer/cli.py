@@ -0,0 +1,185 @@
+# Command line interface, kept free of heavy imports so it starts quickly
+import argparse
+import sys
+from visualizer.const import DEFAULT_OUTPUTS, OUTPUTS
+
+
+def main():
+    """Main function for entry point to execute training pipeline.
+    """
+    parser = argparse.ArgumentParser(
+        prog="visualizer",
+        description="visualizes bank account expenses."
+        )
+
+    parser.add_argument(
+        "--config",
+        "-c",
+        help="config file",
+        action="store",
+        type=str,
+        default="./configs/example_config.yml",
+    )
+    parser.add_argument(
+        "--rebuild",
+        help="regenerate the outputs of all months, even unchanged ones",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        help="remove all entries of the cache before running",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--outputs",
+        help="outputs to be generated (default: all but html-report and "
+             "alerts)",
+        nargs="+",
+        choices=OUTPUTS,
+        default=DEFAULT_OUTPUTS,
+    )
+    parser.add_argument(
+        "--watch",
+        help="keep running and update the outputs whenever the config or an "
+             "export changes",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--interval",
+        help="seconds between two checks for changes in watch mode",
+        action="store",
+        type=float,
+        default=5.0,
+    )
+    parser.add_argument(
+        "--serve",
+        help="serve the overviews, expenditures and charts as JSON and "
+             "images on localhost instead of writing the outputs",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--port",
+        help="port of the local server",
+        action="store",
+        type=int,
+        default=8000,
+    )
+    parser.add_argument(
+        "--profile",
+        help="measure each stage and save the report in the base dir",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-stage",
+        help="stage that is additionally profiled with cProfile",
+        action="store",
+        type=str,
+        default=None,
+    )
+    subparsers = parser.add_subparsers(dest="command", title="commands")
+    summary_parser = subparsers.add_parser(
+        "summary",
+        help="print the overview of each year as text table, without "
+             "writing or plotting anything"
+        )
+    summary_parser.add_argument(
+        "--config",
+        "-c",
+        help="config file",
+        action="store",
+        type=str,
+        default=argparse.SUPPRESS,
+    )
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="run many configs in a process pool, parsing each export only "
+             "once"
+        )
+    batch_parser.add_argument(
+        "configs",
+        help="config files or directories containing them",
+        nargs="+",
+    )
+    batch_parser.add_argument(
+        "--workers",
+        help="number of worker processes (default: number of CPUs)",
+        action="store",
+        type=int,
+        default=None,
+    )
+    batch_parser.add_argument(
+        "--cache-dir",
+        help="directory in which the parsed exports are shared and kept "
+             "after the run (default: a temporary directory)",
+        action="store",
+        type=str,
+        default=None,
+    )
+    batch_parser.add_argument(
+        "--report",
+        help="json file the result of each config is written to",
+        action="store",
+        type=str,
+        default=None,
+    )
+    batch_parser.add_argument(
+        "--outputs",
+        help="outputs to be generated (default: all but html-report and "
+             "alerts)",
+        nargs="+",
+        choices=OUTPUTS,
+        default=argparse.SUPPRESS,
+    )
+    args = parser.parse_args()
+
+    # the pipeline, pandas and matplotlib are only imported once a command
+    # needs them, so e.g. --help returns immediately
+    if args.command == "summary":
+        from visualizer.visualize import summarize
+        summarize(args.config)
+        return
+
+    if args.command == "batch":
+        from visualizer.batching import Batch_runner
+        results = Batch_runner(
+            config_paths=args.configs,
+            outputs=args.outputs,
+            workers=args.workers,
+            cache_dir=args.cache_dir
+            ).run()
+        if args.report is not None:
+            Batch_runner.save_report(results, args.report)
+        # a failed config fails the run, e.g. for a nightly job
+        sys.exit(any(result["status"] == "failed" for result in results))
+
+    print("\n")
+    print(f"Selected pipeline config file: {args.config}")
+
+    if args.serve:
+        from visualizer.serving import Query_server
+        Query_server(config_path=args.config, port=args.port).run()
+        return
+
+    if args.watch:
+        from visualizer.watching import Watcher
+        Watcher(
+            config_path=args.config,
+            outputs=args.outputs,
+            interval=args.interval,
+            profile=args.profile
+            ).run()
+        return
+
+    from visualizer.visualize import visualize
+    visualize(
+        config_path=args.config,
+        clear_cache=args.clear_cache,
+        rebuild=args.rebuild,
+        profile=args.profile,
+        profile_stage=args.profile_stage,
+        outputs=args.outputs
+        )
+
+
+if __name__ == "__main__":
+    main()
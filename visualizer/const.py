@@ -3,3 +3,20 @@ MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep",
           "Oct", "Nov", "Dec"]
 MONTHS_STR_NR = ["01", "02", "03", "04", "05", "06", "07", "08", "09",
                  "10", "11", "12"]
+# Column the categorizer writes the position of each expenditure to
+POSITION_COLUMN = "Position"
+# Column containing the account of each expenditure if accounts are configured
+ACCOUNT_COLUMN = "Account"
+# Column containing the month in the single positions file
+MONTH_COLUMN = "Month"
+# Position of all expenditures not assigned to a position of the config
+OTHERS = "Sonstiges"
+# Outputs that can be selected to be generated
+OUTPUTS = ["overview", "positions", "month-charts", "year-charts",
+           "year-over-year", "html-report", "alerts"]
+# Outputs generated if none are selected, "html-report" and "alerts" are only
+# generated on request
+DEFAULT_OUTPUTS = ["overview", "positions", "month-charts", "year-charts",
+                   "year-over-year"]
+# Outputs that contain charts and need matplotlib
+CHART_OUTPUTS = ["month-charts", "year-charts", "year-over-year"]
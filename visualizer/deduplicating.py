@@ -0,0 +1,207 @@
+# Class for removing the expenditures contained in several overlapping
+# exports
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from visualizer.const import ACCOUNT_COLUMN
+from visualizer.utils import get_file_stat
+
+
+class Deduplicator:
+
+    def __init__(self, cfg: dict, exports: list[dict]) -> None:
+        """Inits the fingerprint index of the exports.
+
+        Each expenditure is fingerprinted by the imported columns (e.g. date,
+        payee, purpose and amount), its configured account and its
+        occurrence index, i.e. the number of identical expenditures before
+        it in the same export. Genuine repeats within an export therefore
+        have different fingerprints, while an expenditure contained in two
+        overlapping exports has the same fingerprint in both. The index maps
+        each fingerprint to the export that contributed it first, the
+        expenditures of all other exports with the same fingerprint are
+        duplicates.
+
+        If an index dir is configured, the index is loaded from and saved to
+        a file named after a hash of the imported columns. The fingerprints
+        of an export are only reused while the export is unchanged, so the
+        expenditures of the overlap stay with the same export when new
+        exports are added.
+
+        Args:
+            cfg: Config file.
+            exports: Settings of the exports of the config, see get_exports.
+        """
+        self.columns = list(cfg["imported_bank_data"])
+        self.paths = []
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.owners = np.empty(0, dtype=np.int32)
+        # new fingerprints of the export read last, merged into the sorted
+        # index at once when the next export is read or the index is saved
+        self.new_keys = []
+        self.new_owner = None
+        # number of expenditures seen of each fingerprint of each export,
+        # continued across the chunks of an export
+        self.counts = {}
+        # size and modification time of each export when the index was
+        # saved
+        self.stats = {}
+        self.changed = False
+
+        self.index_path = None
+        index_dir = cfg.get("dedup_index_dir")
+        if index_dir is not None:
+            columns_hash = hashlib.sha256(
+                json.dumps(self.columns).encode()
+                ).hexdigest()
+            self.index_path = Path(index_dir) / f"dedup-{columns_hash}.npz"
+            if self.index_path.exists():
+                self.load(exports)
+
+    def load(self, exports: list[dict]) -> None:
+        """Loads the fingerprints of the exports that are still configured
+        and unchanged since they were saved.
+
+        Args:
+            exports: Settings of the exports of the config.
+        """
+        with np.load(self.index_path) as index:
+            paths = index["paths"].tolist()
+            stats = index["stats"].tolist()
+            keys = index["keys"]
+            owners = index["owners"]
+        current = {export["path"] for export in exports}
+        valid = [path in current and get_file_stat(path) == tuple(stat)
+                 for path, stat in zip(paths, stats)]
+        mask = np.array(valid, dtype=bool)[owners]
+        self.paths = paths
+        self.stats = {path: tuple(stat) for path, stat in zip(paths, stats)}
+        self.keys = keys[mask]
+        self.owners = owners[mask]
+
+    def restart(self) -> None:
+        """Restarts the occurrence indices, e.g. before the exports are read
+        a second time.
+        """
+        self.merge()
+        self.counts = {}
+
+    def merge(self) -> None:
+        """Merges the new fingerprints of the export read last into the
+        sorted index with a single sort.
+        """
+        if not self.new_keys:
+            return
+        # a re-read chunk may repeat fingerprints of the export
+        new_keys = np.unique(np.concatenate(self.new_keys))
+        keys = np.concatenate([self.keys, new_keys])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.owners = np.concatenate([
+            self.owners,
+            np.full(len(new_keys), self.new_owner, dtype=np.int32)
+            ])[order]
+        self.new_keys = []
+        self.changed = True
+
+    def fingerprint(self, dataframe: pd.DataFrame, path: str,
+                    named_account: bool = True) -> np.ndarray:
+        """Computes the fingerprints of the expenditures of a chunk.
+
+        Args:
+            dataframe: The (chunk of the) cleaned export.
+            path: Path to the export.
+            named_account: Whether the account of the export is configured.
+                An account named after the file is left out, so
+                overlapping statements of the same account match.
+
+        Returns:
+            Array of the fingerprints.
+        """
+        columns = self.columns
+        if named_account:
+            columns = columns + [ACCOUNT_COLUMN]
+        columns = [column for column in columns
+                   if column in dataframe.columns]
+        row_hashes = pd.Series(
+            pd.util.hash_pandas_object(dataframe[columns], index=False)
+            .to_numpy()
+            )
+        # continue the occurrence indices of the previous chunks
+        counts = self.counts.get(path, pd.Series(dtype=np.int64))
+        occurrences = row_hashes.groupby(row_hashes, sort=False).cumcount() \
+            + counts.reindex(row_hashes).fillna(0).to_numpy(dtype=np.int64)
+        self.counts[path] = counts.add(row_hashes.value_counts(),
+                                       fill_value=0).astype(np.int64)
+        return pd.util.hash_pandas_object(
+            pd.DataFrame({"row": row_hashes, "occurrence": occurrences}),
+            index=False
+            ).to_numpy()
+
+    def deduplicate(self, dataframe: pd.DataFrame, path: str,
+                    named_account: bool = True) -> pd.DataFrame:
+        """Removes the expenditures of a chunk that were already contributed
+        by another export.
+
+        Args:
+            dataframe: The (chunk of the) cleaned export.
+            path: Path to the export.
+            named_account: Whether the account of the export is configured,
+                see fingerprint.
+
+        Returns:
+            The chunk without the duplicates.
+        """
+        if path not in self.paths:
+            self.paths.append(path)
+        owner = self.paths.index(path)
+        # the fingerprints of an export never duplicate each other, so they
+        # are only compared to the index of the exports before
+        if owner != self.new_owner:
+            self.merge()
+            self.new_owner = owner
+        keys = self.fingerprint(dataframe, path, named_account)
+
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        duplicate = np.zeros(len(keys), dtype=bool)
+        duplicate[found] = self.owners[positions[found]] != owner
+
+        if not found.all():
+            self.new_keys.append(keys[~found])
+        if not duplicate.any():
+            return dataframe
+        return dataframe[~duplicate]
+
+    def save(self) -> None:
+        """Saves the index for the next runs if an index dir is configured
+        and the index or an export changed.
+
+        The file is replaced at once, so an interrupted run never leaves a
+        broken index behind.
+        """
+        if self.index_path is None:
+            return
+        self.merge()
+        stats = {path: get_file_stat(path) or (-1, -1)
+                 for path in self.paths}
+        if not self.changed and stats == self.stats:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(f".tmp-{os.getpid()}")
+        with open(tmp_path, "wb") as index_file:
+            np.savez(
+                index_file,
+                paths=np.array(self.paths, dtype=str),
+                stats=np.array(list(stats.values()),
+                               dtype=np.int64).reshape(-1, 2),
+                keys=self.keys,
+                owners=self.owners
+                )
+        os.replace(tmp_path, self.index_path)
+        self.stats = stats
+        self.changed = False
@@ -0,0 +1,206 @@
+# Class for removing the income and the excluded entries from the account
+# history
+import re
+import numpy as np
+import pandas as pd
+from visualizer.processing import Dataframe_processor
+
+# The income is removed first, only the expenditures are analyzed
+INCOME_RULE = {"name": "income", "sign": ["positive", "zero"]}
+# Conditions of a rule on the strings of its column
+TEXT_CONDITIONS = ["equals", "contains", "regex"]
+# Conditions of a rule on the amounts
+SIGNS = {"positive": np.greater, "negative": np.less, "zero": np.equal}
+
+
+class Excluder:
+
+    def __init__(self, cfg: dict) -> None:
+        """Compiles the exclusion rules of the config.
+
+        The rules are the removal of the income, one rule for each value in
+        "exclude_data" (exact matches) and the rules in "exclude_rules". A
+        rule consists of one or more conditions, all of which have to hold
+        for an entry to be removed:
+            column: Column the text conditions are checked on.
+            equals: String or list of strings the column has to equal.
+            contains: String or list of strings one of which the column has
+                to contain.
+            regex: Regular expression the column has to match.
+            sign: "positive", "negative" or "zero", or a list of them, the
+                sign of the amount.
+            start, end: First and last day of a date window, e.g.
+                "2022-01-01".
+            name: Name of the rule in the report, by default derived from
+                the conditions.
+
+        Args:
+            cfg: Config file.
+
+        Raises:
+            ValueError: If a rule contains an unknown condition or no
+                condition at all.
+        """
+        self.value_column = cfg["column_name_value"]
+        self.date_column = cfg["column_date"]
+        rules = [INCOME_RULE]
+        for column, values in (cfg.get("exclude_data") or {}).items():
+            rules += [{"column": column, "equals": [value]}
+                      for value in values]
+        rules += cfg.get("exclude_rules") or []
+        self.rules = [self.compile_rule(rule) for rule in rules]
+        self.names = list(dict.fromkeys(rule["name"] for rule in self.rules))
+
+    @staticmethod
+    def compile_rule(rule: dict) -> dict:
+        """Checks the conditions of a rule and brings them in a uniform
+        shape.
+
+        Args:
+            rule: The rule as configured.
+
+        Returns:
+            The compiled rule.
+        """
+        unknown = set(rule) - set(TEXT_CONDITIONS) - \
+            {"column", "sign", "start", "end", "name"}
+        if unknown:
+            raise ValueError(f"Unknown conditions {sorted(unknown)} in "
+                             f"exclusion rule {rule}")
+        conditions = [key for key in TEXT_CONDITIONS + ["sign", "start", "end"]
+                      if rule.get(key) is not None]
+        if not conditions:
+            raise ValueError(f"Exclusion rule {rule} has no condition")
+        compiled = {key: rule[key] for key in conditions}
+        for key in ["equals", "contains", "sign"]:
+            if isinstance(compiled.get(key), str):
+                compiled[key] = [compiled[key]]
+        if any(key in compiled for key in TEXT_CONDITIONS):
+            if rule.get("column") is None:
+                raise ValueError(f"Exclusion rule {rule} has no column")
+            compiled["column"] = rule["column"]
+        if "contains" in compiled:
+            compiled["contains"] = re.compile(
+                "|".join(re.escape(value) for value in compiled["contains"])
+                )
+        if "regex" in compiled:
+            compiled["regex"] = re.compile(compiled["regex"])
+        unknown_signs = set(compiled.get("sign", [])) - set(SIGNS)
+        if unknown_signs:
+            raise ValueError(f"Unknown signs {sorted(unknown_signs)} in "
+                             f"exclusion rule {rule}")
+        for key in ["start", "end"]:
+            if key in compiled:
+                compiled[key] = Dataframe_processor.get_day_number(
+                    compiled[key]
+                    )
+        compiled["name"] = rule.get("name") or Excluder.describe_rule(rule)
+        return compiled
+
+    @staticmethod
+    def describe_rule(rule: dict) -> str:
+        """Derives the name of a rule from its conditions.
+
+        Args:
+            rule: The rule as configured.
+
+        Returns:
+            The name, e.g. "Verwendungszweck equals Miete".
+        """
+        parts = []
+        for key in TEXT_CONDITIONS:
+            if rule.get(key) is not None:
+                values = rule[key]
+                if not isinstance(values, str):
+                    values = ", ".join(str(value) for value in values)
+                parts.append(f"{rule['column']} {key} {values}")
+        if rule.get("sign") is not None:
+            signs = rule["sign"]
+            if not isinstance(signs, str):
+                signs = "/".join(signs)
+            parts.append(f"amount {signs}")
+        if rule.get("start") is not None or rule.get("end") is not None:
+            parts.append(f"date {rule.get('start') or ''}"
+                         f"..{rule.get('end') or ''}")
+        return " and ".join(parts)
+
+    def match_text(self, values: pd.Series, rule: dict) -> np.ndarray:
+        """Checks the text conditions of a rule.
+
+        Each distinct string is only checked once, the categories of a
+        categorical column are checked directly.
+
+        Args:
+            values: The column of the rule.
+            rule: The compiled rule.
+
+        Returns:
+            Boolean mask of the matching rows.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            strings = values.cat.categories
+        else:
+            codes, strings = pd.factorize(values)
+        strings = pd.Series(strings, dtype=object)
+        matched = np.ones(len(strings), dtype=bool)
+        if "equals" in rule:
+            matched &= strings.isin(rule["equals"]).to_numpy()
+        for key in ["contains", "regex"]:
+            if key in rule:
+                matched &= strings.astype(str).str.contains(
+                    rule[key], regex=True
+                    ).to_numpy(dtype=bool)
+        # rows without string (code -1) get the appended False
+        return np.append(matched, False)[codes]
+
+    def match(self, dataframe: pd.DataFrame, rule: dict) -> np.ndarray:
+        """Checks all conditions of a rule.
+
+        Args:
+            dataframe: The account history.
+            rule: The compiled rule.
+
+        Returns:
+            Boolean mask of the matching rows.
+        """
+        matched = np.ones(len(dataframe), dtype=bool)
+        if "column" in rule:
+            matched &= self.match_text(dataframe[rule["column"]], rule)
+        if "sign" in rule:
+            amounts = dataframe[self.value_column].to_numpy()
+            signs = np.zeros(len(dataframe), dtype=bool)
+            for sign in rule["sign"]:
+                signs |= SIGNS[sign](amounts, 0)
+            matched &= signs
+        if "start" in rule or "end" in rule:
+            days = dataframe[self.date_column].to_numpy()
+            if "start" in rule:
+                matched &= days >= rule["start"]
+            if "end" in rule:
+                matched &= days <= rule["end"]
+        return matched
+
+    def select_included(self, dataframe: pd.DataFrame,
+                        counts: dict = None) -> np.ndarray:
+        """Evaluates all rules into a single mask, without copying the
+        account history.
+
+        Args:
+            dataframe: The account history, with the amounts in cents and
+                the dates as day numbers.
+            counts: Dict the number of removed rows is added to for each
+                rule name. A row matching several rules is counted for the
+                first one.
+
+        Returns:
+            Boolean mask of the rows that are not removed by any rule.
+        """
+        excluded = np.zeros(len(dataframe), dtype=bool)
+        for rule in self.rules:
+            matched = self.match(dataframe, rule)
+            if counts is not None:
+                counts[rule["name"]] = counts.get(rule["name"], 0) + \
+                    int(np.count_nonzero(matched & ~excluded))
+            excluded |= matched
+        return ~excluded
@@ -0,0 +1,110 @@
+# Class for detecting the months whose outputs have to be regenerated
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from visualizer.const import MONTHS
+from visualizer.processing import Dataframe_processor
+
+
+class Fingerprints:
+
+    def __init__(self, cfg: dict) -> None:
+        """Inits the fingerprint of each month with the parts of the config
+        that affect the month.
+
+        Args:
+            cfg: Config file containing the configurations.
+        """
+        self.cfg = cfg
+        self.path = Path(cfg["base_dir"]) / "fingerprints.json"
+        self.hashes = {}
+        for month in MONTHS:
+            settings = {
+                "positions": cfg["positions"],
+                "external positions": cfg[month]["external positions"],
+                "income": cfg[month]["income"],
+                "export_month_data": cfg.get("export_month_data", False)
+                }
+            self.hashes[month] = hashlib.sha256(
+                json.dumps(settings, sort_keys=True).encode()
+                )
+
+    def update(self, dataframe: pd.DataFrame) -> None:
+        """Adds the expenditures of a chunk of the account history to the
+        fingerprints of their months.
+
+        Args:
+            dataframe: Dataframe containing the expenditures.
+        """
+        row_hashes = pd.util.hash_pandas_object(dataframe, index=False)
+        row_hashes = row_hashes.to_numpy()
+        years, months = Dataframe_processor.get_years_and_months(
+            dataframe,
+            self.cfg["column_date"]
+            )
+        months = np.where(years == self.cfg["year"], months, 0)
+        for index, month in enumerate(MONTHS):
+            self.hashes[month].update(row_hashes[months == index+1].tobytes())
+
+    def load(self) -> dict:
+        """Loads the fingerprints saved by the previous runs.
+
+        Returns:
+            Dict mapping each output to the fingerprints of the months at the
+            time the output was generated. Empty if there are none or the
+            file can not be read, so all months are regenerated.
+        """
+        try:
+            with open(self.path, "r") as json_file:
+                fingerprints = json.load(json_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return fingerprints if isinstance(fingerprints, dict) else {}
+
+    def get_changed_months(self, output: str, path: str) -> list[str]:
+        """Compares the fingerprints with the ones saved by the last run
+        that generated the output.
+
+        A month is also considered changed if a file of the output is
+        missing.
+
+        Args:
+            output: Name of the output, e.g. "positions".
+            path: Path of a file created by the output, relative to the base
+                dir. "{subdir}" is replaced by the subdir of each month.
+
+        Returns:
+            List of the months whose output has to be regenerated.
+        """
+        previous = self.load().get(output, {})
+        changed_months = []
+        for month in MONTHS:
+            month_path = Path(self.cfg["base_dir"]) / \
+                path.format(subdir=self.cfg[month]["subdir"])
+            if previous.get(month) != self.hashes[month].hexdigest() or \
+                    not month_path.exists():
+                changed_months.append(month)
+        return changed_months
+
+    def save(self, outputs: list[str]) -> None:
+        """Saves the fingerprints of the generated outputs for the next run.
+
+        The file is replaced at once, so an interrupted run never leaves a
+        broken file behind.
+
+        Args:
+            outputs: Names of the outputs generated by this run.
+        """
+        fingerprints = self.load()
+        for output in outputs:
+            fingerprints[output] = {
+                month: month_hash.hexdigest()
+                for month, month_hash in self.hashes.items()
+                }
+        tmp_path = self.path.with_suffix(f".tmp-{os.getpid()}")
+        with open(tmp_path, "w") as json_file:
+            json.dump(fingerprints, json_file, indent=4)
+        os.replace(tmp_path, self.path)
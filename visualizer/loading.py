@@ -1,6 +1,6 @@
 from pathlib import Path
 import pandas as pd
-from visualizer.const import MONTHS
+from visualizer.const import (MONTHS, OTHERS)
 
 
 class Loader:
@@ -21,23 +21,83 @@ class Loader:
             exist_ok=True
             ) for month in MONTHS]
 
-    def load_dataframe(self, path):
+    def load_dataframe(self, path,
+                       chunk_size: int = None,
+                       encoding: str = 'unicode_escape',
+                       columns: dict = None
+                       ):
         """Loads a dataframe from csv file.
 
+        The amounts are parsed to numbers while reading, using the thousands
+        and decimal separators of the bank export. All other columns are
+        imported as categoricals, so each distinct string (e.g. a payee or a
+        date) is only kept once. The dates are converted by the
+        Dataframe_processor.
+
         Args:
             path: Path to the csv file.
+            chunk_size: If provided, the csv file is read lazily in chunks
+                of this number of rows.
+            encoding: Encoding of the csv file.
+            columns: Mapping of the column names of the csv file to the
+                column names of the config, if they differ. The chunks are
+                renamed by load_dataframe_chunks.
 
         Returns:
-            The laoded dataframe.
+            The laoded dataframe or, if a chunk size is provided, an
+            iterator over the chunks of the dataframe.
         """
+        columns = columns or {}
+        export_columns = {column: export_column
+                          for export_column, column in columns.items()}
+        usecols = [export_columns.get(column, column)
+                   for column in self.cfg["imported_bank_data"]]
+        dtypes = {column: "category" for column in usecols}
+        dtypes[export_columns.get(self.cfg["column_name_value"],
+                                  self.cfg["column_name_value"])] = float
         dataframe = pd.read_csv(
             path,
-            encoding='unicode_escape',
+            encoding=encoding,
             sep=";",
-            usecols=self.cfg["imported_bank_data"]
+            usecols=usecols,
+            dtype=dtypes,
+            thousands=self.cfg.get("thousands_separator", "."),
+            decimal=self.cfg.get("decimal_separator", ","),
+            chunksize=chunk_size
             )
+        if chunk_size is None and columns:
+            dataframe.rename(columns=columns, inplace=True)
         return dataframe
 
+    def load_dataframe_chunks(self, path,
+                              chunk_size: int = None,
+                              encoding: str = 'unicode_escape',
+                              columns: dict = None
+                              ):
+        """Loads a dataframe from csv file chunk by chunk, so only one chunk
+        has to be kept in memory at a time.
+
+        Args:
+            path: Path to the csv file.
+            chunk_size: Number of rows of a chunk. If not provided, the whole
+                csv file is loaded as a single chunk.
+            encoding: Encoding of the csv file.
+            columns: Mapping of the column names of the csv file to the
+                column names of the config, if they differ.
+
+        Yields:
+            The loaded chunks of the dataframe.
+        """
+        if chunk_size is None:
+            yield self.load_dataframe(path, None, encoding, columns)
+        else:
+            with self.load_dataframe(path, chunk_size, encoding,
+                                     columns) as reader:
+                for chunk in reader:
+                    if columns:
+                        chunk.rename(columns=columns, inplace=True)
+                    yield chunk
+
     def create_income_df_from_config(self):
         """Creates a dataframe containing the income.
 
@@ -51,30 +111,13 @@ class Loader:
             months.append(month)
         return pd.DataFrame({'Income': income}, index=months)
 
-    def create_month_overview_dataset(self):
-        """Creates the a dataframe containing the expenses over a month.
-
-        Returns:
-            The dataframe.
-        """
-        overview_df = pd.DataFrame(
-            list(self.cfg["positions"].keys()),
-            columns=['Position']
-            )
-        overview_df['Sum'] = 0
-        overview_df['counts'] = 0
-        return overview_df
-
-    def create_expenses_year_dataframe(self) -> pd.DataFrame:
-        """Creates a dataframe containing the expenses over a year.
+    def create_position_month_dataset(self) -> pd.DataFrame:
+        """Creates a zeroed dataframe containing a value for each position
+        (including "Sonstiges") and month.
 
         Returns:
             The dataframe.
         """
         position_list = list(self.cfg["positions"].keys())
-        position_list.append("Sonstiges")
-
-        for ext_position in self.cfg["Jan"]["external positions"]:
-            position_list.append(ext_position)
-        position_list.append("Total")
-        return pd.DataFrame(position_list, columns=['Position'])
+        position_list.append(OTHERS)
+        return pd.DataFrame(0, index=position_list, columns=MONTHS)
@@ -1,7 +1,12 @@
 # Class for plotting datasets
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+from visualizer.profiling import Profiler
+# charts are only saved to files, so no interactive backend is needed
+matplotlib.use("Agg")
 
 
 class Month_Plotter:
@@ -29,6 +34,7 @@ class Month_Plotter:
                                        )
         fig = ax.get_figure()
         fig.savefig(path)
+        plt.close(fig)
 
     def print_bar_chart(self, path: str, title: str) -> None:
         """Plots a bar chart.
@@ -48,6 +54,7 @@ class Month_Plotter:
                         )
         fig = ax.get_figure()
         fig.savefig(path)
+        plt.close(fig)
 
 
 class Year_Plotter:
@@ -84,6 +91,7 @@ class Year_Plotter:
         plt.ylabel('Euro')
         fig = ax.get_figure()
         fig.savefig(path)
+        plt.close(fig)
 
     def print_stacked_bar_chart(self, path: str, title: str) -> None:
         """Plots a stacked bar chart.
@@ -95,15 +103,14 @@ class Year_Plotter:
         total_spend = np.array(self.overview_df["Total"].to_list())
         total_income = np.array(self.income_df["Income"].to_list())
         money_left = total_income-total_spend
-        self.overview_df.drop(["Total"], axis=1, inplace=True)
+        overview_df = self.overview_df.drop(["Total"], axis=1)
 
-        fig = plt.subplots()
         # expenditure bars
-        ax = self.overview_df.plot.bar(stacked=True,
-                                       figsize=(15, 10),
-                                       title=title,
-                                       grid=True
-                                       )
+        ax = overview_df.plot.bar(stacked=True,
+                                  figsize=(15, 10),
+                                  title=title,
+                                  grid=True
+                                  )
         self.income_df['Income'].plot(
             kind='line',
             marker='x',
@@ -113,7 +120,7 @@ class Year_Plotter:
 
         patches = ax.patches
         # Annotate plot
-        available_months_count = len(self.overview_df)
+        available_months_count = len(overview_df)
         for index in range(available_months_count):
             # total amount spent
             ax.annotate(total_spend[index],
@@ -139,8 +146,8 @@ class Year_Plotter:
 
         # add amount spent for each class in each stacked bar
         list_values = []
-        for column in self.overview_df:
-            list_values = list_values + self.overview_df[column].tolist()
+        for column in overview_df:
+            list_values = list_values + overview_df[column].tolist()
         for rect, value in zip(patches, list_values):
             h = rect.get_height()/2.
             w = rect.get_width()/2.
@@ -158,3 +165,114 @@ class Year_Plotter:
         plt.legend(bbox_to_anchor=(1.0, 1.0))
         fig = ax.get_figure()
         fig.savefig(path)
+        plt.close(fig)
+
+
+class Years_Plotter:
+
+    def __init__(self, years_df: pd.DataFrame,
+                 month_totals_df: pd.DataFrame
+                 ) -> None:
+        """Init the plotter class.
+
+        Args:
+            years_df: Dataframe that contains the amount spent for each
+            class (columns) in each year (rows), including the "Total".
+            month_totals_df: Dataframe that contains the total amount spent
+            in each month (rows) of each year (columns).
+        """
+        self.years_df = years_df
+        self.month_totals_df = month_totals_df
+
+    def print_grouped_bar_chart(self, path: str, title: str) -> None:
+        """Plots a bar chart comparing the classes year by year.
+
+        Args:
+            path: Outputh path of the bar chart.
+            title: Title of the bar chart.
+        """
+        ax = self.years_df.drop(columns=["Total"]).transpose().plot.bar(
+            figsize=(20, 10),
+            rot=0,
+            title=title,
+            grid=True
+            )
+        plt.xlabel('Position')
+        plt.ylabel('Euro')
+        fig = ax.get_figure()
+        fig.savefig(path)
+        plt.close(fig)
+
+    def print_line_chart(self, path: str, title: str) -> None:
+        """Plots a line chart comparing the monthly totals year by year.
+
+        Args:
+            path: Outputh path of the line chart.
+            title: Title of the line chart.
+        """
+        ax = self.month_totals_df.plot.line(
+            figsize=(20, 10),
+            title=title,
+            grid=True,
+            marker='o'
+            )
+        plt.xlabel('Month')
+        plt.ylabel('Euro')
+        fig = ax.get_figure()
+        fig.savefig(path)
+        plt.close(fig)
+
+
+def render_chart(chart: tuple) -> None:
+    """Renders a single chart.
+
+    Args:
+        chart: Tuple of the plotter, the name of its print method, the output
+            path and the title of the chart.
+    """
+    plotter, method, path, title = chart
+    getattr(plotter, method)(path, title)
+
+
+class Chart_renderer:
+
+    def __init__(self, workers: int = 1) -> None:
+        """Init the renderer class.
+
+        Args:
+            workers: Number of processes rendering the charts in parallel.
+        """
+        self.workers = workers
+        self.charts = []
+
+    def add(self, plotter, method: str, path: str, title: str) -> None:
+        """Adds a chart to be rendered.
+
+        Args:
+            plotter: Month_Plotter, Year_Plotter or Years_Plotter containing
+                the data.
+            method: Name of the print method of the plotter, e.g.
+                "print_bar_chart".
+            path: Output path of the chart.
+            title: Title of the chart.
+        """
+        self.charts.append((plotter, method, path, title))
+
+    def render(self, profiler: Profiler = None) -> None:
+        """Renders all added charts, in a process pool if more than one
+        worker is configured.
+
+        Args:
+            profiler: Profiler measuring each chart, or all charts at once
+                when rendered in a process pool.
+        """
+        profiler = profiler or Profiler()
+        if self.workers > 1 and len(self.charts) > 1:
+            with profiler.stage("plot (process pool)"), \
+                    ProcessPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(render_chart, self.charts))
+        else:
+            for chart in self.charts:
+                with profiler.stage(f"plot {chart[2]}"):
+                    render_chart(chart)
+        self.charts = []
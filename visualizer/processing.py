@@ -1,6 +1,7 @@
+import warnings
+import numpy as np
 import pandas as pd
-import calendar
-from visualizer.const import (MONTHS, MONTHS_STR_NR)
+from visualizer.const import MONTHS
 pd.options.mode.chained_assignment = None  # default='warn'
 
 
@@ -12,175 +13,408 @@ class Dataframe_processor:
         pass
 
     @staticmethod
-    def remove_decimal_points(dataframe: pd.DataFrame,
-                              column: str
-                              ) -> pd.DataFrame:
-        """Removes the decimal point in all entries of the provided column.
+    def convert_column_to_cents(dataframe: pd.DataFrame,
+                                column: str
+                                ) -> pd.DataFrame:
+        """Converts a column of amounts in Euro to integer cents, so they can
+        be summed up without rounding errors.
 
         Args:
-            dataframe: Dataframe that contains the column.
-            column: Column for which the decimal points are removed.
+            dataframe: Dataframe containing the column to be converted.
+            column: Column that will be converted.
 
         Returns:
             The processed dataframe.
         """
-        dataframe[column] = dataframe[column].str.replace('.', '')
+        dataframe[column] = (dataframe[column] * 100).round().astype('int64')
         return dataframe
 
     @staticmethod
-    def convert_column_to_float(dataframe: pd.DataFrame,
-                                column: str
-                                ) -> pd.DataFrame:
-        """Converts a column in a dataframe to float.
+    def convert_cents_to_euros(dataframe: pd.DataFrame,
+                               column: str
+                               ) -> pd.DataFrame:
+        """Converts a column of integer cents back to Euro for the output.
 
         Args:
             dataframe: Dataframe containing the column to be converted.
             column: Column that will be converted.
 
+        Returns:
+            A copy of the dataframe containing the converted column.
+        """
+        return dataframe.assign(**{column: dataframe[column] / 100})
+
+    @staticmethod
+    def convert_column_to_day_numbers(dataframe: pd.DataFrame,
+                                      column: str,
+                                      date_format: str = None
+                                      ) -> pd.DataFrame:
+        """Converts the dates of a column to day numbers, i.e. the days since
+        1970-01-01 as int32, which take half the memory of timestamps.
+
+        Each distinct date string is only parsed once, the categories of a
+        categorical column are parsed directly. Rows whose date can not be
+        parsed are reported and removed.
+
+        Args:
+            dataframe: Dataframe to be processed.
+            column: Column to be processed.
+            date_format: Format of the dates, e.g. "%d.%m.%Y". If not
+                provided, the format is inferred with the day first.
+
         Returns:
             The processed dataframe.
         """
-        dataframe[column].replace(',', '.', regex=True, inplace=True)
-        dataframe[column] = dataframe[column].astype(float)
+        if isinstance(dataframe[column].dtype, pd.CategoricalDtype):
+            codes = dataframe[column].cat.codes.to_numpy()
+            date_strings = dataframe[column].cat.categories
+        else:
+            codes, date_strings = pd.factorize(dataframe[column])
+        if date_format is None:
+            dates = pd.to_datetime(date_strings, dayfirst=True,
+                                   errors='coerce')
+        else:
+            dates = pd.to_datetime(date_strings, format=date_format,
+                                   errors='coerce')
+        dates = dates.to_numpy()
+        # rows without date (code -1) get the appended invalid date
+        invalid_rows = np.append(np.isnat(dates), True)[codes]
+        row_days = np.append(
+            dates.astype("datetime64[D]").astype(np.int64), 0
+            )[codes].astype(np.int32)
+        if invalid_rows.any():
+            examples = dataframe.loc[invalid_rows, column].unique()[:5]
+            warnings.warn(
+                f"Removed {invalid_rows.sum()} rows with missing or invalid "
+                f"dates in column {column}, e.g. {list(examples)}"
+                )
+            dataframe = dataframe[~invalid_rows]
+            row_days = row_days[~invalid_rows]
+        dataframe[column] = row_days
         return dataframe
 
     @staticmethod
-    def remove_positive_entries(dataframe: pd.DataFrame,
-                                column: str
-                                ) -> pd.DataFrame:
-        """Removes all positive entries in a dataframe column.
+    def convert_day_numbers_to_datetime(dataframe: pd.DataFrame,
+                                        column: str
+                                        ) -> pd.DataFrame:
+        """Converts a column of day numbers back to dates for the output.
 
         Args:
-            dataframe: Provided dataframe.
+            dataframe: Dataframe containing the column to be converted.
             column: Column that will be converted.
 
         Returns:
-            The processed dataframe.
+            A copy of the dataframe containing the converted column.
         """
-        dataframe = dataframe[dataframe[column].str.contains("-")]
-        return dataframe
+        return dataframe.assign(**{column: (
+            dataframe[column].to_numpy()
+            .astype("datetime64[D]")
+            .astype("datetime64[ns]")
+            )})
+
+    @staticmethod
+    def get_day_number(date) -> int:
+        """Converts a date to its day number.
+
+        Args:
+            date: The date, e.g. "2021-03-01".
+
+        Returns:
+            The days since 1970-01-01.
+        """
+        return int(np.datetime64(pd.Timestamp(date), "D").astype(np.int64))
+
+    @staticmethod
+    def get_years_and_months(dataframe: pd.DataFrame,
+                             column: str
+                             ) -> tuple:
+        """Returns the year and month of each day number of a column.
+
+        Args:
+            dataframe: Dataframe containing the column.
+            column: Column containing the day numbers.
+
+        Returns:
+            Tuple of the arrays of the years and the months (1 to 12).
+        """
+        months = dataframe[column].to_numpy().astype("datetime64[D]") \
+            .astype("datetime64[M]").astype(np.int64)
+        return months // 12 + 1970, months % 12 + 1
+
+    @staticmethod
+    def concat_dataframes(dataframes: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenates dataframes, e.g. the chunks of an account history,
+        without converting their categorical columns to strings.
+
+        The categories of each categorical column are united first, as the
+        columns are only concatenated as categoricals if their categories
+        are equal.
+
+        Args:
+            dataframes: Dataframes with the same columns.
+
+        Returns:
+            The concatenated dataframe.
+        """
+        for column, dtype in dataframes[0].dtypes.items():
+            if not isinstance(dtype, pd.CategoricalDtype) or all(
+                    dataframe[column].dtype == dtype
+                    for dataframe in dataframes):
+                continue
+            categories = dtype.categories
+            for dataframe in dataframes[1:]:
+                categories = categories.union(
+                    dataframe[column].cat.categories
+                    )
+            dataframes = [
+                dataframe.assign(**{
+                    column: dataframe[column].cat.set_categories(categories)
+                    })
+                for dataframe in dataframes
+                ]
+        return pd.concat(dataframes)
 
     @staticmethod
-    def remove_entries(dataframe: pd.DataFrame,
-                       exclude_data: dict
-                       ) -> pd.DataFrame:
-        """Removes all entries in the dataframe specified in the
-        exclude_data dict.
+    def add_source_column(dataframe: pd.DataFrame,
+                          column: str,
+                          source: str,
+                          sources: list[str]
+                          ) -> pd.DataFrame:
+        """Adds a categorical column with the source of the rows, e.g. the
+        account of an export. All chunks share the same categories, so they
+        can be concatenated without converting the column.
 
         Args:
             dataframe: Dataframe to be processed.
-            exclude_data: Json file that specifies the excluded data.
+            column: Name of the new column.
+            source: Source of all rows of the dataframe.
+            sources: All sources.
 
         Returns:
             The processed dataframe.
         """
-        for column in exclude_data:
-            for excluded_position in exclude_data[column]:
-                dataframe = \
-                    dataframe[dataframe[column] != excluded_position]
+        dataframe[column] = pd.Categorical.from_codes(
+            np.full(len(dataframe), sources.index(source)),
+            categories=sources
+            )
         return dataframe
 
     @staticmethod
-    def convert_column_to_datetime(dataframe: pd.DataFrame,
-                                   column: str
-                                   ) -> pd.DataFrame:
-        """Converts the column to dataframe format.
+    def remove_entries_outside_date_range(dataframe: pd.DataFrame,
+                                          column: str,
+                                          start: str = None,
+                                          end: str = None
+                                          ) -> pd.DataFrame:
+        """Removes the rows dated before the start or after the end of a date
+        range.
 
         Args:
             dataframe: Dataframe to be processed.
-            column: Column to be prcoessed.
+            column: Column containing the day numbers.
+            start: First day of the range, e.g. "2021-03-01". None keeps all
+                rows before the end.
+            end: Last day of the range. None keeps all rows after the start.
 
         Returns:
             The processed dataframe.
         """
-        dataframe[column] = pd.to_datetime(dataframe[column], dayfirst=True)
-        return dataframe
+        days = dataframe[column].to_numpy()
+        in_range = np.ones(len(dataframe), dtype=bool)
+        if start is not None:
+            in_range &= days >= Dataframe_processor.get_day_number(start)
+        if end is not None:
+            in_range &= days <= Dataframe_processor.get_day_number(end)
+        if in_range.all():
+            return dataframe
+        return dataframe[in_range]
 
     @staticmethod
     def split_dataframes_according_to_months(dataframe: pd.DataFrame,
                                              cfg: dict,
-                                             date_column: str
-                                             ) -> None:
+                                             date_column: str,
+                                             row_offsets: dict = None
+                                             ) -> dict:
         """Splits the dataframe in 12 dataframes, one for each month.
 
         Args:
             dataframe: Dataframe to be splitted.
             cfg: Config file.
-            date_column: Column that contains the dates of the expenses.
+            date_column: Column that contains the day numbers of the
+                expenses.
+            row_offsets: Dict mapping each month to the number of its
+                expenses in the previous chunks, the rows of each month are
+                numbered on from there. It is updated in place, so the rows
+                of a streamed account history are numbered as if it was
+                split at once.
+
+        Returns:
+            Dict mapping each month to the dataframe of its expenses.
         """
-        for index, month in enumerate(MONTHS_STR_NR):
-            last_day_of_month = str(
-                calendar.monthrange(cfg["year"], index+1)[1]
-                )
-            start_date = f'{cfg["year"]}-{month}-01'
-            end_date = f'{cfg["year"]}-{month}-{last_day_of_month}'
-            mask = (dataframe[date_column] >= start_date) & \
-                (dataframe[date_column] <= end_date)
-            month_df = dataframe.loc[mask]
-            output_path = cfg["base_dir"] + "/" + MONTHS[index] + \
-                "/" + "month_all.csv"
-            month_df.to_csv(output_path, sep=';')
-
-    @staticmethod
-    def extract_rows_to_new_df(dataframe: pd.DataFrame,
-                               identifiers: list[str],
-                               column: str
-                               ) -> pd.DataFrame:
-        """Extracts rows (identified via the identifiers) and copies them to
-        a newly created dataframe.
+        years, months = Dataframe_processor.get_years_and_months(
+            dataframe,
+            date_column
+            )
+        in_year = years == cfg["year"]
+        year_df = dataframe[in_year]
+        groups = dict(list(year_df.groupby(months[in_year])))
+        month_dfs = {}
+        for index, month in enumerate(MONTHS):
+            month_df = groups.get(index+1, year_df.iloc[0:0])
+            offset = 0 if row_offsets is None else row_offsets.get(month, 0)
+            month_df.index = pd.RangeIndex(offset, offset + len(month_df))
+            if row_offsets is not None:
+                row_offsets[month] = offset + len(month_df)
+            month_dfs[month] = month_df
+        return month_dfs
+
+    @staticmethod
+    def split_dataframe_into_positions(dataframe: pd.DataFrame,
+                                       positions: list[str],
+                                       column: str
+                                       ) -> dict:
+        """Splits the dataframe into one dataframe per position.
+
+        Args:
+            dataframe: The categorized bank account dataframe.
+            positions: Positions for which a dataframe is created.
+            column: The column containing the position of each row.
+
+        Returns:
+            Dict mapping each position to the dataframe of its
+            expenditures. Positions without expenditures get an empty
+            dataframe.
+        """
+        groups = dict(list(dataframe.groupby(column, sort=False,
+                                             observed=True)))
+        empty_df = dataframe.iloc[0:0]
+        return {
+            position: groups.get(position, empty_df).drop(columns=column)
+            for position in positions
+            }
+
+    @staticmethod
+    def aggregate_positions_per_month(dataframe: pd.DataFrame,
+                                      cfg: dict,
+                                      positions: list[str],
+                                      position_column: str
+                                      ) -> tuple:
+        """Sums up and counts the expenditures of each position and month of
+        the year in a single pass.
 
         Args:
-            dataframe: The bank account dataframe.
-            identifiers: list of strings identifying the rows.
-            column: The column name to look at.
+            dataframe: The categorized bank account dataframe.
+            cfg: Config file.
+            positions: Positions to be aggregated.
+            position_column: The column containing the position of each row.
 
         Returns:
-            The dataframe containing the expenditures.
+            Tuple of the summed up expenditures and the number of
+            expenditures, both as dataframe with one row per position and one
+            column per month.
         """
-        position_df = dataframe[dataframe[column].str.contains('|'.join(
-            identifiers),
-            na=False
-            )]
-        return position_df
+        return Dataframe_processor.aggregate_positions_per_year_and_month(
+            dataframe,
+            cfg,
+            [cfg["year"]],
+            positions,
+            position_column
+            )[cfg["year"]]
 
     @staticmethod
-    def remove_rows(dataframe: pd.DataFrame,
-                    column: str,
-                    strings_in_row: list[str]
-                    ) -> pd.DataFrame:
-        """Removes the rows of the dataframe containing a certain string
+    def aggregate_positions_per_year_and_month(dataframe: pd.DataFrame,
+                                               cfg: dict,
+                                               years: list[int],
+                                               positions: list[str],
+                                               position_column: str
+                                               ) -> dict:
+        """Sums up and counts the expenditures of each position and month of
+        several years in a single pass.
 
         Args:
-            dataframe: Dataframe to be processed
-            column: Column that possibiliy contains the values to be removed.
-            strings_in_row: String that will be checked if it is in the column
+            dataframe: The categorized bank account dataframe.
+            cfg: Config file.
+            years: Years to be aggregated.
+            positions: Positions to be aggregated.
+            position_column: The column containing the position of each row.
 
         Returns:
-            Dataframe without rows containing the strings
+            Dict mapping each year to a tuple of the summed up expenditures
+            and the number of expenditures, both as dataframe with one row
+            per position and one column per month.
         """
-        df_new = dataframe[dataframe[column].str.contains(
-            '|'.join(strings_in_row)
-            ) == False]
-        return df_new
+        row_years, row_months = Dataframe_processor.get_years_and_months(
+            dataframe,
+            cfg["column_date"]
+            )
+        in_years = np.isin(row_years, years)
+        year_df = dataframe[in_years]
+        grouped = year_df.groupby([
+            pd.Series(row_years[in_years], index=year_df.index, name="year"),
+            pd.Series(row_months[in_years], index=year_df.index,
+                      name="month"),
+            position_column
+            ], observed=True)[cfg["column_name_value"]].agg(["sum", "count"])
+        year_level = grouped.index.get_level_values("year")
+        aggregates = {}
+        for year in years:
+            year_grouped = grouped[year_level == year].droplevel("year")
+            aggregate_dfs = []
+            for column in ["sum", "count"]:
+                aggregate_df = year_grouped[column].unstack(
+                    level="month",
+                    fill_value=0
+                    )
+                aggregate_df = aggregate_df.reindex(
+                    index=positions,
+                    columns=range(1, 13),
+                    fill_value=0
+                    ).astype('int64')
+                aggregate_df.columns = MONTHS
+                aggregate_dfs.append(aggregate_df)
+            aggregates[year] = tuple(aggregate_dfs)
+        return aggregates
 
     @staticmethod
-    def add_value_to_df(dataframe: pd.DataFrame,
-                        position: str,
-                        column: str,
-                        value: int
-                        ) -> pd.DataFrame:
-        """Adds the value to the column at index specified by position
+    def add_external_positions(sum_df: pd.DataFrame,
+                               count_df: pd.DataFrame,
+                               cfg: dict
+                               ) -> tuple:
+        """Adds the external positions of each month in the config, e.g.
+        expenses from other bank accounts, to the aggregates.
+
         Args:
-            dataframe: Overview dataframe.
-            position: Position/class of the expenditures.
-            column: Column to be changed.
-            value: Value of the entry.
+            sum_df: Summed up expenditures in cents (positions x months).
+            count_df: Number of expenditures (positions x months).
+            cfg: Config file.
+
         Returns:
-            The updated Overview dataframe.
+            Tuple of the extended sum and count dataframes. Months without
+            an external position have a sum and count of 0 for it.
         """
-        index = dataframe.index[dataframe["Position"] == position].tolist()[0]
-        dataframe.loc[index, column] = value
-        return dataframe
+        external_positions = [cfg[month]["external positions"]
+                              for month in MONTHS]
+        names = list(dict.fromkeys(
+            name for month_positions in external_positions
+            for name in month_positions
+            ))
+        values = np.array(
+            [[month_positions.get(name, 0)
+              for month_positions in external_positions] for name in names],
+            dtype=float
+            ).reshape(len(names), len(MONTHS))
+        counts = np.array(
+            [[int(name in month_positions)
+              for month_positions in external_positions] for name in names],
+            dtype='int64'
+            ).reshape(len(names), len(MONTHS))
+        external_sum_df = pd.DataFrame(
+            np.round(values * 100).astype('int64'),
+            index=names,
+            columns=MONTHS
+            )
+        external_count_df = pd.DataFrame(counts, index=names, columns=MONTHS)
+        return (pd.concat([sum_df, external_sum_df]),
+                pd.concat([count_df, external_count_df]))
 
     @staticmethod
     def make_values_absolut(dataframe: pd.DataFrame,
@@ -195,10 +429,26 @@ class Dataframe_processor:
         Returns:
             The processed dataframe.
         """
-        dataframe[column] = dataframe[column].astype('int')
         dataframe[column] = dataframe[column].abs()
         return dataframe
 
+    @staticmethod
+    def convert_cents_to_whole_euros(dataframe: pd.DataFrame,
+                                     column: str
+                                     ) -> pd.DataFrame:
+        """Converts a column of positive integer cents to whole Euro, the
+        cents are cut off.
+
+        Args:
+            dataframe: Dataframe to be processed.
+            column: Column to be processed.
+
+        Returns:
+            The processed dataframe.
+        """
+        dataframe[column] = dataframe[column] // 100
+        return dataframe
+
     @staticmethod
     def sum_columns(dataframe: pd.DataFrame) -> pd.DataFrame:
         """Sums up the values of all columns.
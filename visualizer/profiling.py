@@ -0,0 +1,143 @@
+# Class for profiling the stages of the visualization pipeline
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def get_peak_rss() -> float:
+    """Returns the peak resident set size of the process so far.
+
+    Returns:
+        The peak RSS in MB or None if it can not be determined.
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak_rss / 1024 ** 2
+    return peak_rss / 1024
+
+
+class Profiler:
+
+    def __init__(self, enabled: bool = False, cprofile_stage: str = None
+                 ) -> None:
+        """Inits the profiler.
+
+        Args:
+            enabled: Records the stages. If disabled, the stages are run
+                without any overhead.
+            cprofile_stage: Name of a stage that is additionally profiled with
+                cProfile.
+        """
+        self.enabled = enabled
+        self.cprofile_stage = cprofile_stage
+        self.cprofile = cProfile.Profile() if cprofile_stage else None
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measures a stage of the pipeline. Stages running several times,
+        e.g. once per chunk, are summed up.
+
+        Args:
+            name: Name of the stage.
+
+        Yields:
+            Dict in which the number of processed rows can be stored under
+            the key "rows".
+        """
+        stats = {}
+        if not self.enabled:
+            yield stats
+            return
+        profile = name == self.cprofile_stage
+        if profile:
+            self.cprofile.enable()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stats
+        finally:
+            cpu_time = time.process_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            if profile:
+                self.cprofile.disable()
+            record = self.stages.setdefault(name, {
+                "calls": 0,
+                "wall_time_s": 0.0,
+                "cpu_time_s": 0.0,
+                "rows": None,
+                })
+            record["calls"] += 1
+            record["wall_time_s"] += wall_time
+            record["cpu_time_s"] += cpu_time
+            record["peak_rss_mb"] = get_peak_rss()
+            if "rows" in stats:
+                record["rows"] = (record["rows"] or 0) + stats["rows"]
+
+    def iterate(self, name: str, iterable):
+        """Measures the production of each item of an iterable, e.g. the
+        lazy loading of the chunks of a csv file, as a stage.
+
+        Args:
+            name: Name of the stage.
+            iterable: Iterable over dataframes.
+
+        Yields:
+            The items of the iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as stats:
+                item = next(iterator, None)
+                if item is not None:
+                    stats["rows"] = len(item)
+            if item is None:
+                return
+            yield item
+
+    def create_summary(self) -> str:
+        """Creates a text table of the recorded stages.
+
+        Returns:
+            The summary.
+        """
+        lines = [f"{'stage':<40}{'calls':>6}{'wall [s]':>10}{'cpu [s]':>10}"
+                 f"{'peak RSS [MB]':>15}{'rows':>10}"]
+        for name, record in self.stages.items():
+            peak_rss = record["peak_rss_mb"]
+            rows = record["rows"]
+            lines.append(
+                f"{name:<40}{record['calls']:>6}"
+                f"{record['wall_time_s']:>10.3f}{record['cpu_time_s']:>10.3f}"
+                f"{'-' if peak_rss is None else f'{peak_rss:.1f}':>15}"
+                f"{'-' if rows is None else rows:>10}"
+                )
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Saves the report as json file and the summary as text file next to
+        it. If a stage was profiled with cProfile, its stats are dumped as
+        well.
+
+        Args:
+            path: Path of the json file, e.g. "results/profile.json".
+        """
+        if not self.enabled:
+            return
+        with open(path, "w") as json_file:
+            json.dump(self.stages, json_file, indent=4)
+        summary = self.create_summary()
+        with open(path.rsplit(".", 1)[0] + ".txt", "w") as txt_file:
+            txt_file.write(summary + "\n")
+        print(summary)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path.rsplit(".", 1)[0] + ".prof")
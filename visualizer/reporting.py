@@ -0,0 +1,408 @@
+# Class for writing all overviews and charts into a single html file
+import html
+import json
+import pandas as pd
+from visualizer.const import MONTHS
+
+# Page of the report, the data is embedded as json and drawn as svg by the
+# inline script, so the report needs neither matplotlib nor any library in
+# the browser
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+<style>
+body { font-family: sans-serif; margin: 1em 2em; color: #222; }
+h2 { border-bottom: 1px solid #ccc; padding-bottom: 0.2em; }
+section { margin-bottom: 2em; }
+.months { display: grid; gap: 1.5em;
+          grid-template-columns: repeat(auto-fill, minmax(640px, 1fr)); }
+.charts { display: flex; flex-wrap: wrap; gap: 1em; align-items: flex-start; }
+svg { max-width: 100%; height: auto; font-size: 12px; }
+svg .grid { stroke: #ddd; }
+svg .axis { stroke: #444; }
+table { border-collapse: collapse; font-size: 13px; margin-top: 0.5em; }
+th, td { padding: 2px 8px; text-align: right; border-bottom: 1px solid #eee; }
+th:first-child, td:first-child { text-align: left; }
+tr.total td { font-weight: bold; border-top: 1px solid #888; }
+.empty { color: #888; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<p><label>Year <select id="year"></select></label></p>
+<div id="years"></div>
+<div id="content"></div>
+<script id="report-data" type="application/json">__DATA__</script>
+<script>
+"use strict";
+const DATA = JSON.parse(document.getElementById("report-data").textContent);
+// default color cycle of matplotlib
+const COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"];
+
+function esc(value) {
+  return String(value).replace(/[&<>"]/g, c =>
+    ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})[c]);
+}
+function color(index) { return COLORS[index % COLORS.length]; }
+function fmt(value) { return Math.round(value).toLocaleString(); }
+function sum(values) { return values.reduce((a, b) => a + b, 0); }
+function text(x, y, content, attrs) {
+  return `<text x="${x}" y="${y}" ${attrs || ""}>${esc(content)}</text>`;
+}
+function svg(width, height, body, title) {
+  return `<svg viewBox="0 0 ${width} ${height}" width="${width}" ` +
+    `height="${height}">` +
+    (title ? text(width / 2, 18, title,
+                  'text-anchor="middle" font-weight="bold"') : "") +
+    body + "</svg>";
+}
+function tip(label, value) {
+  return `<title>${esc(label)}: ${fmt(value)} \\u20ac</title>`;
+}
+
+// y axis from 0 to a round value above max, returns the scale and markup
+function axis(max, left, top, width, height) {
+  const raw = Math.max(max, 1) / 5;
+  const magnitude = Math.pow(10, Math.floor(Math.log10(raw)));
+  const step = [1, 2, 5, 10].find(f => f * magnitude >= raw) * magnitude;
+  const end = Math.ceil(Math.max(max, 1) / step) * step;
+  const scale = value => top + height - Math.max(value, 0) / end * height;
+  let out = "";
+  for (let value = 0; value <= end + step / 2; value += step) {
+    const y = scale(value);
+    out += `<line class="grid" x1="${left}" x2="${left + width}" ` +
+      `y1="${y}" y2="${y}"/>` +
+      text(left - 6, y + 4, fmt(value), 'text-anchor="end"');
+  }
+  out += `<line class="axis" x1="${left}" x2="${left}" y1="${top}" ` +
+    `y2="${top + height}"/>`;
+  return [scale, out];
+}
+
+function legend(names, x, y) {
+  return names.map((name, i) =>
+    `<rect x="${x}" y="${y + i * 18}" width="12" height="12" ` +
+    `fill="${color(i)}"/>` + text(x + 18, y + i * 18 + 10, name)).join("");
+}
+
+function xLabels(labels, left, step, y) {
+  return labels.map((label, i) =>
+    text(left + (i + 0.5) * step, y, label, 'text-anchor="middle"')).join("");
+}
+
+// horizontal bars with their values, one per position
+function barChart(names, values, title) {
+  const rowHeight = 22, left = 170, barWidth = 400, top = 30;
+  const max = Math.max(1, ...values);
+  let body = "";
+  names.forEach((name, i) => {
+    const y = top + i * rowHeight;
+    const width = Math.max(values[i], 0) / max * barWidth;
+    body += text(left - 8, y + 15, name, 'text-anchor="end"') +
+      `<rect x="${left}" y="${y + 3}" width="${width}" ` +
+      `height="${rowHeight - 6}" fill="${color(i)}">` +
+      tip(name, values[i]) + "</rect>" +
+      text(left + width + 4, y + 15, fmt(values[i]));
+  });
+  return svg(left + barWidth + 70, top + names.length * rowHeight + 10,
+             body, title);
+}
+
+// pie with the share of each position in percent
+function pieChart(names, values, title) {
+  const total = sum(values.map(value => Math.max(value, 0)));
+  if (total <= 0) return '<p class="empty">No expenditures</p>';
+  const radius = 120, cx = 140, cy = 160;
+  let angle = -Math.PI / 2, body = "";
+  names.forEach((name, i) => {
+    const share = Math.max(values[i], 0) / total;
+    if (share <= 0) return;
+    const end = angle + share * 2 * Math.PI;
+    const point = a =>
+      `${cx + radius * Math.cos(a)} ${cy + radius * Math.sin(a)}`;
+    const shape = share > 0.9999 ?
+      `<circle cx="${cx}" cy="${cy}" r="${radius}" fill="${color(i)}">` +
+        tip(name, values[i]) + "</circle>" :
+      `<path d="M ${cx} ${cy} L ${point(angle)} A ${radius} ${radius} 0 ` +
+        `${share > 0.5 ? 1 : 0} 1 ${point(end)} Z" fill="${color(i)}" ` +
+        `stroke="#fff">` + tip(name, values[i]) + "</path>";
+    body += shape;
+    if (share >= 0.03) {
+      const middle = (angle + end) / 2;
+      body += text(cx + 0.7 * radius * Math.cos(middle),
+                   cy + 0.7 * radius * Math.sin(middle) + 4,
+                   `${(share * 100).toFixed(1)}%`, 'text-anchor="middle"');
+    }
+    angle = end;
+  });
+  body += legend(names, 2 * cx + 10, 40);
+  return svg(2 * cx + 190, Math.max(2 * cy, 50 + 18 * names.length),
+             body, title);
+}
+
+// one line per series over the labels, values[label][series]
+function lineChart(series, labels, values, title) {
+  const left = 70, top = 30, width = 560, height = 300;
+  const step = width / labels.length;
+  const [scale, grid] = axis(Math.max(0, ...values.flat()), left, top,
+                             width, height);
+  let body = grid + xLabels(labels, left, step, top + height + 16);
+  series.forEach((name, s) => {
+    const points = values.map((row, i) =>
+      [left + (i + 0.5) * step, scale(row[s])]);
+    body += `<polyline fill="none" stroke="${color(s)}" stroke-width="2" ` +
+      `points="${points.map(p => p.join(",")).join(" ")}"/>` +
+      points.map(([x, y], i) =>
+        `<circle cx="${x}" cy="${y}" r="3" fill="${color(s)}">` +
+        tip(`${name} ${labels[i]}`, values[i][s]) + "</circle>").join("");
+  });
+  body += legend(series, left + width + 20, top);
+  return svg(left + width + 200,
+             Math.max(top + height + 30, top + 18 * series.length),
+             body, title);
+}
+
+// stacked positions per month with the income and the money left
+function stackedBarChart(series, labels, values, income, title) {
+  const left = 70, top = 30, width = 620, height = 360;
+  const step = width / labels.length, barWidth = step * 0.6;
+  const totals = values.map(row => sum(row.map(v => Math.max(v, 0))));
+  const [scale, grid] = axis(Math.max(...totals, ...income) * 1.08, left,
+                             top, width, height);
+  let body = grid + xLabels(labels, left, step, top + height + 16);
+  values.forEach((row, i) => {
+    const x = left + (i + 0.5) * step;
+    let base = 0;
+    row.forEach((value, s) => {
+      if (value <= 0) return;
+      body += `<rect x="${x - barWidth / 2}" y="${scale(base + value)}" ` +
+        `width="${barWidth}" height="${scale(base) - scale(base + value)}" ` +
+        `fill="${color(s)}">` + tip(`${series[s]} ${labels[i]}`, value) +
+        "</rect>";
+      base += value;
+    });
+    const y = scale(income[i]);
+    body += `<path d="M ${x - 5} ${y - 5} L ${x + 5} ${y + 5} M ${x - 5} ` +
+      `${y + 5} L ${x + 5} ${y - 5}" stroke="#000" stroke-width="2"/>` +
+      text(x, scale(totals[i]) - 4, fmt(totals[i]),
+           'text-anchor="middle" fill="#d62728" font-weight="bold"') +
+      text(x, y - 8, fmt(income[i]),
+           'text-anchor="middle" fill="#2ca02c" font-weight="bold"') +
+      text(x, y + 18, fmt(income[i] - totals[i]),
+           'text-anchor="middle" fill="#1f77b4" font-weight="bold"');
+  });
+  body += legend(series, left + width + 20, top);
+  return svg(left + width + 200,
+             Math.max(top + height + 30, top + 18 * series.length),
+             body, title);
+}
+
+// bars of each series side by side per group, values[series][group]
+function groupedBarChart(series, groups, values, title) {
+  const left = 70, top = 30, height = 300;
+  const step = Math.max(60, 20 * series.length + 20);
+  const width = step * groups.length, barWidth = (step - 20) / series.length;
+  const [scale, grid] = axis(Math.max(0, ...values.flat()), left, top,
+                             width, height);
+  let body = grid;
+  groups.forEach((group, g) => {
+    series.forEach((name, s) => {
+      const x = left + g * step + 10 + s * barWidth;
+      const y = scale(values[s][g]);
+      body += `<rect x="${x}" y="${y}" width="${barWidth}" ` +
+        `height="${top + height - y}" fill="${color(s)}">` +
+        tip(`${name} ${group}`, values[s][g]) + "</rect>";
+    });
+    body += text(left + (g + 0.5) * step, top + height + 14, group,
+                 `text-anchor="end" transform="rotate(-35 ` +
+                 `${left + (g + 0.5) * step} ${top + height + 14})"`);
+  });
+  body += legend(series, left + width + 20, top);
+  return svg(left + width + 120, top + height + 130, body, title);
+}
+
+function table(headers, rows, total) {
+  const cells = (row, tag) =>
+    row.map(v => `<${tag}>${typeof v === "number" ? fmt(v) : esc(v)}` +
+                 `</${tag}>`).join("");
+  return "<table><tr>" + cells(headers, "th") + "</tr>" +
+    rows.map((row, i) => `<tr${total && i === rows.length - 1 ?
+                           ' class="total"' : ""}>` + cells(row, "td") +
+                         "</tr>").join("") + "</table>";
+}
+
+function renderYear(year) {
+  const names = year.positions.map(i => DATA.names[i]);
+  const left = year.income.map((income, i) => income - year.totals[i]);
+  let out = `<section><h2>Expenses ${esc(year.year)}</h2>` +
+    stackedBarChart(names, DATA.months, year.sums, year.income,
+                    String(year.year)) +
+    lineChart(names, DATA.months, year.sums, String(year.year)) +
+    table(["Month", ...names, "Total", "Income", "Left"],
+          DATA.months.map((month, i) => [month, ...year.sums[i],
+            year.totals[i], year.income[i], left[i]])) + "</section>";
+  out += '<section class="months">';
+  year.months.forEach((month, i) => {
+    const names = month.positions.map(p => DATA.names[p]);
+    const title = `Expenses ${DATA.months[i]}`;
+    out += `<div><h3>${esc(title)} ${esc(year.year)}</h3>` +
+      '<div class="charts">' + barChart(names, month.sums, title) +
+      pieChart(names, month.sums, title) + "</div>" +
+      table(["Position", "Sum", "counts"],
+            names.map((name, p) => [name, month.sums[p], month.counts[p]])
+              .concat([["Sum", sum(month.sums), sum(month.counts)]]),
+            true) + "</div>";
+  });
+  return out + "</section>";
+}
+
+// comparison of the years of a multi-year run
+function renderYears() {
+  if (DATA.years.length < 2) return "";
+  const years = DATA.years.map(year => String(year.year));
+  const names = [...new Set(DATA.years.flatMap(year => year.positions))]
+    .map(i => DATA.names[i]);
+  const values = DATA.years.map(year => names.map(name => {
+    const p = year.positions.findIndex(i => DATA.names[i] === name);
+    return p < 0 ? 0 : sum(year.sums.map(row => row[p]));
+  }));
+  const title = `${years[0]} - ${years[years.length - 1]}`;
+  return `<section><h2>Expenses ${esc(title)}</h2>` +
+    groupedBarChart(years, names, values, title) +
+    lineChart(years, DATA.months,
+              DATA.months.map((_, m) => DATA.years.map(y => y.totals[m])),
+              title) + "</section>";
+}
+
+const select = document.getElementById("year");
+select.innerHTML = DATA.years.map((year, i) =>
+  `<option value="${i}">${esc(year.year)}</option>`).join("");
+select.value = DATA.years.length - 1;
+select.onchange = () => {
+  document.getElementById("content").innerHTML =
+    renderYear(DATA.years[select.value]);
+};
+document.getElementById("years").innerHTML = renderYears();
+select.onchange();
+</script>
+</body>
+</html>
+"""
+
+
+class Html_reporter:
+
+    def __init__(self, title: str) -> None:
+        """Init the reporter class.
+
+        The overviews of the months and years are collected and saved as a
+        single html file, in which they are drawn as svg charts by an inline
+        script: a bar and a pie chart of each month, a stacked bar chart
+        with the income and a line chart of each year and, for several
+        years, a comparison of the years.
+
+        Args:
+            title: Title of the report.
+        """
+        self.title = title
+        # position names, referenced by their index in the data
+        self.names = []
+        self.years = {}
+
+    def get_name_indices(self, names: list) -> list[int]:
+        """Returns the indices of position names in the data, adding new
+        names.
+
+        Args:
+            names: The position names.
+
+        Returns:
+            List of the indices.
+        """
+        indices = []
+        for name in names:
+            if name not in self.names:
+                self.names.append(name)
+            indices.append(self.names.index(name))
+        return indices
+
+    def get_year(self, year: int) -> dict:
+        """Returns the data of a year, adding it if it is new.
+
+        Args:
+            year: The year.
+
+        Returns:
+            Dict containing the data of the year.
+        """
+        return self.years.setdefault(
+            year,
+            {"year": year, "months": [None] * len(MONTHS)}
+            )
+
+    def add_month(self, year: int, month: str,
+                  overview_df: pd.DataFrame) -> None:
+        """Adds the overview of a month.
+
+        Args:
+            year: The year of the month.
+            month: The month.
+            overview_df: Overview of the month, containing the "Sum" and
+                the "counts" of each position.
+        """
+        self.get_year(year)["months"][MONTHS.index(month)] = {
+            "positions": self.get_name_indices(overview_df.index),
+            "sums": overview_df["Sum"].to_numpy().tolist(),
+            "counts": overview_df["counts"].to_numpy().tolist()
+            }
+
+    def add_year(self, year: int,
+                 overview_year_df: pd.DataFrame,
+                 income_df: pd.DataFrame
+                 ) -> None:
+        """Adds the overview of a year.
+
+        Args:
+            year: The year.
+            overview_year_df: Overview of the year, with the expenditures of
+                each month (rows) and position (columns) and their "Total".
+            income_df: Dataframe containing the monthly "Income".
+        """
+        positions_df = overview_year_df.drop(columns=["Total"])
+        self.get_year(year).update({
+            "positions": self.get_name_indices(positions_df.columns),
+            "sums": positions_df.to_numpy().tolist(),
+            "totals": overview_year_df["Total"].to_numpy().tolist(),
+            "income": income_df["Income"].to_numpy().tolist()
+            })
+
+    def create_html(self) -> str:
+        """Creates the page of the report with the embedded data.
+
+        Returns:
+            The html page.
+        """
+        data = {
+            "months": MONTHS,
+            "names": self.names,
+            "years": [self.years[year] for year in sorted(self.years)]
+            }
+        # "</" must not end the script element the data is embedded in
+        data_json = json.dumps(data, separators=(",", ":"),
+                               default=str).replace("</", "<\\/")
+        return HTML_TEMPLATE.replace(
+            "__TITLE__", html.escape(self.title)
+            ).replace("__DATA__", data_json)
+
+    def save(self, path: str) -> None:
+        """Saves the report.
+
+        Args:
+            path: Path of the html file.
+        """
+        with open(path, "w", encoding="utf-8") as html_file:
+            html_file.write(self.create_html())
@@ -0,0 +1,384 @@
+# Class for serving the overviews, expenditures and charts over a local
+# read-only HTTP interface
+import asyncio
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+import pandas as pd
+from visualizer.categorizing import Categorizer
+from visualizer.const import MONTHS, POSITION_COLUMN
+from visualizer.fingerprinting import Fingerprints
+from visualizer.loading import Loader
+from visualizer.plotting import Month_Plotter, Year_Plotter
+from visualizer.processing import Dataframe_processor
+from visualizer.utils import create_year_configs, load_config
+from visualizer.visualize import (aggregate_account_history,
+                                  create_aggregates, create_euro_aggregates,
+                                  create_month_overview, create_year_overview,
+                                  load_clean_account_history)
+
+# Content types of the chart formats that can be requested
+CHART_FORMATS = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+    }
+# Print methods of the plotters for each chart name
+MONTH_CHARTS = {"bar": "print_bar_chart", "pie": "print_pie_chart"}
+YEAR_CHARTS = {"line": "print_line_chart", "bar": "print_stacked_bar_chart"}
+
+
+class Query_server:
+
+    def __init__(self, config_path: str,
+                 host: str = "127.0.0.1",
+                 port: int = 8000,
+                 chart_cache_size: int = 32
+                 ) -> None:
+        """Loads the account history and its aggregates once, all queries
+        are answered from memory.
+
+        Args:
+            config_path: Path to config file.
+            host: Address the server is bound to, only the local host by
+                default.
+            port: Port the server listens on.
+            chart_cache_size: Number of rendered charts kept in memory.
+        """
+        self.host = host
+        self.port = port
+        self.cfg = load_config(config_path)
+        self.year_cfgs = create_year_configs(self.cfg)
+        self.chart_cache_size = chart_cache_size
+        self.chart_cache = OrderedDict()
+        # matplotlib is not thread-safe, so charts are rendered one by one
+        self.chart_executor = ThreadPoolExecutor(max_workers=1)
+
+        categorizer = Categorizer(
+            self.cfg["positions"],
+            self.cfg.get("category_memo_dir")
+            )
+        aggregates = create_aggregates(self.cfg, self.year_cfgs)
+        chunks = aggregate_account_history(
+            load_clean_account_history(
+                self.cfg,
+                Loader(self.cfg),
+                Dataframe_processor()
+                ),
+            self.cfg,
+            self.year_cfgs,
+            categorizer,
+            aggregates,
+            {year: Fingerprints(year_cfg)
+             for year, year_cfg in self.year_cfgs.items()},
+            keep_chunks=True
+            )
+        # the expenditures are kept in the compact representation, only the
+        # answered ones are converted to Euro and dates
+        self.transactions_df = Dataframe_processor.concat_dataframes(chunks) \
+            .reset_index(drop=True)
+        self.euro_aggregates = {
+            year: create_euro_aggregates(year_cfg, *aggregates[year])
+            for year, year_cfg in self.year_cfgs.items()
+            }
+
+    def get_month_overview(self, year: int, month: str) -> pd.DataFrame:
+        """Returns the overview of a month.
+
+        Args:
+            year: The year.
+            month: The month, e.g. "Jan".
+
+        Returns:
+            The overview, indexed by the positions.
+        """
+        euro_df, count_df = self.euro_aggregates[year]
+        return create_month_overview(month, euro_df, count_df,
+                                     self.year_cfgs[year])
+
+    def get_year_overview(self, year: int) -> pd.DataFrame:
+        """Returns the overview of a year.
+
+        Args:
+            year: The year.
+
+        Returns:
+            The overview with one row per month.
+        """
+        return create_year_overview(self.year_cfgs[year],
+                                    self.euro_aggregates[year][0])
+
+    def filter_transactions(self, query: dict) -> pd.DataFrame:
+        """Filters the expenditures.
+
+        Args:
+            query: Filters, each optional: "year", "month" (e.g. "Jan"),
+                "position", "merchant" (part of the identifier string, case
+                insensitive), "start" and "end" (first and last day).
+
+        Returns:
+            The matching expenditures.
+        """
+        date_column = self.cfg["column_date"]
+        days = self.transactions_df[date_column].to_numpy()
+        years, months = Dataframe_processor.get_years_and_months(
+            self.transactions_df,
+            date_column
+            )
+        mask = np.ones(len(self.transactions_df), dtype=bool)
+        if "year" in query:
+            mask &= years == int(query["year"])
+        if "month" in query:
+            mask &= months == MONTHS.index(query["month"]) + 1
+        if "position" in query:
+            mask &= (self.transactions_df[POSITION_COLUMN]
+                     == query["position"]).to_numpy()
+        if "merchant" in query:
+            mask &= self.transactions_df[self.cfg["column_name_key"]] \
+                .str.contains(query["merchant"], case=False, regex=False,
+                              na=False).to_numpy(dtype=bool)
+        if "start" in query:
+            mask &= days >= Dataframe_processor.get_day_number(query["start"])
+        if "end" in query:
+            mask &= days <= Dataframe_processor.get_day_number(query["end"])
+        return self.transactions_df[mask]
+
+    def handle_query(self, target: str) -> tuple:
+        """Answers a JSON query.
+
+        Routes:
+            /years: the available years.
+            /overview/<year>: the overview of a year.
+            /overview/<year>/<month>: the overview of a month.
+            /positions/<year>/<month>/<position>: the expenditures of a
+                position in a month.
+            /transactions?year=&month=&position=&merchant=&start=&end=
+                &offset=&limit=: the filtered expenditures, all filters are
+                optional, at most "limit" (default 1000) are returned.
+
+        Args:
+            target: Path and query string of the request.
+
+        Returns:
+            Tuple of the HTTP status, the content type and the body.
+        """
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        query = {key: values[-1]
+                 for key, values in parse_qs(url.query).items()}
+        try:
+            if parts == ["years"]:
+                return json_response({"years": list(self.year_cfgs)})
+            if len(parts) == 2 and parts[0] == "overview":
+                year = int(parts[1])
+                return json_response({
+                    "year": year,
+                    "overview": frame_to_json(
+                        self.get_year_overview(year), "index"
+                        )
+                    })
+            if len(parts) == 3 and parts[0] == "overview":
+                year, month = int(parts[1]), parts[2]
+                overview_df = self.get_month_overview(year, month)
+                return json_response({
+                    "year": year,
+                    "month": month,
+                    "overview": frame_to_json(
+                        Dataframe_processor.sum_columns(overview_df),
+                        "index"
+                        )
+                    })
+            if len(parts) == 4 and parts[0] == "positions":
+                query = {"year": parts[1], "month": parts[2],
+                         "position": parts[3]}
+            elif parts != ["transactions"]:
+                return error_response(HTTPStatus.NOT_FOUND)
+            transactions_df = self.filter_transactions(query)
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 1000))
+            page_df = Dataframe_processor.convert_cents_to_euros(
+                transactions_df.iloc[offset:offset + limit],
+                self.cfg["column_name_value"]
+                )
+            page_df = Dataframe_processor.convert_day_numbers_to_datetime(
+                page_df,
+                self.cfg["column_date"]
+                )
+            return json_response({
+                "count": len(transactions_df),
+                "transactions": frame_to_json(page_df, "records")
+                })
+        except (KeyError, ValueError):
+            return error_response(HTTPStatus.NOT_FOUND)
+
+    def render_chart(self, target: str) -> tuple:
+        """Renders a chart.
+
+        Routes:
+            /charts/<year>/<month>/<bar|pie>.<svg|png|pdf>
+            /charts/<year>/<line|bar>.<svg|png|pdf>
+
+        Args:
+            target: Path of the request.
+
+        Returns:
+            Tuple of the HTTP status, the content type and the body.
+        """
+        parts = [unquote(part)
+                 for part in urlsplit(target).path.split("/") if part]
+        chart, _, chart_format = parts[-1].partition(".")
+        try:
+            year = int(parts[1])
+            if chart_format not in CHART_FORMATS:
+                raise ValueError
+            if len(parts) == 4:
+                month = parts[2]
+                plotter = Month_Plotter(self.get_month_overview(year, month))
+                method = MONTH_CHARTS[chart]
+                title = f"Expenses {month}"
+            elif len(parts) == 3:
+                plotter = Year_Plotter(
+                    self.get_year_overview(year),
+                    Loader(self.year_cfgs[year]).create_income_df_from_config()
+                    )
+                method = YEAR_CHARTS[chart]
+                title = year
+            else:
+                raise ValueError
+        except (KeyError, ValueError):
+            return error_response(HTTPStatus.NOT_FOUND)
+
+        # the plotters save the charts to files, the format is taken from
+        # the file extension
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"chart.{chart_format}")
+            getattr(plotter, method)(path, title)
+            with open(path, "rb") as chart_file:
+                body = chart_file.read()
+        return HTTPStatus.OK, CHART_FORMATS[chart_format], body
+
+    async def get_chart(self, target: str) -> tuple:
+        """Returns a chart from the cache or renders it in the background.
+
+        Args:
+            target: Path of the request.
+
+        Returns:
+            Tuple of the HTTP status, the content type and the body.
+        """
+        path = urlsplit(target).path
+        if path in self.chart_cache:
+            self.chart_cache.move_to_end(path)
+            return self.chart_cache[path]
+        response = await asyncio.get_running_loop().run_in_executor(
+            self.chart_executor,
+            self.render_chart,
+            path
+            )
+        if response[0] == HTTPStatus.OK:
+            self.chart_cache[path] = response
+            if len(self.chart_cache) > self.chart_cache_size:
+                self.chart_cache.popitem(last=False)
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Answers a single HTTP request and closes the connection.
+
+        Args:
+            reader: Stream of the request.
+            writer: Stream of the response.
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            # the headers are not needed
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            method, target, _ = (request_line.split() + ["", "", ""])[:3]
+            try:
+                if method != "GET":
+                    response = error_response(HTTPStatus.METHOD_NOT_ALLOWED)
+                elif target.startswith("/charts/"):
+                    response = await self.get_chart(target)
+                else:
+                    response = self.handle_query(target)
+            except Exception as error:
+                print(f"Query {target} failed: {error!r}")
+                response = error_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+            status, content_type, body = response
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + body
+                )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Serves the queries until cancelled.
+        """
+        server = await asyncio.start_server(
+            self.handle_connection,
+            self.host,
+            self.port
+            )
+        print(f"Serving on http://{self.host}:{self.port}, "
+              "stop with Ctrl+C")
+        async with server:
+            await server.serve_forever()
+
+    def run(self) -> None:
+        """Serves the queries until interrupted with Ctrl+C.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("Stopped serving")
+        finally:
+            self.chart_executor.shutdown()
+
+
+def frame_to_json(dataframe: pd.DataFrame, orient: str):
+    """Converts a dataframe to JSON compatible objects.
+
+    Args:
+        dataframe: Dataframe to be converted.
+        orient: Layout of the objects, see pandas.DataFrame.to_json.
+
+    Returns:
+        The objects.
+    """
+    return json.loads(dataframe.to_json(orient=orient, date_format="iso"))
+
+
+def json_response(content) -> tuple:
+    """Creates a JSON response.
+
+    Args:
+        content: JSON compatible objects.
+
+    Returns:
+        Tuple of the HTTP status, the content type and the body.
+    """
+    return (HTTPStatus.OK, "application/json",
+            json.dumps(content).encode("utf-8"))
+
+
+def error_response(status: HTTPStatus) -> tuple:
+    """Creates a JSON error response.
+
+    Args:
+        status: The HTTP status.
+
+    Returns:
+        Tuple of the HTTP status, the content type and the body.
+    """
+    return (status, "application/json",
+            json.dumps({"error": status.phrase}).encode("utf-8"))
@@ -0,0 +1,134 @@
+# Class for tracking the expenditures of each position against its budget
+# and its own history
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Minimum number of months in the window before spikes are detected
+MIN_MONTHS = 3
+# Lower bound of the standard deviation in Euro the z-scores are computed
+# with, so a flat history (e.g. 0 every month) still detects a spike
+MIN_STD = 1.0
+
+
+class Spending_tracker:
+
+    def __init__(self, cfg: dict, positions: list) -> None:
+        """Inits the rolling statistics of the positions.
+
+        The monthly expenditures of each position are pushed month by month.
+        The sum and the sum of squares of the last months ("anomaly_window",
+        6 by default) are kept, so the rolling mean and standard deviation
+        are updated in constant time per position and month, no matter how
+        long the history is. A month is a spike if its expenditures exceed
+        the mean of the months before by more than "anomaly_threshold"
+        (3 by default) standard deviations, which are at least MIN_STD.
+        Months exceeding the limit of a position in "budgets" are reported
+        as well.
+
+        Args:
+            cfg: Config file.
+            positions: Positions of the pushed expenditures.
+
+        Raises:
+            ValueError: If the window is shorter than MIN_MONTHS.
+        """
+        self.window = cfg.get("anomaly_window", 6)
+        self.threshold = cfg.get("anomaly_threshold", 3.0)
+        if self.window < MIN_MONTHS:
+            raise ValueError(f"anomaly_window must be at least {MIN_MONTHS} "
+                             f"months, got {self.window}")
+        self.positions = list(positions)
+        budgets = cfg.get("budgets") or {}
+        self.limits = np.array([budgets.get(position, np.nan)
+                                for position in self.positions], dtype=float)
+
+        self.history = deque()
+        self.window_sums = np.zeros(len(self.positions))
+        self.window_squares = np.zeros(len(self.positions))
+        self.running_sums = np.zeros(len(self.positions))
+        self.statistics = []
+        self.alerts = []
+
+    def get_mean_and_std(self) -> tuple:
+        """Computes the rolling mean and the sample standard deviation of
+        the months in the window.
+
+        Returns:
+            Tuple of the arrays of the means and standard deviations, NaN
+            while the window contains fewer than MIN_MONTHS months.
+        """
+        count = len(self.history)
+        if count < MIN_MONTHS:
+            nan = np.full(len(self.positions), np.nan)
+            return nan, nan
+        mean = self.window_sums / count
+        variance = (self.window_squares - count * mean ** 2) / (count - 1)
+        # the running sums may leave a tiny negative rest
+        return mean, np.sqrt(np.maximum(variance, 0))
+
+    def push(self, month: str, amounts: np.ndarray) -> None:
+        """Adds the expenditures of the next month and records its
+        statistics and alerts.
+
+        Args:
+            month: Label of the month, e.g. "2022 Jan".
+            amounts: Expenditures of each position in the month.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        mean, std = self.get_mean_and_std()
+        z_scores = (amounts - mean) / np.fmax(std, MIN_STD)
+        self.running_sums += amounts
+        self.statistics.append(pd.DataFrame({
+            "Month": month,
+            "Position": self.positions,
+            "Sum": amounts,
+            "Running sum": self.running_sums.copy(),
+            "Mean": mean,
+            "Std": std,
+            "z-score": z_scores,
+            "Budget": self.limits,
+            }))
+
+        for index in np.flatnonzero(amounts > self.limits):
+            self.alerts.append((month, self.positions[index], "budget",
+                                amounts[index], self.limits[index],
+                                np.nan))
+        for index in np.flatnonzero(z_scores >= self.threshold):
+            self.alerts.append((month, self.positions[index], "spike",
+                                amounts[index], mean[index],
+                                z_scores[index]))
+
+        # slide the window by one month
+        self.history.append(amounts)
+        self.window_sums += amounts
+        self.window_squares += amounts ** 2
+        if len(self.history) > self.window:
+            oldest = self.history.popleft()
+            self.window_sums -= oldest
+            self.window_squares -= oldest ** 2
+
+    def get_statistics(self) -> pd.DataFrame:
+        """Returns the statistics of all pushed months.
+
+        Returns:
+            Dataframe with one row per month and position.
+        """
+        if not self.statistics:
+            return pd.DataFrame(columns=["Month", "Position", "Sum",
+                                         "Running sum", "Mean", "Std",
+                                         "z-score", "Budget"])
+        return pd.concat(self.statistics, ignore_index=True).round(2)
+
+    def get_alerts(self) -> pd.DataFrame:
+        """Returns the alerts of all pushed months.
+
+        Returns:
+            Dataframe with one row per alert, containing the expenditures,
+            the reference (the budget or the rolling mean) and the z-score.
+        """
+        return pd.DataFrame(
+            self.alerts,
+            columns=["Month", "Position", "Alert", "Sum", "Reference",
+                     "z-score"]
+            ).round(2)
@@ -1,5 +1,7 @@
 import pandas as pd
+import glob
 import os
+from pathlib import Path
 import yaml
 
 
@@ -33,6 +35,106 @@ def load_config(path: str) -> dict:
     return cfg
 
 
+def create_year_configs(cfg: dict) -> dict:
+    """Creates the config of each year processed in a run.
+
+    Without a "date_range" in the config, only its "year" is processed. With
+    a date range, each year covered by it gets its own config, whose outputs
+    are stored in base_dir/<year>/. The month blocks (subdir, external
+    positions, income) of a year can be given in a block named after the
+    year, e.g. "2021: {Jan: ...}", otherwise the month blocks of the config
+    are used for every year.
+
+    Args:
+        cfg: Config file.
+
+    Returns:
+        Dict mapping each year to its config.
+    """
+    date_range = cfg.get("date_range")
+    if not date_range:
+        return {cfg["year"]: cfg}
+    first_year = pd.Timestamp(date_range["start"]).year
+    last_year = pd.Timestamp(date_range["end"]).year
+    year_cfgs = {}
+    for year in range(first_year, last_year + 1):
+        year_cfg = dict(cfg)
+        year_cfg.update(cfg.get(year, cfg.get(str(year), {})))
+        year_cfg["year"] = year
+        year_cfg["base_dir"] = f"{cfg['base_dir']}{year}/"
+        year_cfgs[year] = year_cfg
+    return year_cfgs
+
+
+def get_exports(cfg: dict) -> list[dict]:
+    """Lists the exports of the account history.
+
+    "account_year_history" in the config is the path or glob pattern of the
+    exports, or a list of them. Instead of a path, an entry can be a dict
+    with the "path" and optionally the "account" the exports belong to,
+    their "encoding" and the mapping of their "columns" to the column names
+    of the config, e.g. {Datum: Buchungstag}, for exports of other banks.
+
+    If any entry has an account, the exports without one are assigned to
+    an account named after their file.
+
+    Args:
+        cfg: Config file.
+
+    Returns:
+        List of dicts with the "path", "account" (None if no account is
+        configured), "named_account" (False if the account is named after
+        the file), "encoding" and "columns" of each export. Glob patterns
+        are expanded in the order of the file names.
+
+    Raises:
+        FileNotFoundError: If a glob pattern matches no file.
+    """
+    entries = cfg["account_year_history"]
+    if not isinstance(entries, list):
+        entries = [entries]
+    exports = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        paths = [entry["path"]]
+        if any(char in entry["path"] for char in "*?["):
+            paths = sorted(glob.glob(entry["path"]))
+            if not paths:
+                raise FileNotFoundError(
+                    f"No export matches the pattern {entry['path']}"
+                    )
+        for path in paths:
+            exports.append({
+                "path": path,
+                "account": entry.get("account"),
+                "named_account": entry.get("account") is not None,
+                "encoding": entry.get("encoding", "unicode_escape"),
+                "columns": entry.get("columns") or {},
+                })
+    if any(export["account"] for export in exports):
+        for export in exports:
+            export["account"] = export["account"] or Path(export["path"]).stem
+    return exports
+
+
+def get_file_stat(path: str) -> tuple:
+    """Returns the size and modification time of a file.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        Tuple of the size and modification time in ns, None if the file
+        does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
 def extract_expenditures_for_position(account_history_df: pd.DataFrame,
                                       position_identifiers: list[str],
                                       column_key: str
@@ -1,238 +1,1154 @@
-import argparse
-from visualizer.utils import load_config
-from visualizer.plotting import Month_Plotter, Year_Plotter
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from visualizer.utils import create_year_configs, get_exports, load_config
 from visualizer.loading import Loader
 from visualizer.processing import Dataframe_processor
-from visualizer.const import MONTHS
+from visualizer.categorizing import Categorizer
+from visualizer.caching import Cache
+from visualizer.deduplicating import Deduplicator
+from visualizer.excluding import Excluder
+from visualizer.fingerprinting import Fingerprints
+from visualizer.profiling import Profiler
+from visualizer.reporting import Html_reporter
+from visualizer.tracking import Spending_tracker
+from visualizer.writing import Output_writer
+from visualizer.cli import main
+from visualizer.const import (ACCOUNT_COLUMN, CHART_OUTPUTS,
+                              DEFAULT_OUTPUTS, MONTH_COLUMN, MONTHS, OTHERS,
+                              POSITION_COLUMN)
+# the plotting module imports matplotlib, it is only imported by the stages
+# creating charts
+if TYPE_CHECKING:
+    from visualizer.plotting import Chart_renderer
 
 
-def main():
-    """Main function for entry point to execute training pipeline.
-    """
-    parser = argparse.ArgumentParser(
-        prog="visualizer",
-        description="visualizes bank account expenses."
-        )
+def clean_account_history(account_history_df: pd.DataFrame,
+                          cfg: dict,
+                          processor: Dataframe_processor,
+                          profiler: Profiler = None,
+                          exclusion_counts: dict = None
+                          ) -> pd.DataFrame:
+    """Converts the amounts to cents and the dates to day numbers and
+    removes the income and the excluded entries, see Excluder.
 
-    parser.add_argument(
-        "--config",
-        "-c",
-        help="config file",
-        action="store",
-        type=str,
-        default="./configs/example_config.yml",
-    )
-    args = parser.parse_args()
-    print("\n")
-    print(f"Selected pipeline config file: {args.config}")
+    All exclusion rules are combined into a single boolean mask, the
+    remaining entries are copied once.
+
+    Args:
+        account_history_df: The (chunk of the) loaded account history.
+        cfg: Config file.
+        processor: Dataframe processor.
+        profiler: Profiler measuring each processing step.
+        exclusion_counts: Dict the number of entries removed by each rule is
+            added to.
+
+    Returns:
+        The cleaned account history.
+    """
+    profiler = profiler or Profiler()
+    with profiler.stage("convert_column_to_cents") as stats:
+        account_history_df = processor.convert_column_to_cents(
+            account_history_df,
+            cfg["column_name_value"]
+            )
+        stats["rows"] = len(account_history_df)
+    with profiler.stage("convert_column_to_day_numbers") as stats:
+        account_history_df = processor.convert_column_to_day_numbers(
+            account_history_df,
+            cfg["column_date"],
+            cfg.get("date_format")
+            )
+        stats["rows"] = len(account_history_df)
+    with profiler.stage("exclude") as stats:
+        included = Excluder(cfg).select_included(
+            account_history_df,
+            exclusion_counts
+            )
+        if not included.all():
+            account_history_df = account_history_df[included]
+        stats["rows"] = len(account_history_df)
+    return account_history_df
 
-    visualize(config_path=args.config)
 
+def load_clean_export(export: dict,
+                      cfg: dict,
+                      loader: Loader,
+                      processor: Dataframe_processor,
+                      cache: Cache = None,
+                      profiler: Profiler = None,
+                      accounts: list[str] = None,
+                      exclusion_counts: dict = None
+                      ):
+    """Loads and cleans a single export chunk by chunk.
 
-def visualize(config_path: str) -> None:
-    """Starts the visualization procedure.
+    If a cache is provided, the cleaned chunks are taken from the cache or,
+    if the export or the relevant config changed, stored in it together with
+    the number of entries removed by each exclusion rule.
 
     Args:
-        config_path: Path to config file.
-    """
-    # load config
-    cfg = load_config(config_path)
+        export: Settings of the export, see get_exports.
+        cfg: Config file.
+        loader: Loader of the account history.
+        processor: Dataframe processor.
+        cache: Cache of the cleaned exports.
+        profiler: Profiler measuring the loading and each processing step.
+        accounts: All accounts of the config, see tag_account.
+        exclusion_counts: Dict the number of entries of the export removed
+            by each exclusion rule is added to.
 
-    # init classes
-    loader = Loader(cfg)
-    processor = Dataframe_processor()
+    Returns:
+        Iterator over the cleaned chunks of the export.
+    """
+    profiler = profiler or Profiler()
+    path = export["path"]
+    chunks = None
+    if cache is not None:
+        with profiler.stage("hash csv"):
+            key = cache.create_key(path, export)
+        chunks = cache.load_chunks(key)
+        if chunks is not None:
+            chunks = profiler.iterate("load cache", chunks)
+            if exclusion_counts is not None:
+                exclusion_counts.update(cache.load_exclusion_counts(key))
 
-    # create project folders
-    loader.make_dirs()
+    if chunks is None:
+        chunks = profiler.iterate(
+            "load csv",
+            loader.load_dataframe_chunks(
+                path,
+                cfg.get("chunk_size"),
+                export["encoding"],
+                export["columns"]
+                )
+            )
+        if exclusion_counts is None:
+            exclusion_counts = {}
+        chunks = (
+            clean_account_history(chunk, cfg, processor, profiler,
+                                  exclusion_counts)
+            for chunk in chunks
+            )
+        if cache is not None:
+            chunks = cache.store_chunks(key, chunks, exclusion_counts)
+    return (
+        tag_account(chunk, export, accounts or [], processor)
+        for chunk in chunks
+        )
 
-    # create income df
-    income_df = loader.create_income_df_from_config()
 
-    # Create expenses of the year dataframe
-    overview_year_df = loader.create_expenses_year_dataframe()
+def tag_account(account_history_df: pd.DataFrame,
+                export: dict,
+                accounts: list[str],
+                processor: Dataframe_processor
+                ) -> pd.DataFrame:
+    """Adds the account of the export to each expenditure, if accounts are
+    configured.
 
-    # load account history
-    path = cfg["account_year_history"]
-    account_history_df = loader.load_dataframe(path)
+    Args:
+        account_history_df: The (chunk of the) cleaned export.
+        export: Settings of the export, see get_exports.
+        accounts: All accounts of the config.
+        processor: Dataframe processor.
 
-    # preprocess account history
-    column_to_be_processed = cfg["column_name_value"]
-    excluded_data = cfg["exclude_data"]
-    date_column = cfg["column_date"]
-    account_history_df = processor.remove_decimal_points(
-        account_history_df,
-        column_to_be_processed
-        )
-    # remove income
-    account_history_df = processor.remove_positive_entries(
-        account_history_df,
-        column_to_be_processed
-        )
-    account_history_df = processor.remove_entries(
+    Returns:
+        The export with an additional account column.
+    """
+    if export["account"] is None:
+        return account_history_df
+    return processor.add_source_column(
         account_history_df,
-        excluded_data
+        ACCOUNT_COLUMN,
+        export["account"],
+        accounts
         )
-    account_history_df = processor.convert_column_to_datetime(
-        account_history_df,
-        date_column
+
+
+def load_clean_account_history(cfg: dict,
+                               loader: Loader,
+                               processor: Dataframe_processor,
+                               clear_cache: bool = False,
+                               profiler: Profiler = None,
+                               deduplicator: Deduplicator = None,
+                               exclusion_counts: dict = None,
+                               cache_keys: dict = None
+                               ):
+    """Loads and cleans the account history chunk by chunk.
+
+    The account history consists of the exports in "account_year_history",
+    see get_exports, which are loaded in the order of the config. If no
+    chunk size is configured, the exports are loaded in parallel by
+    "load_workers" threads, otherwise one after the other to keep only a
+    chunk in memory. If a "date_range" is configured, only the expenditures
+    within it are kept. If a cache dir is configured, each cleaned export is
+    cached. Expenditures contained in several overlapping exports are only
+    kept once, see create_deduplicator.
+
+    Args:
+        cfg: Config file.
+        loader: Loader of the account history.
+        processor: Dataframe processor.
+        clear_cache: Removes all cache entries before loading.
+        profiler: Profiler measuring the loading and each processing step.
+        deduplicator: Deduplicator of the exports, e.g. to read the exports
+            a second time with the fingerprints of the first time. By
+            default one is created, see create_deduplicator.
+        exclusion_counts: Dict in which the number of entries removed by
+            each exclusion rule is stored for each export path.
+        cache_keys: Cache keys of the exports created before, see Cache.
+
+    Returns:
+        Iterator over the cleaned chunks of the account history.
+    """
+    profiler = profiler or Profiler()
+    exports = get_exports(cfg)
+    deduplicator = deduplicator or create_deduplicator(cfg, exports)
+    if deduplicator is not None:
+        deduplicator.restart()
+    # each export counts its excluded entries in a dict of its own, so the
+    # exports can be loaded in parallel
+    if exclusion_counts is None:
+        exclusion_counts = {}
+    for export in exports:
+        exclusion_counts[export["path"]] = {}
+    accounts = list(dict.fromkeys(
+        export["account"] for export in exports if export["account"]
+        ))
+    cache = Cache(cfg, cache_keys) if cfg.get("cache_dir") else None
+    if cache is not None and clear_cache:
+        cache.clear()
+
+    workers = cfg.get("load_workers", 4)
+    if cfg.get("chunk_size") is None and len(exports) > 1 and workers > 1:
+        # the stages of the threads overlap, so only the whole loading is
+        # measured
+        with profiler.stage("load exports (thread pool)"), \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            export_chunks = list(executor.map(
+                lambda export: list(load_clean_export(
+                    export, cfg, loader, processor, cache, accounts=accounts,
+                    exclusion_counts=exclusion_counts[export["path"]]
+                    )),
+                exports
+                ))
+    else:
+        export_chunks = (
+            load_clean_export(export, cfg, loader, processor, cache,
+                              profiler, accounts,
+                              exclusion_counts[export["path"]])
+            for export in exports
+            )
+    # the exports are deduplicated one after the other in the order of the
+    # config, so the first export containing an expenditure keeps it
+    return (
+        deduplicate_export(
+            restrict_to_date_range(chunk, cfg, processor),
+            export,
+            deduplicator,
+            profiler
+            )
+        for export, chunks in zip(exports, export_chunks)
+        for chunk in chunks
         )
 
-    # split dataframe into monthly dataframes
-    processor.split_dataframes_according_to_months(
+
+def create_deduplicator(cfg: dict,
+                        exports: list[dict] = None
+                        ) -> Deduplicator:
+    """Creates the deduplicator of the exports of the config.
+
+    Args:
+        cfg: Config file.
+        exports: Settings of the exports, see get_exports. By default they
+            are taken from the config.
+
+    Returns:
+        The deduplicator, None if "deduplicate" is disabled or there is a
+        single export and no index dir, so nothing can overlap.
+    """
+    exports = exports if exports is not None else get_exports(cfg)
+    if not cfg.get("deduplicate", True) or \
+            (len(exports) < 2 and cfg.get("dedup_index_dir") is None):
+        return None
+    return Deduplicator(cfg, exports)
+
+
+def deduplicate_export(account_history_df: pd.DataFrame,
+                       export: dict,
+                       deduplicator: Deduplicator = None,
+                       profiler: Profiler = None
+                       ) -> pd.DataFrame:
+    """Removes the expenditures of a chunk of an export that are already
+    contained in another export.
+
+    Args:
+        account_history_df: The (chunk of the) cleaned export.
+        export: Settings of the export, see get_exports.
+        deduplicator: Deduplicator of the exports, None keeps all
+            expenditures.
+        profiler: Profiler measuring the deduplication.
+
+    Returns:
+        The chunk without the duplicates.
+    """
+    if deduplicator is None:
+        return account_history_df
+    profiler = profiler or Profiler()
+    with profiler.stage("deduplicate") as stats:
+        account_history_df = deduplicator.deduplicate(
+            account_history_df,
+            export["path"],
+            export["named_account"]
+            )
+        stats["rows"] = len(account_history_df)
+    return account_history_df
+
+
+def restrict_to_date_range(account_history_df: pd.DataFrame,
+                           cfg: dict,
+                           processor: Dataframe_processor
+                           ) -> pd.DataFrame:
+    """Removes the expenditures outside the "date_range" of the config.
+
+    Args:
+        account_history_df: The (chunk of the) cleaned account history.
+        cfg: Config file.
+        processor: Dataframe processor.
+
+    Returns:
+        The account history within the date range, or unchanged if no date
+        range is configured.
+    """
+    date_range = cfg.get("date_range")
+    if not date_range:
+        return account_history_df
+    return processor.remove_entries_outside_date_range(
         account_history_df,
-        cfg,
-        date_column
+        cfg["column_date"],
+        date_range.get("start"),
+        date_range.get("end")
         )
 
-    # Expenditures for each month
-    for month in MONTHS:
 
-        # Create an empty overview dataset for a month containing only
-        # the summed up expednitures
-        month_overview_df = loader.create_month_overview_dataset()
+def categorize_account_history(account_history_df: pd.DataFrame,
+                               cfg: dict,
+                               categorizer: Categorizer,
+                               profiler: Profiler = None
+                               ) -> pd.DataFrame:
+    """Assigns each expenditure of the cleaned account history to its
+    position.
 
-        # load bank account history for a month
-        path = cfg["base_dir"] + cfg[month]["subdir"] + "month_all.csv"
-        account_month_df = loader.load_dataframe(path)
+    Args:
+        account_history_df: The (chunk of the) cleaned account history.
+        cfg: Config file.
+        categorizer: Categorizer of the positions in the config.
+        profiler: Profiler measuring the categorization.
 
-        column_containing_expenditure_identifiers = cfg["column_name_key"]
-        column_containing_expenditure_values = cfg["column_name_value"]
-        for position in cfg["positions"]:
+    Returns:
+        The account history with an additional position column.
+    """
+    profiler = profiler or Profiler()
+    with profiler.stage("categorize") as stats:
+        account_history_df[POSITION_COLUMN] = categorizer.categorize(
+            account_history_df,
+            cfg["column_name_key"]
+            )
+        stats["rows"] = len(account_history_df)
+    return account_history_df
 
-            # load the identifiers for the position
-            position_identifiers = cfg["positions"][position]
 
-            # copy the entries of of the month bankacount df to a newly created
-            # position df containing only the individual epcenditures
-            position_df = processor.extract_rows_to_new_df(
-                account_month_df,
-                position_identifiers,
-                column_containing_expenditure_identifiers
-                )
+def write_position_datasets(chunks,
+                            year_cfgs: dict,
+                            year_months: dict,
+                            positions: list[str],
+                            writer: Output_writer
+                            ) -> None:
+    """Saves the expenditures of each position and month of each year to
+    disk, see write_position_chunk for the formats.
 
-            # convert entries
-            position_df = processor.convert_column_to_float(
-                position_df,
-                column_containing_expenditure_values
-                )
+    Args:
+        chunks: Iterable over the categorized chunks of the account history.
+        year_cfgs: Dict mapping each year to its config.
+        year_months: Dict mapping each year to the months for which the
+            expenditures are saved.
+        positions: Positions for which the expenditures are saved.
+        writer: Writer saving the files in the background.
+    """
+    year_cfgs = {year: cfg for year, cfg in year_cfgs.items()
+                 if year_months[year]}
+    for cfg in year_cfgs.values():
+        if cfg.get("position_output_format", "csv") == "parquet":
+            shutil.rmtree(cfg["base_dir"] + "positions.parquet",
+                          ignore_errors=True)
 
-            # save dataset to disk
-            path = cfg["base_dir"] + cfg[month]["subdir"] + position + ".csv"
-            position_df.to_csv(path, sep=';')
-
-            # compute number of positions and summed up expenditures
-            number_of_expenditures = len(position_df)
-            total_expenditure = position_df[
-                column_containing_expenditure_values
-                ].sum()
-
-            # Add the positions and summed up expenditures to the month overview df
-            month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                position,
-                "Sum",
-                total_expenditure
-                )
-            month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                position,
-                "counts",
-                number_of_expenditures
+    # every chunk is split into the months of all years at once, so the
+    # account history is only read once
+    # (the rows are numbered on across the chunks, so the datasets do not
+    # depend on the chunk size)
+    empty_df = None
+    month_offsets = {year: {} for year in year_cfgs}
+    file_offsets = {year: 0 for year in year_cfgs}
+    for chunk in chunks:
+        for year, cfg in year_cfgs.items():
+            month_dfs = \
+                Dataframe_processor.split_dataframes_according_to_months(
+                    chunk,
+                    cfg,
+                    cfg["column_date"],
+                    month_offsets[year]
+                    )
+            file_offsets[year] += write_position_chunk(
+                month_dfs,
+                year_months[year],
+                positions,
+                cfg,
+                writer,
+                file_offsets[year]
                 )
+        empty_df = chunk.iloc[0:0]
+
+    # positions without any expenditures in a month get an empty dataset
+    if empty_df is None:
+        return
+    for year, cfg in year_cfgs.items():
+        for month in year_months[year]:
+            month_dir = cfg["base_dir"] + cfg[month]["subdir"]
+            path = month_dir + "month_all.csv"
+            if cfg.get("export_month_data", False) and \
+                    path not in writer.written_paths:
+                writer.write_csv(empty_df, path)
+            if cfg.get("position_output_format", "csv") != "csv":
+                continue
+            for position in positions:
+                path = month_dir + position + ".csv"
+                if path not in writer.written_paths:
+                    writer.write_csv(empty_df.drop(columns=POSITION_COLUMN),
+                                     path)
 
-            # Delete the rows that have be transfered to a position dataframe
-            account_month_df = processor.remove_rows(
-                    account_month_df,
-                    cfg["column_name_key"],
-                    position_identifiers
-                )
 
-        # all expenditures which are not assigned to a class defined in the
-        # config will be added to "Sonstiges" class
-        month_overview_df.loc[len(month_overview_df)] = ["Sonstiges", 0, 0]
+def write_position_chunk(month_dfs: dict,
+                         months: list[str],
+                         positions: list[str],
+                         cfg: dict,
+                         writer: Output_writer,
+                         row_offset: int = 0
+                         ) -> int:
+    """Saves the expenditures of each position and month of a chunk of the
+    account history to disk.
+
+    Depending on "position_output_format" in the config, the expenditures
+    are saved as one csv file per position and month ("csv"), as a single
+    positions.csv with a month and position column ("long_csv") or as
+    positions.parquet partitioned by month ("parquet").
+
+    Args:
+        month_dfs: Dict mapping each month to the expenditures of the chunk.
+        months: Months for which the expenditures are saved.
+        positions: Positions for which the expenditures are saved.
+        cfg: Config file.
+        writer: Writer saving the files in the background.
+        row_offset: Number of rows written to positions.csv by the previous
+            chunks, the rows of this chunk are numbered on from there.
 
-        account_month_df = processor.convert_column_to_float(
+    Returns:
+        Number of rows written to positions.csv or positions.parquet.
+    """
+    output_format = cfg.get("position_output_format", "csv")
+    long_dfs = []
+    for month in months:
+        account_month_df = Dataframe_processor.convert_cents_to_euros(
+            month_dfs[month],
+            cfg["column_name_value"]
+            )
+        account_month_df = \
+            Dataframe_processor.convert_day_numbers_to_datetime(
                 account_month_df,
-                column_containing_expenditure_values
+                cfg["column_date"]
                 )
+        month_dir = cfg["base_dir"] + cfg[month]["subdir"]
+        if cfg.get("export_month_data", False) and len(account_month_df):
+            writer.write_csv(account_month_df, month_dir + "month_all.csv")
 
-        number_of_expenditures = len(account_month_df)
-        total_expenditure = account_month_df[
-            column_containing_expenditure_values
-            ].sum()
+        if output_format != "csv":
+            long_dfs.append(account_month_df[
+                account_month_df[POSITION_COLUMN].notna()
+                ].assign(**{MONTH_COLUMN: month}))
+            continue
 
-        month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                "Sonstiges",
-                "Sum",
-                total_expenditure
-                )
-        month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                "Sonstiges",
-                "counts",
-                number_of_expenditures
-                )
+        # split the month into the individual expenditures of each
+        # position, all expenditures which are not assigned to a position
+        # defined in the config are collected in the "Sonstiges" position
+        position_dfs = Dataframe_processor.split_dataframe_into_positions(
+            account_month_df,
+            positions,
+            POSITION_COLUMN
+            )
+        for position, position_df in position_dfs.items():
+            if len(position_df):
+                path = month_dir + position + ".csv"
+                writer.write_csv(position_df, path)
 
-        path = cfg["base_dir"] + cfg[month]["subdir"] + "Sonstiges.csv"
-        account_month_df.to_csv(path, sep=';')
-
-        # add external expenses, e.g. from other bank accounts
-        for ext_position in cfg[month]["external positions"]:
-            month_overview_df.loc[len(month_overview_df)] = [ext_position, 0, 0]
-            month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                ext_position,
-                "Sum",
-                cfg[month]["external positions"][ext_position]
-                )
-            month_overview_df = processor.add_value_to_df(
-                month_overview_df,
-                ext_position,
-                "counts",
-                1
-                )
+    if output_format == "csv":
+        return 0
 
-        # change signs and index for a more convenient view
-        month_overview_df = processor.make_values_absolut(
-            month_overview_df,
-            column='Sum'
+    # all months of the chunk are written at once
+    long_df = pd.concat(long_dfs)
+    long_df.index = pd.RangeIndex(row_offset, row_offset + len(long_df))
+    if output_format == "long_csv":
+        writer.write_csv(long_df, cfg["base_dir"] + "positions.csv")
+    elif output_format == "parquet":
+        positions_path = cfg["base_dir"] + "positions.parquet"
+        writer.submit(
+            positions_path,
+            long_df.to_parquet,
+            positions_path,
+            partition_cols=[MONTH_COLUMN],
+            index=False
             )
-        month_overview_df.set_index('Position', inplace=True)
+    return len(long_df)
 
-        # plot
-        plotter = Month_Plotter(month_overview_df)
-        path = cfg["base_dir"] + cfg[month]["subdir"] + "bar.pdf"
-        plotter.print_bar_chart(path, f"Expenses {month}")
 
-        path = cfg["base_dir"] + cfg[month]["subdir"] + "pie.pdf"
-        plotter.print_pie_chart(path, f"Expenses {month}")
+def create_month_overview(month: str,
+                          euro_df: pd.DataFrame,
+                          count_df: pd.DataFrame,
+                          cfg: dict
+                          ) -> pd.DataFrame:
+    """Creates the overview of a month containing the summed up expenditures
+    in Euro and the number of expenditures of each position.
 
-        # sum everything up
-        month_overview_df = processor.sum_columns(month_overview_df)
+    Args:
+        month: The month.
+        euro_df: Summed up expenditures in whole Euro of each position,
+            including the external ones, and month.
+        count_df: Number of expenditures of each position and month.
+        cfg: Config file.
 
-        # save to disk
-        path = cfg["base_dir"] + cfg[month]["subdir"] + "overview.csv"
-        month_overview_df.to_csv(path, sep=';')
+    Returns:
+        The overview of the month, indexed by the positions.
+    """
+    rows = list(cfg["positions"]) + [OTHERS] + \
+        list(cfg[month]["external positions"])
+    month_overview_df = pd.DataFrame({
+        "Sum": euro_df.loc[rows, month],
+        "counts": count_df.loc[rows, month]
+        })
+    month_overview_df.index.name = 'Position'
+    return month_overview_df
+
+
+def create_euro_aggregates(cfg: dict,
+                           sum_df: pd.DataFrame,
+                           count_df: pd.DataFrame
+                           ) -> tuple:
+    """Adds the external expenses, e.g. from other bank accounts, to the
+    aggregates of a year and changes signs and units for a more convenient
+    view. All overviews are slices of these whole year aggregates.
+
+    Args:
+        cfg: Config file of the year.
+        sum_df: Summed up expenditures in cents of each position and month.
+        count_df: Number of expenditures of each position and month.
+
+    Returns:
+        Tuple of the summed up expenditures in whole Euro and the number of
+        expenditures of each position, including the external ones, and
+        month.
+    """
+    processor = Dataframe_processor()
+    sum_df, count_df = processor.add_external_positions(sum_df, count_df, cfg)
+    euro_df = processor.make_values_absolut(sum_df, column=MONTHS)
+    euro_df = processor.convert_cents_to_whole_euros(euro_df, column=MONTHS)
+    return euro_df, count_df
+
+
+def create_year_overview(cfg: dict, euro_df: pd.DataFrame) -> pd.DataFrame:
+    """Creates the overview of a year with the positions of its first month,
+    months without an expenditure of a position count with 0.
+
+    Args:
+        cfg: Config file of the year.
+        euro_df: Summed up expenditures in whole Euro of each position,
+            including the external ones, and month.
+
+    Returns:
+        The overview of the year, with the summed up expenditures of each
+        month (rows) and position (columns) and their total.
+    """
+    year_positions = list(cfg["positions"]) + [OTHERS] + \
+        list(cfg[MONTHS[0]]["external positions"])
+    overview_year_df = euro_df.loc[year_positions].transpose()
+    overview_year_df["Total"] = euro_df.sum()
+    return overview_year_df
+
+
+def create_year_outputs(cfg: dict,
+                        sum_df: pd.DataFrame,
+                        count_df: pd.DataFrame,
+                        changed_months: dict,
+                        outputs: list[str],
+                        renderer: "Chart_renderer",
+                        writer: Output_writer,
+                        reporter: Html_reporter = None
+                        ) -> pd.DataFrame:
+    """Creates the overviews and charts of a year from its aggregates.
+
+    Args:
+        cfg: Config file of the year.
+        sum_df: Summed up expenditures in cents of each position and month.
+        count_df: Number of expenditures of each position and month.
+        changed_months: Dict mapping each output to the months for which it
+            is regenerated.
+        outputs: Outputs to be generated.
+        renderer: Renderer the charts are added to, None if no charts are
+            generated.
+        writer: Writer saving the files in the background.
+        reporter: Reporter the overviews are added to, None if no html
+            report is generated.
+
+    Returns:
+        The overview of the year, with the summed up expenditures in Euro of
+        each month (rows) and position (columns).
+    """
+    processor = Dataframe_processor()
+    euro_df, count_df = create_euro_aggregates(cfg, sum_df, count_df)
+
+    # Expenditures for each month
+    for month in MONTHS:
+        month_overview_df = create_month_overview(
+            month,
+            euro_df,
+            count_df,
+            cfg
+            )
+        if reporter is not None:
+            reporter.add_month(cfg["year"], month, month_overview_df)
 
-        # Append monthly overview to year dataframe
-        overview_year_df[month] = month_overview_df["Sum"].to_list()
+        # plot
+        if month in changed_months["month-charts"]:
+            from visualizer.plotting import Month_Plotter
+            plotter = Month_Plotter(month_overview_df)
+            path = cfg["base_dir"] + cfg[month]["subdir"] + "bar.pdf"
+            renderer.add(plotter, "print_bar_chart", path,
+                         f"Expenses {month}")
+
+            path = cfg["base_dir"] + cfg[month]["subdir"] + "pie.pdf"
+            renderer.add(plotter, "print_pie_chart", path,
+                         f"Expenses {month}")
+
+        # save to disk
+        if month in changed_months["overview"]:
+            path = cfg["base_dir"] + cfg[month]["subdir"] + "overview.csv"
+            writer.write_csv(processor.sum_columns(month_overview_df.copy()),
+                             path)
 
-    # year dataframe
-    overview_year_df.set_index('Position', inplace=True)
-    overview_year_df = overview_year_df.transpose()
+    overview_year_df = create_year_overview(cfg, euro_df)
 
     # print
-    path = cfg["base_dir"] + "overview.csv"
-    overview_year_df.to_csv(path, sep=';')
+    if "overview" in outputs:
+        path = cfg["base_dir"] + "overview.csv"
+        writer.write_csv(overview_year_df, path)
 
     # plot lines
-    plotter = Year_Plotter(overview_year_df, income_df)
-    path = cfg["base_dir"] + "summary_line.pdf"
-    plotter.print_line_chart(path, cfg["year"])
+    if "year-charts" in outputs:
+        from visualizer.plotting import Year_Plotter
+        income_df = Loader(cfg).create_income_df_from_config()
+        plotter = Year_Plotter(overview_year_df, income_df)
+        path = cfg["base_dir"] + "summary_line.pdf"
+        renderer.add(plotter, "print_line_chart", path, cfg["year"])
+
+        path = cfg["base_dir"] + "summary_bar.pdf"
+        renderer.add(plotter, "print_stacked_bar_chart", path, cfg["year"])
+
+    if reporter is not None:
+        reporter.add_year(cfg["year"], overview_year_df,
+                          Loader(cfg).create_income_df_from_config())
+
+    return overview_year_df
+
+
+def create_year_over_year_outputs(cfg: dict,
+                                  overview_year_dfs: dict,
+                                  renderer: "Chart_renderer",
+                                  writer: Output_writer
+                                  ) -> None:
+    """Compares the years of a multi-year run.
+
+    Saves the expenditures of each position per year (years_overview.csv),
+    their change in percent compared to the previous year
+    (years_change.csv) and the total expenditures of each month per year
+    (years_month_totals.csv) and plots them.
+
+    Args:
+        cfg: Config file.
+        overview_year_dfs: Dict mapping each year to its overview.
+        renderer: Renderer the charts are added to.
+        writer: Writer saving the files in the background.
+    """
+    years_df = pd.DataFrame(
+        {year: overview_year_df.sum()
+         for year, overview_year_df in overview_year_dfs.items()}
+        ).fillna(0).astype('int64').transpose()
+    change_df = (years_df.pct_change() * 100).round(1)
+    change_df = change_df.replace([np.inf, -np.inf], np.nan).iloc[1:]
+    month_totals_df = pd.DataFrame(
+        {year: overview_year_df["Total"]
+         for year, overview_year_df in overview_year_dfs.items()}
+        )
+
+    writer.write_csv(years_df, cfg["base_dir"] + "years_overview.csv")
+    writer.write_csv(change_df, cfg["base_dir"] + "years_change.csv")
+    writer.write_csv(month_totals_df,
+                     cfg["base_dir"] + "years_month_totals.csv")
+
+    title = f"{min(overview_year_dfs)} - {max(overview_year_dfs)}"
+    from visualizer.plotting import Years_Plotter
+    plotter = Years_Plotter(years_df, month_totals_df)
+    renderer.add(plotter, "print_grouped_bar_chart",
+                 cfg["base_dir"] + "years_bar.pdf", title)
+    renderer.add(plotter, "print_line_chart",
+                 cfg["base_dir"] + "years_line.pdf", title)
+
+
+def create_alert_outputs(cfg: dict,
+                         year_cfgs: dict,
+                         aggregates: dict,
+                         writer: Output_writer
+                         ) -> None:
+    """Tracks the expenditures of each position month by month, from the
+    first to the last month with expenditures, see Spending_tracker.
+
+    Saves the budget overruns and spikes (alerts.csv) and the rolling
+    statistics of all months (statistics.csv). Both are computed from the
+    aggregates, so the account history is not read again.
+
+    Args:
+        cfg: Config file.
+        year_cfgs: Dict mapping each year to its config.
+        aggregates: Dict mapping each year to its aggregates, see
+            create_aggregates.
+        writer: Writer saving the files in the background.
+    """
+    euro_dfs = []
+    month_counts = []
+    for year, year_cfg in year_cfgs.items():
+        euro_df, _ = create_euro_aggregates(year_cfg, *aggregates[year])
+        euro_df.columns = [f"{year} {month}" for month in MONTHS]
+        euro_dfs.append(euro_df)
+        month_counts += aggregates[year][1].sum().to_list()
+    euro_df = pd.concat(euro_dfs, axis=1).fillna(0)
+    active_months = np.flatnonzero(month_counts)
+
+    tracker = Spending_tracker(cfg, euro_df.index)
+    if len(active_months):
+        for month in euro_df.columns[active_months[0]:
+                                     active_months[-1] + 1]:
+            tracker.push(month, euro_df[month].to_numpy())
+    writer.write_csv(tracker.get_alerts().set_index("Month"),
+                     cfg["base_dir"] + "alerts.csv")
+    writer.write_csv(tracker.get_statistics().set_index("Month"),
+                     cfg["base_dir"] + "statistics.csv")
+
+
+def create_exclusion_report(cfg: dict,
+                            exclusion_counts: dict
+                            ) -> pd.DataFrame:
+    """Creates the report of the entries removed by each exclusion rule.
+
+    Args:
+        cfg: Config file.
+        exclusion_counts: Dict mapping each export path to the number of
+            entries removed by each rule, see load_clean_account_history.
+
+    Returns:
+        Dataframe with one row per rule and one column per export and the
+        total.
+    """
+    report_df = pd.DataFrame(exclusion_counts, dtype="int64")
+    rules = Excluder(cfg).names
+    report_df = report_df.reindex(
+        rules + [rule for rule in report_df.index if rule not in rules],
+        fill_value=0
+        ).fillna(0).astype("int64")
+    report_df["Total"] = report_df.sum(axis=1)
+    report_df.index.name = "Rule"
+    return report_df
+
+
+def create_aggregates(cfg: dict, year_cfgs: dict) -> dict:
+    """Creates the zeroed aggregates of each year.
+
+    Args:
+        cfg: Config file.
+        year_cfgs: Dict mapping each year to its config.
+
+    Returns:
+        Dict mapping each year to a list of the summed up expenditures and
+        the number of expenditures of each position (rows) and month
+        (columns).
+    """
+    loader = Loader(cfg)
+    return {
+        year: [loader.create_position_month_dataset(),
+               loader.create_position_month_dataset()]
+        for year in year_cfgs
+        }
+
+
+def aggregate_account_history(chunks,
+                              cfg: dict,
+                              year_cfgs: dict,
+                              categorizer: Categorizer,
+                              aggregates: dict,
+                              fingerprints: dict,
+                              profiler: Profiler = None,
+                              keep_chunks: bool = False
+                              ) -> list:
+    """Assigns the expenditures of each chunk to their positions and adds
+    them to the aggregates and fingerprints of their years.
+
+    Args:
+        chunks: Iterable over the cleaned chunks of the account history.
+        cfg: Config file.
+        year_cfgs: Dict mapping each year to its config.
+        categorizer: Categorizer of the positions in the config.
+        aggregates: Dict mapping each year to its aggregates, see
+            create_aggregates. They are updated in place.
+        fingerprints: Dict mapping each year to its fingerprints. They are
+            updated in place, an empty dict skips the fingerprinting.
+        profiler: Profiler measuring the categorization and aggregation.
+        keep_chunks: Returns the categorized chunks.
+
+    Returns:
+        List of the categorized chunks, empty if they are not kept.
+    """
+    profiler = profiler or Profiler()
+    positions = Loader(cfg).create_position_month_dataset().index.to_list()
+    categorized_chunks = []
+    for account_history_df in chunks:
+        account_history_df = categorize_account_history(
+            account_history_df,
+            cfg,
+            categorizer,
+            profiler
+            )
+        # a single groupby per chunk aggregates all months of all years
+        with profiler.stage("aggregate") as stats:
+            for year_fingerprints in fingerprints.values():
+                year_fingerprints.update(account_history_df)
+            chunk_aggregates = \
+                Dataframe_processor.aggregate_positions_per_year_and_month(
+                    account_history_df,
+                    cfg,
+                    list(year_cfgs),
+                    positions,
+                    POSITION_COLUMN
+                    )
+            for year, (chunk_sum_df, chunk_count_df) in \
+                    chunk_aggregates.items():
+                aggregates[year][0] += chunk_sum_df
+                aggregates[year][1] += chunk_count_df
+            stats["rows"] = len(account_history_df)
+        if keep_chunks:
+            categorized_chunks.append(account_history_df)
+    return categorized_chunks
+
+
+def generate_outputs(cfg: dict,
+                     year_cfgs: dict,
+                     aggregates: dict,
+                     fingerprints: dict,
+                     categorized_chunks,
+                     outputs: list[str] = DEFAULT_OUTPUTS,
+                     rebuild: bool = False,
+                     profiler: Profiler = None,
+                     exclusion_counts: dict = None
+                     ) -> None:
+    """Generates the selected outputs of all years from their aggregates.
+
+    Only the months whose expenditures or config changed since an output
+    was generated the last time are regenerated.
+
+    Args:
+        cfg: Config file.
+        year_cfgs: Dict mapping each year to its config.
+        aggregates: Dict mapping each year to its aggregates, see
+            create_aggregates.
+        fingerprints: Dict mapping each year to its fingerprints.
+        categorized_chunks: Iterable over the categorized chunks of the
+            account history, only consumed if position datasets are saved.
+        outputs: Outputs to be generated, see visualize.
+        rebuild: Regenerates the outputs of all months.
+        profiler: Profiler measuring the writing and plotting.
+        exclusion_counts: Number of entries removed by each exclusion rule
+            of each export, saved as exclusions.csv with the overview.
+    """
+    profiler = profiler or Profiler()
+    writer = Output_writer(cfg.get("writer_threads", 4))
+    positions = Loader(cfg).create_position_month_dataset().index.to_list()
+    renderer = None
+    if any(output in outputs for output in CHART_OUTPUTS):
+        from visualizer.plotting import Chart_renderer
+        renderer = Chart_renderer(cfg.get("plot_workers", 1))
+    reporter = None
+    if "html-report" in outputs:
+        years = list(year_cfgs)
+        title = f"{min(years)} - {max(years)}" if len(years) > 1 \
+            else f"{years[0]}"
+        reporter = Html_reporter(f"Expenses {title}")
+
+    # create project folders
+    for year_cfg in year_cfgs.values():
+        Loader(year_cfg).make_dirs()
+
+    # only the months whose expenditures or config changed since the output
+    # was generated the last time are regenerated
+    # (a file created by each output is checked to detect deleted outputs)
+    changed_months = {}
+    position_files = {
+        "csv": "{subdir}" + OTHERS + ".csv",
+        "long_csv": "positions.csv",
+        "parquet": "positions.parquet"
+        }
+    for year, year_cfg in year_cfgs.items():
+        changed_months[year] = {}
+        for output, filename in [
+                ("positions",
+                 position_files[cfg.get("position_output_format", "csv")]),
+                ("overview", "{subdir}overview.csv"),
+                ("month-charts", "{subdir}bar.pdf")
+                ]:
+            if output not in outputs:
+                changed_months[year][output] = []
+            elif rebuild:
+                changed_months[year][output] = MONTHS
+            else:
+                changed_months[year][output] = \
+                    fingerprints[year].get_changed_months(output, filename)
+        # a single positions file always contains all months
+        if changed_months[year]["positions"] and \
+                cfg.get("position_output_format", "csv") != "csv":
+            changed_months[year]["positions"] = MONTHS
+
+    # save the expenditures of each position
+    year_months = {year: changed_months[year]["positions"]
+                   for year in year_cfgs}
+    if any(year_months.values()):
+        with profiler.stage("write position csv files"):
+            write_position_datasets(
+                categorized_chunks,
+                year_cfgs,
+                year_months,
+                positions,
+                writer
+                )
+
+    # overviews and charts of each year
+    overview_year_dfs = {}
+    for year, year_cfg in year_cfgs.items():
+        overview_year_dfs[year] = create_year_outputs(
+            year_cfg,
+            aggregates[year][0],
+            aggregates[year][1],
+            changed_months[year],
+            outputs,
+            renderer,
+            writer,
+            reporter
+            )
+
+    # comparison of the years
+    if cfg.get("date_range") and "year-over-year" in outputs:
+        create_year_over_year_outputs(
+            cfg,
+            overview_year_dfs,
+            renderer,
+            writer
+            )
+
+    # budgets and spikes of the expenditures of each position
+    if "alerts" in outputs:
+        with profiler.stage("track expenditures"):
+            create_alert_outputs(cfg, year_cfgs, aggregates, writer)
+
+    # entries removed by each exclusion rule
+    if exclusion_counts is not None and "overview" in outputs:
+        writer.write_csv(
+            create_exclusion_report(cfg, exclusion_counts),
+            cfg["base_dir"] + "exclusions.csv"
+            )
+
+    # all months and years in a single html file
+    if reporter is not None:
+        path = cfg["base_dir"] + "report.html"
+        writer.submit(path, reporter.save, path)
+
+    # render all charts at once, in parallel if configured
+    if renderer is not None:
+        renderer.render(profiler)
+
+    # wait for the files written in the background
+    with profiler.stage("wait for csv writes"):
+        writer.close()
+
+    # remember the state of the generated outputs for the next run
+    for year_fingerprints in fingerprints.values():
+        year_fingerprints.save(
+            [output for output in outputs
+             if output not in ["year-charts", "year-over-year",
+                               "html-report", "alerts"]]
+            )
+
+
+def summarize(config_path: str) -> None:
+    """Prints the overview of each year as text table, without writing any
+    output or importing matplotlib.
+
+    Args:
+        config_path: Path to config file.
+    """
+    cfg = load_config(config_path)
+    year_cfgs = create_year_configs(cfg)
+    categorizer = Categorizer(
+        cfg["positions"],
+        cfg.get("category_memo_dir")
+        )
+    aggregates = create_aggregates(cfg, year_cfgs)
+    aggregate_account_history(
+        load_clean_account_history(cfg, Loader(cfg), Dataframe_processor()),
+        cfg,
+        year_cfgs,
+        categorizer,
+        aggregates,
+        {}
+        )
+    categorizer.save()
+    for year, year_cfg in year_cfgs.items():
+        euro_df, _ = create_euro_aggregates(year_cfg, *aggregates[year])
+        print(f"Expenses {year} in Euro")
+        print(create_year_overview(year_cfg, euro_df).to_string())
+        print()
+
+
+def visualize(config_path: str,
+              clear_cache: bool = False,
+              rebuild: bool = False,
+              profile: bool = False,
+              profile_stage: str = None,
+              outputs: list[str] = DEFAULT_OUTPUTS,
+              overrides: dict = None,
+              cache_keys: dict = None
+              ) -> None:
+    """Starts the visualization procedure.
+
+    If a "date_range" is configured, all years within it are processed in a
+    single run, see create_year_configs.
+
+    Args:
+        config_path: Path to config file.
+        clear_cache: Removes all entries of the cache before running.
+        rebuild: Regenerates the outputs of all months, even if neither
+            their expenditures nor their config changed.
+        profile: Measures each stage and saves the report as profile.json
+            and profile.txt in the base dir.
+        profile_stage: Name of a stage that is additionally profiled with
+            cProfile, the stats are saved as profile.prof in the base dir.
+        outputs: Outputs to be generated, only the stages they depend on are
+            run. "overview" are the overview csv files of the months and the
+            year, "positions" the csv files of the expenditures of each
+            position, "month-charts" and "year-charts" the pdf charts and
+            "year-over-year" the comparison of the years of a multi-year
+            run, "html-report" a single html file with all overviews and
+            charts, drawn in the browser without matplotlib, and "alerts"
+            the budget overruns and spikes of the positions. All but
+            "html-report" and "alerts" by default.
+        overrides: Config keys replacing the ones of the config file, e.g.
+            the shared cache dir of a batch run.
+        cache_keys: Cache keys of the exports created before, e.g. by the
+            batch run, see Cache.
+    """
+    profiler = Profiler(profile or profile_stage is not None, profile_stage)
+
+    # load config
+    with profiler.stage("load config"):
+        cfg = load_config(config_path)
+    cfg.update(overrides or {})
+    year_cfgs = create_year_configs(cfg)
+
+    # init classes
+    loader = Loader(cfg)
+    processor = Dataframe_processor()
+    categorizer = Categorizer(
+        cfg["positions"],
+        cfg.get("category_memo_dir")
+        )
+
+    # summed up expenditures and number of expenditures for each position
+    # and month of each year, accumulated over all chunks of the account
+    # history
+    aggregates = create_aggregates(cfg, year_cfgs)
+    fingerprints = {year: Fingerprints(year_cfg)
+                    for year, year_cfg in year_cfgs.items()}
+
+    # load account history chunk by chunk (or all at once if no chunk size
+    # is configured), so only the aggregates are kept for the whole history
+    streaming = cfg.get("chunk_size") is not None
+    deduplicator = create_deduplicator(cfg)
+    exclusion_counts = {}
+    # the exports are hashed once, even if they are read twice
+    cache_keys = {} if cache_keys is None else cache_keys
+    chunks = load_clean_account_history(
+        cfg,
+        loader,
+        processor,
+        clear_cache,
+        profiler,
+        deduplicator,
+        exclusion_counts,
+        cache_keys
+        )
+    categorized_chunks = aggregate_account_history(
+        chunks,
+        cfg,
+        year_cfgs,
+        categorizer,
+        aggregates,
+        fingerprints,
+        profiler,
+        keep_chunks=not streaming and "positions" in outputs
+        )
+
+    # remember the positions of the identifier strings and the fingerprints
+    # of the expenditures for the next runs
+    categorizer.save()
+    if deduplicator is not None:
+        deduplicator.save()
+
+    # when streaming, the account history is read a second time for the
+    # position datasets to keep only a chunk in memory
+    if streaming:
+        categorized_chunks = (
+            categorize_account_history(chunk, cfg, categorizer)
+            for chunk in load_clean_account_history(
+                cfg, loader, processor, deduplicator=deduplicator,
+                cache_keys=cache_keys
+                )
+            )
+
+    generate_outputs(
+        cfg,
+        year_cfgs,
+        aggregates,
+        fingerprints,
+        categorized_chunks,
+        outputs,
+        rebuild,
+        profiler,
+        exclusion_counts
+        )
 
-    path = cfg["base_dir"] + "summary_bar.pdf"
-    plotter.print_stacked_bar_chart(path, cfg["year"])
+    profiler.save(cfg["base_dir"] + "profile.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,320 @@
+# Class for keeping the account history in memory and updating the outputs
+# whenever the exports or the config change
+import hashlib
+import io
+import time
+from visualizer.caching import CACHE_CONFIG_KEYS
+from visualizer.categorizing import Categorizer
+from visualizer.deduplicating import Deduplicator
+from visualizer.const import DEFAULT_OUTPUTS
+from visualizer.fingerprinting import Fingerprints
+from visualizer.loading import Loader
+from visualizer.processing import Dataframe_processor
+from visualizer.profiling import Profiler
+from visualizer.utils import (create_year_configs, get_exports,
+                              get_file_stat, load_config)
+from visualizer.visualize import (aggregate_account_history,
+                                  clean_account_history, create_aggregates,
+                                  deduplicate_export, generate_outputs,
+                                  restrict_to_date_range, tag_account)
+
+# Config keys that affect the parsed account history, if one of them changes
+# all exports are parsed again
+PARSE_CONFIG_KEYS = CACHE_CONFIG_KEYS + ["account_year_history", "date_range",
+                                         "year", "deduplicate",
+                                         "dedup_index_dir"]
+
+
+class Watcher:
+
+    def __init__(self, config_path: str,
+                 outputs: list[str] = DEFAULT_OUTPUTS,
+                 interval: float = 5.0,
+                 profile: bool = False
+                 ) -> None:
+        """Inits the watcher.
+
+        The cleaned and categorized account history and the aggregates are
+        kept in memory between two refreshes. Rows appended to an export
+        and new exports are parsed, deduplicated against the kept account
+        history and aggregated on their own, a change of the config only
+        aggregates the kept account history again. Only the outputs of the
+        months affected by a change are regenerated.
+
+        Args:
+            config_path: Path to config file.
+            outputs: Outputs to be generated, see visualize.
+            interval: Seconds between two checks for changes.
+            profile: Measures each refresh and saves the report in the base
+                dir.
+        """
+        self.config_path = config_path
+        self.outputs = outputs
+        self.interval = interval
+        self.profile = profile
+        self.processor = Dataframe_processor()
+        # exports of the last loaded config, also watched after a reset
+        self.export_paths = []
+        self.export_settings = {}
+        self.accounts = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops all state, so the next refresh starts from scratch.
+        """
+        self.cfg = None
+        self.year_cfgs = {}
+        self.categorizer = None
+        self.deduplicator = None
+        self.aggregates = {}
+        self.fingerprints = {}
+        # state of each export: its size and modification time, the number
+        # of parsed bytes, their hash, the csv header, the chunks and the
+        # number of entries removed by each exclusion rule
+        self.exports = {}
+
+    def snapshot(self) -> tuple:
+        """Returns the size and modification time of the config and the
+        exports, to detect changes without reading them.
+
+        Returns:
+            Tuple of the stats, None for missing files.
+        """
+        paths = self.export_paths
+        if self.cfg is not None:
+            # glob patterns may match new exports, a pattern matching none
+            # is reported by the refresh
+            try:
+                paths = [export["path"] for export in get_exports(self.cfg)]
+            except FileNotFoundError:
+                paths = []
+        return tuple(get_file_stat(path)
+                     for path in [self.config_path] + paths)
+
+    def reload_config(self) -> bool:
+        """Loads the config if it changed since the last refresh.
+
+        Returns:
+            True if the config changed.
+        """
+        cfg = load_config(self.config_path)
+        if cfg == self.cfg:
+            return False
+        if self.cfg is None or any(cfg.get(key) != self.cfg.get(key)
+                                   for key in PARSE_CONFIG_KEYS):
+            self.exports = {}
+        if self.cfg is None or cfg["positions"] != self.cfg["positions"]:
+            self.categorizer = Categorizer(
+                cfg["positions"],
+                cfg.get("category_memo_dir")
+                )
+        self.cfg = cfg
+        self.year_cfgs = create_year_configs(cfg)
+        return True
+
+    def update_exports(self) -> None:
+        """Lists the exports of the config, including the new files matching
+        its glob patterns. If the accounts change, all exports are parsed
+        again.
+        """
+        exports = get_exports(self.cfg)
+        self.export_paths = [export["path"] for export in exports]
+        self.export_settings = {export["path"]: export for export in exports}
+        accounts = list(dict.fromkeys(
+            export["account"] for export in exports if export["account"]
+            ))
+        if accounts != self.accounts:
+            self.exports = {}
+        self.accounts = accounts
+
+    def read_export(self, path: str, profiler: Profiler) -> tuple:
+        """Parses and cleans the rows of an export that are new since the
+        last refresh.
+
+        If the export only grew and its previously parsed bytes are
+        unchanged, only the appended bytes are parsed, otherwise the whole
+        export.
+
+        Args:
+            path: Path to the export.
+            profiler: Profiler measuring the loading and cleaning.
+
+        Returns:
+            Tuple of the list of cleaned chunks and whether they were
+            appended to the export.
+        """
+        with open(path, "rb") as csv_file:
+            content = csv_file.read()
+        state = self.exports.get(path)
+        appended = state is not None and \
+            len(content) >= state["offset"] and \
+            hashlib.sha256(content[:state["offset"]]).digest() == \
+            state["digest"]
+        if appended:
+            data = state["header"] + content[state["offset"]:]
+        else:
+            state = {"header": content[:content.find(b"\n") + 1],
+                     "chunks": [],
+                     "exclusions": {}}
+            data = content
+        state.update({
+            "stat": get_file_stat(path),
+            "offset": len(content),
+            "digest": hashlib.sha256(content).digest()
+            })
+        self.exports[path] = state
+        if appended and len(data) == len(state["header"]):
+            return [], appended
+
+        export = self.export_settings[path]
+        chunks = profiler.iterate(
+            "load csv",
+            Loader(self.cfg).load_dataframe_chunks(
+                io.BytesIO(data),
+                self.cfg.get("chunk_size"),
+                export["encoding"],
+                export["columns"]
+                )
+            )
+        cleaned_chunks = []
+        for chunk in chunks:
+            chunk = clean_account_history(chunk, self.cfg, self.processor,
+                                          profiler, state["exclusions"])
+            chunk = tag_account(chunk, export, self.accounts, self.processor)
+            chunk = restrict_to_date_range(chunk, self.cfg, self.processor)
+            cleaned_chunks.append(
+                deduplicate_export(chunk, export, self.deduplicator, profiler)
+                )
+        return cleaned_chunks, appended
+
+    def get_categorized_chunks(self):
+        """Yields the kept account history in the chunks a run of visualize
+        would produce, i.e. each export as a whole if no chunk size is
+        configured, so the position datasets are the same.
+
+        Yields:
+            The categorized chunks.
+        """
+        for path in self.export_paths:
+            state = self.exports[path]
+            if self.cfg.get("chunk_size") is not None or \
+                    len(state["chunks"]) < 2:
+                yield from state["chunks"]
+            else:
+                yield Dataframe_processor.concat_dataframes(state["chunks"])
+
+    def refresh(self) -> bool:
+        """Applies the changes of the config and the exports since the last
+        refresh and regenerates the affected outputs.
+
+        Returns:
+            True if anything changed.
+        """
+        profiler = Profiler(self.profile)
+        reaggregate = self.reload_config()
+        self.update_exports()
+        removed = [path for path in self.exports
+                   if path not in self.export_paths]
+        for path in removed:
+            del self.exports[path]
+            reaggregate = True
+        # the duplicates of the expenditures of a removed export have to be
+        # taken from the other exports
+        if removed and self.deduplicator is not None:
+            self.exports = {}
+        if not self.exports:
+            reaggregate = True
+            if self.cfg.get("deduplicate", True):
+                self.deduplicator = Deduplicator(
+                    self.cfg,
+                    list(self.export_settings.values())
+                    )
+
+        appended_chunks = {}
+        for path in self.export_paths:
+            state = self.exports.get(path)
+            if state is not None and state["stat"] == get_file_stat(path):
+                continue
+            chunks, appended = self.read_export(path, profiler)
+            if appended or state is None:
+                appended_chunks[path] = chunks
+            elif self.deduplicator is not None:
+                # a rewritten export may no longer contain the duplicates
+                # removed from the other exports, so all are parsed again
+                self.exports = {}
+                return self.refresh()
+            else:
+                self.exports[path]["chunks"] = chunks
+                reaggregate = True
+
+        # a changed config or a rewritten export is aggregated from the
+        # kept account history, appended rows and new exports on their own
+        if reaggregate:
+            self.aggregates = create_aggregates(self.cfg, self.year_cfgs)
+            self.fingerprints = {
+                year: Fingerprints(year_cfg)
+                for year, year_cfg in self.year_cfgs.items()
+                }
+            appended_chunks = {
+                path: state["chunks"] + appended_chunks.get(path, [])
+                for path, state in self.exports.items()
+                }
+            for state in self.exports.values():
+                state["chunks"] = []
+        elif not any(appended_chunks.values()):
+            return False
+        for path, chunks in appended_chunks.items():
+            self.exports[path]["chunks"] += aggregate_account_history(
+                chunks,
+                self.cfg,
+                self.year_cfgs,
+                self.categorizer,
+                self.aggregates,
+                self.fingerprints,
+                profiler,
+                keep_chunks=True
+                )
+        self.categorizer.save()
+        if self.deduplicator is not None:
+            self.deduplicator.save()
+
+        generate_outputs(
+            self.cfg,
+            self.year_cfgs,
+            self.aggregates,
+            self.fingerprints,
+            self.get_categorized_chunks(),
+            self.outputs,
+            profiler=profiler,
+            exclusion_counts={path: self.exports[path]["exclusions"]
+                              for path in self.export_paths}
+            )
+        profiler.save(self.cfg["base_dir"] + "profile.json")
+        return True
+
+    def run(self) -> None:
+        """Refreshes the outputs whenever the config or an export changes,
+        until interrupted with Ctrl+C.
+
+        A failing refresh, e.g. because of a broken config, drops the kept
+        state and is retried once the config or an export changes again.
+        """
+        print(f"Watching {self.config_path} every {self.interval} seconds, "
+              "stop with Ctrl+C")
+        last_snapshot = None
+        try:
+            while True:
+                snapshot = self.snapshot()
+                if snapshot != last_snapshot:
+                    try:
+                        if self.refresh():
+                            print(f"{time.strftime('%H:%M:%S')} "
+                                  "outputs updated")
+                    except Exception as error:
+                        print(f"{time.strftime('%H:%M:%S')} "
+                              f"refresh failed: {error!r}")
+                        self.reset()
+                    last_snapshot = snapshot
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("Stopped watching")
@@ -0,0 +1,65 @@
+# Class for writing the outputs in background threads
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+
+class Output_writer:
+
+    def __init__(self, threads: int = 4) -> None:
+        """Inits the writer.
+
+        Each path is always written by the same thread, so writes to the same
+        file (e.g. appending chunks) keep their order.
+
+        Args:
+            threads: Number of background threads writing the files.
+        """
+        self.executors = [ThreadPoolExecutor(max_workers=1)
+                          for _ in range(max(threads, 1))]
+        self.futures = []
+        self.written_paths = set()
+
+    def submit(self, path: str, function, *args, **kwargs) -> None:
+        """Runs a function writing a file in the background.
+
+        Args:
+            path: Path of the written file.
+            function: Function writing the file.
+            args: Arguments of the function.
+            kwargs: Keyword arguments of the function.
+        """
+        index = zlib.crc32(str(path).encode()) % len(self.executors)
+        self.futures.append(
+            self.executors[index].submit(function, *args, **kwargs)
+            )
+
+    def write_csv(self, dataframe: pd.DataFrame, path: str) -> None:
+        """Writes a dataframe to a csv file in the background. If the file
+        has already been written before, the rows are appended to it without
+        header.
+
+        The dataframe must not be changed afterwards.
+
+        Args:
+            dataframe: Dataframe to be written.
+            path: Path to the csv file.
+        """
+        if path in self.written_paths:
+            self.submit(path, dataframe.to_csv, path, sep=';', mode='a',
+                        header=False)
+        else:
+            self.submit(path, dataframe.to_csv, path, sep=';')
+            self.written_paths.add(path)
+
+    def close(self) -> None:
+        """Waits until all files are written.
+
+        Raises:
+            The first exception raised while writing a file.
+        """
+        for executor in self.executors:
+            executor.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+        self.futures = []